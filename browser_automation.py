@@ -7,14 +7,23 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import TimeoutException, NoSuchWindowException, WebDriverException
 from webdriver_manager.chrome import ChromeDriverManager
 import os
+import re
+import math
+import json
 import time
+import atexit
+import urllib.request
 import platform
+import threading
+from collections import deque
+from datetime import datetime
 from config import (
     TARGET_URL,
     TARGET_PAGE_SELECTOR,
+    TRADINGVIEW_BASE_URL,
     SCREENSHOT_DIR,
     SCREENSHOT_WIDTH,
     SCREENSHOT_HEIGHT,
@@ -22,9 +31,23 @@ from config import (
     CHROME_DEBUG_PORT,
     CHROME_HEADLESS,
     CHROME_USER_DATA_DIR,
-    CHROME_PROFILE_NAME
+    CHROME_PROFILE_NAME,
+    BROWSER_SESSION_REUSE,
+    BROWSER_SESSION_MAX_AGE,
+    CHROMEDRIVER_CACHE_FILE,
+    CAPTURE_PARALLEL_TABS,
+    CAPTURE_MAX_TABS
 )
 from PIL import Image
+from page_readiness import (
+    enable_network_logging,
+    load_page,
+    wait_until_ready,
+    prepare_navigation,
+    ReadinessWaiter,
+    tab_webview,
+    wait_for_paint
+)
 
 def check_chrome_running():
     """检查Chrome是否正在运行"""
@@ -145,6 +168,154 @@ def verify_chrome_profile(user_data_dir: str, profile_name: str):
         print("[提示] Profile 目录存在，但无法读取详细信息")
         return True  # 仍然返回 True，因为目录存在
 
+def _short_error(error: Exception) -> str:
+    """WebDriver 异常信息的第一行（去掉堆栈）"""
+    message = getattr(error, 'msg', None) or str(error)
+    return message.strip().splitlines()[0] if message.strip() else type(error).__name__
+
+# ChromeDriver 解析缓存
+_chromedriver_cache_lock = threading.Lock()
+# webdriver-manager 解析/下载 ChromeDriver（多个线程同时启动浏览器时只由一个线程下载，其余等待后读缓存）
+_chromedriver_install_lock = threading.Lock()
+
+def get_chrome_version(remote_debugging=None):
+    """
+    获取 Chrome 版本（主版本.次版本.构建号）
+
+    远程调试模式从调试端口的 /json/version 读取正在运行的 Chrome 的版本，
+    否则读取本机安装的 Chrome 的版本
+
+    Args:
+        remote_debugging: 即将启动的浏览器是否连接远程调试端口，None 表示按 USE_REMOTE_DEBUGGING
+
+    Returns:
+        str: 如 '120.0.6099'，获取失败返回 None
+    """
+    if remote_debugging is None:
+        remote_debugging = USE_REMOTE_DEBUGGING
+    try:
+        if remote_debugging:
+            url = f"http://127.0.0.1:{CHROME_DEBUG_PORT}/json/version"
+            with urllib.request.urlopen(url, timeout=2) as response:
+                version = json.loads(response.read().decode('utf-8')).get('Browser', '')
+        else:
+            from webdriver_manager.core.os_manager import OperationSystemManager, ChromeType
+            version = OperationSystemManager().get_browser_version_from_os(ChromeType.GOOGLE) or ''
+    except Exception as e:
+        print(f"[WARNING] 获取 Chrome 版本失败: {e}")
+        return None
+    match = re.search(r'\d+\.\d+\.\d+', version)
+    return match.group(0) if match else None
+
+def _load_chromedriver_cache():
+    try:
+        with open(CHROMEDRIVER_CACHE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_chromedriver_cache(cache):
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(CHROMEDRIVER_CACHE_FILE)), exist_ok=True)
+        temp_path = f"{CHROMEDRIVER_CACHE_FILE}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, CHROMEDRIVER_CACHE_FILE)
+    except OSError as e:
+        print(f"[WARNING] 保存 ChromeDriver 缓存失败: {e}")
+
+def resolve_chromedriver(chrome_version=None, remote_debugging=None):
+    """
+    解析与 Chrome 版本匹配的 ChromeDriver 路径
+
+    按 Chrome 版本缓存 webdriver-manager 解析出的路径（CHROMEDRIVER_CACHE_FILE），
+    同一版本的 Chrome 只在第一次启动时调用 webdriver-manager，Chrome 升级后重新解析
+
+    Args:
+        chrome_version: Chrome 版本，None 表示自动获取（见 get_chrome_version）
+        remote_debugging: 浏览器启动方式，决定自动获取版本时读取哪个 Chrome，None 表示按 USE_REMOTE_DEBUGGING
+
+    Returns:
+        tuple: (ChromeDriver 路径, Chrome 版本, 是否命中缓存)，webdriver-manager 解析失败时路径为 None
+    """
+    if CHROMEDRIVER_CACHE_FILE:
+        chrome_version = chrome_version or get_chrome_version(remote_debugging)
+    use_cache = bool(CHROMEDRIVER_CACHE_FILE and chrome_version)
+
+    def cached_path():
+        with _chromedriver_cache_lock:
+            path = _load_chromedriver_cache().get(chrome_version)
+        return path if path and os.path.isfile(path) else None
+
+    path = cached_path() if use_cache else None
+    if path:
+        return path, chrome_version, True
+
+    # 未命中缓存→调用 webdriver-manager→写入缓存 整个过程持有锁，等待期间其他线程已写入缓存时直接使用
+    with _chromedriver_install_lock:
+        path = cached_path() if use_cache else None
+        if path:
+            return path, chrome_version, True
+
+        try:
+            path = ChromeDriverManager().install()
+        except Exception as e:
+            print(f"[WARNING] webdriver-manager 解析 ChromeDriver 失败: {e}")
+            return None, chrome_version, False
+
+        if use_cache:
+            with _chromedriver_cache_lock:
+                cache = _load_chromedriver_cache()
+                cache[chrome_version] = path
+                _save_chromedriver_cache(cache)
+            print(f"[INFO] 已缓存 Chrome {chrome_version} 对应的 ChromeDriver: {path}")
+    return path, chrome_version, False
+
+def invalidate_chromedriver_cache(chrome_version=None):
+    """
+    删除 ChromeDriver 缓存
+
+    Args:
+        chrome_version: 只删除该版本的记录，None 表示清空
+    """
+    if not CHROMEDRIVER_CACHE_FILE:
+        return
+    with _chromedriver_cache_lock:
+        cache = _load_chromedriver_cache() if chrome_version else {}
+        cache.pop(chrome_version, None)
+        _save_chromedriver_cache(cache)
+
+def _create_driver(chrome_options, remote_debugging=None):
+    """
+    创建 WebDriver，记录 ChromeDriver 解析和 WebDriver 启动耗时
+
+    缓存的 ChromeDriver 启动失败时删除对应缓存记录；没有可用的 ChromeDriver 路径或启动失败时，
+    尝试直接使用系统 ChromeDriver
+
+    Args:
+        chrome_options: Chrome 启动选项
+        remote_debugging: chrome_options 是否连接远程调试端口，None 表示按 USE_REMOTE_DEBUGGING
+    """
+    started = time.monotonic()
+    driver_path, chrome_version, cached = resolve_chromedriver(remote_debugging=remote_debugging)
+    resolved = time.monotonic()
+    print(f"[INFO] ChromeDriver 解析耗时 {resolved - started:.2f}s"
+          f"（{'命中缓存' if cached else '调用 webdriver-manager'}，Chrome {chrome_version or '版本未知'}）")
+
+    driver = None
+    if driver_path:
+        try:
+            driver = webdriver.Chrome(service=Service(driver_path), options=chrome_options)
+        except Exception as e:
+            print(f"[WARNING] 使用 ChromeDriver {driver_path} 启动失败: {_short_error(e)}")
+            if cached:
+                invalidate_chromedriver_cache(chrome_version)
+    if driver is None:
+        # 如果 webdriver-manager 失败，尝试直接使用系统 ChromeDriver
+        driver = webdriver.Chrome(options=chrome_options)
+    print(f"[INFO] WebDriver 启动耗时 {time.monotonic() - resolved:.2f}s，总耗时 {time.monotonic() - started:.2f}s")
+    return driver
+
 def init_browser():
     """初始化浏览器"""
     try:
@@ -155,14 +326,9 @@ def init_browser():
             
             chrome_options = Options()
             chrome_options.add_experimental_option("debuggerAddress", f"127.0.0.1:{CHROME_DEBUG_PORT}")
+            enable_network_logging(chrome_options)
             
-            # 使用 webdriver-manager 自动管理 ChromeDriver
-            try:
-                service = Service(ChromeDriverManager().install())
-                driver = webdriver.Chrome(service=service, options=chrome_options)
-            except Exception:
-                # 如果 webdriver-manager 失败，尝试直接使用系统 ChromeDriver
-                driver = webdriver.Chrome(options=chrome_options)
+            driver = _create_driver(chrome_options, remote_debugging=True)
             
             print("[OK] 成功连接到已运行的Chrome浏览器")
             return driver
@@ -201,6 +367,8 @@ def init_browser():
             # 防止被其他程序篡改的参数
             chrome_options.add_argument('--disable-default-apps')
             chrome_options.add_argument('--disable-sync')  # 禁用同步，避免被其他程序影响
+            # 开启性能日志，用于页面就绪检测中的网络空闲判断
+            enable_network_logging(chrome_options)
             # 添加远程调试端口，方便调试和访问 http://localhost:9222/json
             chrome_options.add_argument(f'--remote-debugging-port={CHROME_DEBUG_PORT}')
             print(f"[INFO] 已启用远程调试端口: {CHROME_DEBUG_PORT} (可访问 http://localhost:{CHROME_DEBUG_PORT}/json)")
@@ -263,13 +431,7 @@ def init_browser():
             else:
                 print("[INFO] 使用无痕模式（未登录状态）")
             
-            # 使用 webdriver-manager 自动管理 ChromeDriver
-            try:
-                service = Service(ChromeDriverManager().install())
-                driver = webdriver.Chrome(service=service, options=chrome_options)
-            except Exception:
-                # 如果 webdriver-manager 失败，尝试直接使用系统 ChromeDriver
-                driver = webdriver.Chrome(options=chrome_options)
+            driver = _create_driver(chrome_options, remote_debugging=False)
             
             driver.set_window_size(SCREENSHOT_WIDTH, SCREENSHOT_HEIGHT)
             print("[OK] 浏览器已启动")
@@ -330,14 +492,244 @@ def init_browser():
             print("\n" + "="*60 + "\n")
         raise
 
+def init_headless_browser(user_data_dir: str):
+    """
+    启动使用独立用户数据目录的无头浏览器（截图农场的工作进程使用，不连接远程调试端口、不使用 Profile）
+
+    Args:
+        user_data_dir: 用户数据目录，不存在时自动创建；同一目录同时只能被一个浏览器使用
+    """
+    user_data_dir = os.path.abspath(user_data_dir)
+    os.makedirs(user_data_dir, exist_ok=True)
+
+    chrome_options = Options()
+    chrome_options.add_argument('--headless')
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    chrome_options.add_argument(f'--window-size={SCREENSHOT_WIDTH},{SCREENSHOT_HEIGHT}')
+    chrome_options.add_argument('--disable-gpu')
+    chrome_options.add_argument('--disable-default-apps')
+    chrome_options.add_argument('--disable-sync')
+    chrome_options.add_argument(f'--user-data-dir={user_data_dir}')
+    enable_network_logging(chrome_options)
+
+    # 启动的是本机安装的 Chrome，按本机版本匹配 ChromeDriver（不受 USE_REMOTE_DEBUGGING 影响）
+    driver = _create_driver(chrome_options, remote_debugging=False)
+    driver.set_window_size(SCREENSHOT_WIDTH, SCREENSHOT_HEIGHT)
+    print(f"[OK] 无头浏览器已启动（用户数据目录: {user_data_dir}）")
+    return driver
+
+# 浏览器会话复用
+def check_driver_health(driver):
+    """
+    检查 WebDriver 会话是否可用
+
+    当前标签页已关闭时切换到其他标签页；当前标签页崩溃或无响应时打开一个新标签页
+
+    Args:
+        driver: WebDriver 实例
+
+    Returns:
+        tuple: (是否可用, 问题说明, 已执行的修复动作)，可用且无需修复时后两项为 None
+    """
+    try:
+        handles = driver.window_handles
+    except WebDriverException as e:
+        return False, f"与浏览器的连接已断开: {_short_error(e)}", None
+    if not handles:
+        return False, "浏览器没有可用的标签页", None
+
+    try:
+        driver.execute_script("return 1")
+        return True, None, None
+    except NoSuchWindowException:
+        reason, actions = "当前标签页已关闭", ('switch_tab', 'new_tab')
+    except WebDriverException as e:
+        reason, actions = f"当前标签页无响应（可能已崩溃）: {_short_error(e)}", ('new_tab',)
+
+    error = None
+    for action in actions:
+        try:
+            if action == 'switch_tab':
+                driver.switch_to.window(handles[0])
+            else:
+                driver.switch_to.new_window('tab')
+            driver.execute_script("return 1")
+            return True, reason, action
+        except WebDriverException as e:
+            error = e
+    return False, f"{reason}，切换标签页失败: {_short_error(error)}", None
+
+# 健康检查修复动作 -> 说明
+_RECOVERY_ACTIONS = {
+    'switch_tab': '切换到其他标签页',
+    'new_tab': '打开新标签页',
+}
+
+class BrowserSession:
+    """
+    长期复用的浏览器会话
+
+    多次运行共用一个 WebDriver，每次使用前做健康检查（标签页崩溃、与浏览器/调试端口的连接断开），
+    只有会话不可用或超过最长使用时间时才重建；记录会话时长、复用次数和恢复事件
+    """
+
+    def __init__(self, factory=None, max_age: float = 0, name: str = 'default'):
+        """
+        Args:
+            factory: 创建 WebDriver 的函数，默认 init_browser
+            max_age: 会话最长使用时间（秒），超过后下次使用前重建，0 表示不限制
+            name: 会话名称（用于日志）
+        """
+        self.factory = factory or init_browser
+        self.max_age = max_age
+        self.name = name
+        self._lock = threading.RLock()
+        self._driver = None
+        self._created_at = None
+        self._stats = {
+            'sessions_created': 0,
+            'reuse_count': 0,
+            'total_reuses': 0,
+            'recoveries': 0,
+        }
+        self._events = deque(maxlen=50)
+
+    def _record(self, event: str, reason: str):
+        self._events.append({
+            'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'event': event,
+            'reason': reason,
+        })
+
+    def _quit_driver(self):
+        """关闭当前 WebDriver（远程调试模式下只断开连接，不关闭浏览器），忽略已断开时的异常"""
+        driver, self._driver, self._created_at = self._driver, None, None
+        if driver is not None:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    def _start(self):
+        started = time.monotonic()
+        self._driver = self.factory()
+        self._created_at = time.monotonic()
+        self._stats['sessions_created'] += 1
+        self._stats['reuse_count'] = 0
+        print(f"[OK] 浏览器会话 {self.name} 已创建，耗时 {self._created_at - started:.1f}s")
+
+    def acquire(self):
+        """
+        获取可用的 WebDriver，必要时创建或重建会话
+
+        Returns:
+            WebDriver 实例（调用方使用完后不要 quit，由会话管理）
+        """
+        with self._lock:
+            if self._driver is None:
+                self._start()
+                return self._driver
+
+            age = time.monotonic() - self._created_at
+            if self.max_age and age > self.max_age:
+                print(f"[INFO] 浏览器会话 {self.name} 已使用 {age:.0f}s，超过最长使用时间，重建会话")
+                self._record('expired', f"会话已使用 {age:.0f}s")
+                self._quit_driver()
+                self._start()
+                return self._driver
+
+            healthy, reason, action = check_driver_health(self._driver)
+            if not healthy:
+                print(f"[WARNING] 浏览器会话 {self.name} 不可用，重建会话: {reason}")
+                self._stats['recoveries'] += 1
+                self._record('restart', reason)
+                self._quit_driver()
+                self._start()
+                return self._driver
+            if action:
+                print(f"[WARNING] 浏览器会话 {self.name}: {reason}，已{_RECOVERY_ACTIONS[action]}")
+                self._stats['recoveries'] += 1
+                self._record(action, reason)
+
+            self._stats['reuse_count'] += 1
+            self._stats['total_reuses'] += 1
+            print(f"[INFO] 复用浏览器会话 {self.name}（已运行 {age:.0f}s，第 {self._stats['reuse_count']} 次复用）")
+            return self._driver
+
+    def close(self):
+        """关闭会话"""
+        with self._lock:
+            if self._driver is not None:
+                self._quit_driver()
+                print(f"[INFO] 浏览器会话 {self.name} 已关闭")
+
+    def get_stats(self):
+        """
+        获取会话统计
+
+        Returns:
+            Dict: alive、age（当前会话已运行秒数）、sessions_created、reuse_count（当前会话复用次数）、
+                total_reuses、recoveries、events（最近的恢复/重建事件）
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['alive'] = self._driver is not None
+            stats['age'] = time.monotonic() - self._created_at if self._created_at is not None else 0.0
+            stats['events'] = list(self._events)
+        return stats
+
+# 进程级浏览器会话
+_default_session = None
+_default_session_lock = threading.Lock()
+
+def get_browser_session() -> BrowserSession:
+    """获取按 config 配置创建的进程级浏览器会话，进程退出时自动关闭"""
+    global _default_session
+    if _default_session is None:
+        with _default_session_lock:
+            if _default_session is None:
+                _default_session = BrowserSession(max_age=BROWSER_SESSION_MAX_AGE)
+                atexit.register(close_browser_session)
+    return _default_session
+
+def close_browser_session():
+    """关闭进程级浏览器会话（进程退出时自动调用）"""
+    global _default_session
+    with _default_session_lock:
+        session, _default_session = _default_session, None
+    if session is not None:
+        session.close()
+
+def get_browser_session_stats():
+    """
+    获取进程级浏览器会话的统计
+
+    Returns:
+        Dict: 见 BrowserSession.get_stats()，未创建会话时为空字典
+    """
+    if _default_session is None:
+        return {}
+    return _default_session.get_stats()
+
+def acquire_driver():
+    """获取 WebDriver：启用会话复用（BROWSER_SESSION_REUSE）时使用进程级会话，否则新建"""
+    if BROWSER_SESSION_REUSE:
+        return get_browser_session().acquire()
+    return init_browser()
+
+def release_driver(driver):
+    """使用完 WebDriver：复用会话时保留，否则关闭"""
+    if not BROWSER_SESSION_REUSE:
+        driver.quit()
+
 # 第2部分：切换币种和周期功能
 def switch_symbol(driver, symbol: str):
     """切换TradingView的币种"""
     try:
         from config import TRADINGVIEW_BASE_URL
         url = f"{TRADINGVIEW_BASE_URL}{symbol}USDT"
-        driver.get(url)
-        time.sleep(3)  # 等待页面加载
+        load_page(driver, url, 'tradingview')
         print(f"[OK] 已切换到币种: {symbol}")
         return True
     except Exception as e:
@@ -353,8 +745,7 @@ def switch_timeframe(driver, timeframe: str):
             url_with_timeframe = current_url.split('&interval=')[0] + f'&interval={timeframe}'
         else:
             url_with_timeframe = current_url + f'&interval={timeframe}'
-        driver.get(url_with_timeframe)
-        time.sleep(3)  # 等待图表加载
+        load_page(driver, url_with_timeframe, 'tradingview')
         return True
     except Exception as e:
         print(f"[ERROR] 切换周期失败 {timeframe}: {e}")
@@ -367,16 +758,8 @@ def take_screenshot(driver, symbol: str, timeframe: str) -> str:
     screenshot_path = os.path.join(SCREENSHOT_DIR, f'{symbol}_{timeframe}.png')
     
     try:
-        # 等待图表完全加载
-        try:
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.ID, 'chart-container'))
-            )
-        except TimeoutException:
-            # 如果找不到 chart-container，尝试其他选择器
-            pass
-        
-        time.sleep(2)  # 额外等待确保图表渲染完成
+        # 等待图表渲染完成（切换周期时已等待页面就绪，这里通常立即返回）
+        wait_until_ready(driver, 'tradingview')
         
         # 截图整个页面
         driver.save_screenshot(screenshot_path)
@@ -385,39 +768,42 @@ def take_screenshot(driver, symbol: str, timeframe: str) -> str:
         print(f"[ERROR] 截图失败 {symbol} {timeframe}: {e}")
         return None
 
-def combine_images(image_paths: dict, symbol: str) -> str:
-    """将4个周期的图片组合成一张图片（2x2布局）"""
+def combine_images(image_paths: dict, symbol: str, timeframes=None) -> str:
+    """
+    将各周期的图片按网格组合成一张图片（4个周期为2x2布局）
+
+    Args:
+        image_paths: {周期: 图片路径}
+        symbol: 币种
+        timeframes: 按顺序排列的周期列表（从左到右、从上到下），默认 TIME_PERIODS；缺少任何一个周期的图片时不组合
+    """
     try:
         from config import TIME_PERIODS
+        timeframes = list(timeframes or TIME_PERIODS)
         images = []
-        for timeframe in TIME_PERIODS:
+        for timeframe in timeframes:
             if timeframe in image_paths and image_paths[timeframe]:
                 img = Image.open(image_paths[timeframe])
                 images.append((img, timeframe))
         
-        if len(images) != 4:
-            print(f"[WARNING] 图片数量不足4张，无法组合")
+        if not images or len(images) != len(timeframes):
+            print(f"[WARNING] 图片数量不足{len(timeframes)}张，无法组合")
             return None
         
-        # 计算组合图片的尺寸（2x2布局）
+        # 计算组合图片的尺寸（列数为周期数的平方根向上取整，4个周期为2x2）
         # 假设每张图片尺寸相同
         img_width, img_height = images[0][0].size
-        combined_width = img_width * 2
-        combined_height = img_height * 2
+        columns = math.ceil(math.sqrt(len(images)))
+        rows = math.ceil(len(images) / columns)
+        combined_width = img_width * columns
+        combined_height = img_height * rows
         
         # 创建组合图片
         combined_image = Image.new('RGB', (combined_width, combined_height), 'white')
         
-        # 布局：左上(15m), 右上(30m), 左下(1h), 右下(2h)
-        positions = [
-            (0, 0),           # 15m - 左上
-            (img_width, 0),   # 30m - 右上
-            (0, img_height),  # 1h - 左下
-            (img_width, img_height)  # 2h - 右下
-        ]
-        
+        # 布局：按 timeframes 的顺序从左到右、从上到下，如 左上(15m), 右上(30m), 左下(1h), 右下(2h)
         for idx, (img, timeframe) in enumerate(images):
-            combined_image.paste(img, positions[idx])
+            combined_image.paste(img, ((idx % columns) * img_width, (idx // columns) * img_height))
         
         # 保存组合图片
         combined_path = os.path.join(SCREENSHOT_DIR, f'{symbol}_combined.png')
@@ -428,13 +814,105 @@ def combine_images(image_paths: dict, symbol: str) -> str:
         print(f"[ERROR] 组合图片失败: {e}")
         return None
 
+def chart_url(symbol: str, timeframe: str) -> str:
+    """TradingView 图表地址"""
+    return f"{TRADINGVIEW_BASE_URL}{symbol}USDT&interval={timeframe}"
+
+def capture_charts_parallel(driver, jobs, max_tabs: int = None) -> dict:
+    """
+    多标签页并行截图
+
+    每个 (币种, 周期) 打开一个标签页并同时加载，轮流检查各标签页是否就绪，就绪（或超时）后
+    切到前台截图并关闭该标签页；同时打开的标签页数不超过 max_tabs
+
+    Args:
+        driver: WebDriver 实例
+        jobs: [(币种, 周期)] 列表
+        max_tabs: 同时打开的标签页数上限，默认 CAPTURE_MAX_TABS
+
+    Returns:
+        dict: {(币种, 周期): 截图路径}，截图失败的任务不包含在内
+    """
+    os.makedirs(SCREENSHOT_DIR, exist_ok=True)
+    max_tabs = max(1, max_tabs or CAPTURE_MAX_TABS)
+    queue = deque(jobs)
+    original_handle = driver.current_window_handle
+    open_tabs = {}
+    screenshot_paths = {}
+    started = time.monotonic()
+
+    def close_tab(handle):
+        open_tabs.pop(handle, None)
+        try:
+            driver.switch_to.window(handle)
+            driver.close()
+        except WebDriverException:
+            pass
+
+    try:
+        while queue or open_tabs:
+            # 补充标签页：通过 location 跳转发起导航，不等待加载完成
+            while queue and len(open_tabs) < max_tabs:
+                symbol, timeframe = queue.popleft()
+                try:
+                    url = chart_url(symbol, timeframe)
+                    driver.switch_to.new_window('tab')
+                    handle = driver.current_window_handle
+                    webview = tab_webview(handle)
+                    prepare_navigation(driver, webview)
+                    driver.execute_script("window.location.href = arguments[0];", url)
+                except Exception as e:
+                    print(f"[ERROR] 打开标签页失败 {symbol} {timeframe}: {e}")
+                    continue
+                open_tabs[handle] = (symbol, timeframe, ReadinessWaiter(
+                    driver, 'tradingview', webview, label=f"{symbol} {timeframe}"))
+
+            for handle, (symbol, timeframe, waiter) in list(open_tabs.items()):
+                try:
+                    driver.switch_to.window(handle)
+                    if not waiter.check():
+                        continue
+                    waiter.finish()
+                    # 后台标签页的渲染被节流，截图前切到前台等待绘制
+                    wait_for_paint(driver)
+                    screenshot_path = os.path.join(SCREENSHOT_DIR, f'{symbol}_{timeframe}.png')
+                    driver.save_screenshot(screenshot_path)
+                    screenshot_paths[(symbol, timeframe)] = screenshot_path
+                except Exception as e:
+                    print(f"[ERROR] 截图失败 {symbol} {timeframe}: {e}")
+                close_tab(handle)
+
+            if open_tabs:
+                time.sleep(min(waiter.profile['poll_interval'] for _, _, waiter in open_tabs.values()))
+    finally:
+        for handle in list(open_tabs):
+            close_tab(handle)
+        try:
+            driver.switch_to.window(original_handle)
+        except WebDriverException:
+            pass
+
+    print(f"[INFO] 并行截图完成 {len(screenshot_paths)}/{len(jobs)}，耗时 {time.monotonic() - started:.1f}s")
+    return screenshot_paths
+
 def capture_all_timeframes_for_symbol(symbol: str):
     """为指定币种批量截图所有周期，并组合成一张图片"""
     from config import TIME_PERIODS
-    driver = init_browser()
+    driver = acquire_driver()
     screenshot_paths = {}
     
     try:
+        if CAPTURE_PARALLEL_TABS:
+            # 每个周期一个标签页，同时加载
+            print(f"  正在并行加载 {len(TIME_PERIODS)} 个周期...")
+            captured = capture_charts_parallel(driver, [(symbol, timeframe) for timeframe in TIME_PERIODS])
+            screenshot_paths = {timeframe: path for (_, timeframe), path in captured.items()}
+            combined_path = None
+            if len(screenshot_paths) == len(TIME_PERIODS):
+                print(f"  正在组合图片...")
+                combined_path = combine_images(screenshot_paths, symbol)
+            return screenshot_paths, combined_path
+
         # 切换到指定币种
         if not switch_symbol(driver, symbol):
             return None, None
@@ -446,21 +924,20 @@ def capture_all_timeframes_for_symbol(symbol: str):
                 screenshot_path = take_screenshot(driver, symbol, timeframe)
                 if screenshot_path:
                     screenshot_paths[timeframe] = screenshot_path
-                time.sleep(2)  # 间隔等待
         
         # 组合图片
         combined_path = None
-        if len(screenshot_paths) == 4:
+        if len(screenshot_paths) == len(TIME_PERIODS):
             print(f"  正在组合图片...")
             combined_path = combine_images(screenshot_paths, symbol)
         
         return screenshot_paths, combined_path
     finally:
-        driver.quit()
+        release_driver(driver)
 
 def capture_target_page():
     """截图目标页面（tophub.today）"""
-    driver = init_browser()
+    driver = acquire_driver()
     screenshot_path = None
     
     try:
@@ -468,8 +945,8 @@ def capture_target_page():
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                driver.get(TARGET_URL)
-                time.sleep(5)  # 等待页面完全加载
+                # 等待页面就绪（readyState、选择器、网络空闲、DOM 稳定），未就绪时超时后继续截图
+                load_page(driver, TARGET_URL, 'tophub', selector=TARGET_PAGE_SELECTOR)
                 break
             except Exception as e:
                 if attempt == max_retries - 1:
@@ -478,16 +955,6 @@ def capture_target_page():
                 print(f"[WARNING] 访问失败，3秒后重试... ({e})")
                 time.sleep(3)
         
-        # 等待页面元素加载
-        try:
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, TARGET_PAGE_SELECTOR))
-            )
-        except TimeoutException:
-            print(f"[WARNING] 未找到选择器 {TARGET_PAGE_SELECTOR}，继续截图")
-        
-        time.sleep(3)  # 额外等待确保页面渲染完成
-        
         # 截图
         os.makedirs(SCREENSHOT_DIR, exist_ok=True)
         screenshot_path = os.path.join(SCREENSHOT_DIR, 'tophub_page.png')
@@ -499,7 +966,7 @@ def capture_target_page():
         print(f"[ERROR] 截图失败: {e}")
         return None
     finally:
-        driver.quit()
+        release_driver(driver)
 
 def capture_all_timeframes():
     """批量截图所有周期（兼容旧接口，默认ETH）"""
@@ -514,7 +981,7 @@ def analyze_with_gemini_web(image_path: str, symbol: str, prompt: str = None):
     from selenium.webdriver.common.action_chains import ActionChains
     import os
     
-    driver = init_browser()
+    driver = acquire_driver()
     analysis_result = None
     
     try:
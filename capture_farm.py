@@ -0,0 +1,191 @@
+"""
+多币种截图农场
+启动多个无头 Chrome 工作进程，从共享的任务队列中领取 (币种, 周期, 地址) 截图任务：
+
+- 每个工作进程固定使用自己的用户数据目录（CAPTURE_FARM_DATA_DIR/worker-<编号>），互不冲突
+- 每个工作进程的浏览器由一个 BrowserSession 管理，多次调用之间复用，崩溃、断开或超过 BROWSER_SESSION_MAX_AGE 时自动重建
+- 截图完成后立即把结果交给调用方（capture 返回生成器），不等待全部任务完成
+
+总耗时约为 任务数 / 工作进程数 次页面加载
+"""
+import os
+import queue
+import threading
+import time
+from collections import namedtuple
+from functools import partial
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config import (
+    CAPTURE_FARM_WORKERS,
+    CAPTURE_FARM_DATA_DIR,
+    BROWSER_SESSION_MAX_AGE,
+    SCREENSHOT_DIR,
+    TIME_PERIODS
+)
+from browser_automation import BrowserSession, init_headless_browser, chart_url, combine_images
+from page_readiness import load_page
+
+# 截图任务
+CaptureJob = namedtuple('CaptureJob', ['symbol', 'timeframe', 'url'])
+# 截图结果: path 为截图路径（失败时为 None），error 为失败原因，worker 为工作进程编号，elapsed 为耗时（秒）
+CaptureResult = namedtuple('CaptureResult', ['job', 'path', 'error', 'worker', 'elapsed'])
+
+# 通知工作线程退出
+_STOP = object()
+
+
+def make_job(symbol: str, timeframe: str, url: Optional[str] = None) -> CaptureJob:
+    """创建截图任务，未指定地址时使用 TradingView 图表地址"""
+    return CaptureJob(symbol, timeframe, url or chart_url(symbol, timeframe))
+
+
+class CaptureFarm:
+    """
+    无头浏览器截图农场
+
+    工作线程和浏览器在第一次 capture 时启动，之后一直复用，直到调用 close()
+    """
+
+    def __init__(self, workers: Optional[int] = None, data_dir: Optional[str] = None, factory=None):
+        """
+        Args:
+            workers: 工作进程（浏览器）数，默认 CAPTURE_FARM_WORKERS
+            data_dir: 用户数据目录根目录，默认 CAPTURE_FARM_DATA_DIR
+            factory: 创建 WebDriver 的函数，参数为用户数据目录，默认 init_headless_browser
+        """
+        self.workers = max(1, workers or CAPTURE_FARM_WORKERS)
+        self.data_dir = data_dir or CAPTURE_FARM_DATA_DIR
+        factory = factory or init_headless_browser
+        self._sessions = [
+            BrowserSession(factory=partial(factory, os.path.join(self.data_dir, f'worker-{index}')),
+                           max_age=BROWSER_SESSION_MAX_AGE, name=f'farm-{index}')
+            for index in range(self.workers)
+        ]
+        self._jobs = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._run, args=(index,), name=f'capture-farm-{index}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            print(f"[INFO] 截图农场已启动 {self.workers} 个工作进程（用户数据目录: {self.data_dir}）")
+
+    def _run(self, index: int):
+        session = self._sessions[index]
+        while True:
+            item = self._jobs.get()
+            if item is _STOP:
+                return
+            job, results, cancelled = item
+            # 调用方已停止读取结果，跳过剩余任务
+            if cancelled.is_set():
+                continue
+            started = time.monotonic()
+            try:
+                driver = session.acquire()
+                load_page(driver, job.url, 'tradingview')
+                screenshot_path = os.path.join(SCREENSHOT_DIR, f'{job.symbol}_{job.timeframe}.png')
+                driver.save_screenshot(screenshot_path)
+                result = CaptureResult(job, screenshot_path, None, index, time.monotonic() - started)
+            except Exception as e:
+                result = CaptureResult(job, None, str(e), index, time.monotonic() - started)
+            results.put(result)
+
+    def capture(self, jobs: Iterable) -> Iterator[CaptureResult]:
+        """
+        截图一批任务，按完成顺序逐个返回结果
+
+        Args:
+            jobs: CaptureJob 或 (币种, 周期) 列表
+
+        Yields:
+            CaptureResult: 每个任务的截图结果（失败的任务 path 为 None）
+        """
+        jobs = [job if isinstance(job, CaptureJob) else make_job(*job) for job in jobs]
+        if not jobs:
+            return
+        os.makedirs(SCREENSHOT_DIR, exist_ok=True)
+        self._start()
+
+        results = queue.Queue()
+        cancelled = threading.Event()
+        for job in jobs:
+            self._jobs.put((job, results, cancelled))
+
+        started = time.monotonic()
+        failed = 0
+        try:
+            for _ in range(len(jobs)):
+                result = results.get()
+                if result.path:
+                    print(f"[OK] 截图完成 {result.job.symbol} {result.job.timeframe}"
+                          f"（工作进程 {result.worker}，{result.elapsed:.1f}s）")
+                else:
+                    failed += 1
+                    print(f"[ERROR] 截图失败 {result.job.symbol} {result.job.timeframe}: {result.error}")
+                yield result
+            print(f"[INFO] 截图农场完成 {len(jobs) - failed}/{len(jobs)} 个任务，耗时 {time.monotonic() - started:.1f}s")
+        finally:
+            cancelled.set()
+
+    def close(self):
+        """停止工作线程并关闭所有浏览器"""
+        with self._lock:
+            threads, self._threads = self._threads, []
+            for _ in threads:
+                self._jobs.put(_STOP)
+        for thread in threads:
+            thread.join()
+        for session in self._sessions:
+            session.close()
+
+
+def capture_symbols(
+    symbols: Iterable[str],
+    timeframes: Optional[List[str]] = None,
+    farm: Optional[CaptureFarm] = None
+) -> Iterator[Tuple[str, Dict[str, str], Optional[str]]]:
+    """
+    用截图农场截图多个币种的所有周期，每个币种的所有周期完成后立即返回
+
+    Args:
+        symbols: 币种列表
+        timeframes: 周期列表，默认 TIME_PERIODS
+        farm: 使用的截图农场，None 表示新建一个并在结束后关闭
+
+    Yields:
+        (币种, {周期: 截图路径}, 组合图片路径)：截图不完整时组合图片路径为 None
+    """
+    timeframes = timeframes or TIME_PERIODS
+    symbols = list(symbols)
+    own_farm = farm is None
+    farm = farm or CaptureFarm()
+    pending = {symbol: len(timeframes) for symbol in symbols}
+    screenshot_paths = {symbol: {} for symbol in symbols}
+    try:
+        for result in farm.capture((symbol, timeframe) for symbol in symbols for timeframe in timeframes):
+            symbol = result.job.symbol
+            if result.path:
+                screenshot_paths[symbol][result.job.timeframe] = result.path
+            pending[symbol] -= 1
+            if pending[symbol]:
+                continue
+            combined_path = None
+            if len(screenshot_paths[symbol]) == len(timeframes):
+                combined_path = combine_images(screenshot_paths[symbol], symbol, timeframes)
+            yield symbol, screenshot_paths[symbol], combined_path
+    finally:
+        if own_farm:
+            farm.close()
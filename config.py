@@ -12,8 +12,9 @@ load_dotenv()
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', '')
 GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-2.0-flash')
 
-# TradingView配置（已注释，暂时不使用）
-# TRADINGVIEW_BASE_URL = os.getenv('TRADINGVIEW_BASE_URL', 'https://www.tradingview.com/chart/?symbol=BINANCE:')
+# TradingView配置
+# 图表地址前缀，币种和周期截图时拼接为 {TRADINGVIEW_BASE_URL}{币种}USDT&interval={周期}
+TRADINGVIEW_BASE_URL = os.getenv('TRADINGVIEW_BASE_URL', 'https://www.tradingview.com/chart/?symbol=BINANCE:')
 # TRADINGVIEW_CHART_SELECTOR = os.getenv('TRADINGVIEW_SELECTOR', '#chart-container')
 
 # 目标页面配置
@@ -64,6 +65,38 @@ CHROME_USER_DATA_DIR = os.getenv('CHROME_USER_DATA_DIR', '')
 # 可以通过环境变量 CHROME_PROFILE_NAME 配置，默认使用 Profile 1
 CHROME_PROFILE_NAME = os.getenv('CHROME_PROFILE_NAME', 'Profile 1')
 
+# 浏览器会话复用配置
+# 多次运行（如定时任务每次执行）复用同一个 WebDriver 会话，每次使用前做健康检查，只在会话失效时重建
+BROWSER_SESSION_REUSE = os.getenv('BROWSER_SESSION_REUSE', 'True').lower() == 'true'
+# 会话最长使用时间（秒），超过后在下次使用前重建，0 表示不限制
+BROWSER_SESSION_MAX_AGE = float(os.getenv('BROWSER_SESSION_MAX_AGE', '21600'))
+
+# ChromeDriver 路径缓存文件：按已安装的 Chrome 版本记录 webdriver-manager 解析出的 ChromeDriver 路径，
+# Chrome 升级后才重新解析；留空则每次启动都调用 webdriver-manager
+CHROMEDRIVER_CACHE_FILE = os.getenv('CHROMEDRIVER_CACHE_FILE', './cache/chromedriver.json')
+
+# 页面就绪检测配置（替代截图前固定的等待时间，见 page_readiness.py）
+# 最长等待时间（秒），超时后不再等待，直接截图
+PAGE_READY_TIMEOUT = float(os.getenv('PAGE_READY_TIMEOUT', '20'))
+# 网络空闲（没有未完成的请求）需要持续的毫秒数，0 表示不检查网络
+PAGE_NETWORK_IDLE_MS = int(os.getenv('PAGE_NETWORK_IDLE_MS', '500'))
+# DOM 无变化需要持续的毫秒数，0 表示不检查 DOM
+PAGE_DOM_STABLE_MS = int(os.getenv('PAGE_DOM_STABLE_MS', '300'))
+# 按目标页面覆盖就绪参数（JSON），如: {"tophub": {"dom_stable_ms": 800}, "tradingview": {"max_inflight": 4}}
+PAGE_READY_OVERRIDES = os.getenv('PAGE_READY_OVERRIDES', '')
+
+# 多标签页并行截图配置
+# 在同一个浏览器中为每个周期（或币种×周期）打开一个标签页并同时加载，各标签页就绪后分别截图
+CAPTURE_PARALLEL_TABS = os.getenv('CAPTURE_PARALLEL_TABS', 'True').lower() == 'true'
+# 同时打开的标签页数上限
+CAPTURE_MAX_TABS = int(os.getenv('CAPTURE_MAX_TABS', '4'))
+
+# 多币种截图农场配置（见 capture_farm.py）
+# 启动多个无头 Chrome 工作进程，从任务队列中领取 (币种, 周期) 截图任务
+CAPTURE_FARM_WORKERS = int(os.getenv('CAPTURE_FARM_WORKERS', '4'))
+# 工作进程的用户数据目录根目录，每个工作进程使用其中的 worker-<编号> 子目录
+CAPTURE_FARM_DATA_DIR = os.getenv('CAPTURE_FARM_DATA_DIR', './cache/capture_farm')
+
 # 定时任务配置
 # 执行时间区间列表，格式: ["1:00-3:00", "20:00-22:00"]
 # 支持跨天时间段，如 ["22:00-2:00"]
@@ -101,3 +134,66 @@ DB_PORT = int(os.getenv('DB_PORT', '3306'))
 DB_USER = os.getenv('DB_USER', 'root')
 DB_PASSWORD = os.getenv('DB_PASSWORD', 'b01c044f2e0bf36e')
 DB_NAME = os.getenv('DB_NAME', 'nextjs_jwt')
+
+# 数据库连接池配置
+# 最大连接数、借出等待超时（秒）、空闲连接回收时间（秒）、健康检查间隔（秒，空闲超过该时间的连接借出前先 ping）
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+DB_POOL_IDLE_TIMEOUT = float(os.getenv('DB_POOL_IDLE_TIMEOUT', '300'))
+DB_POOL_PING_INTERVAL = float(os.getenv('DB_POOL_PING_INTERVAL', '10'))
+
+# 价格数据批量写入时每批的行数（每批合并为一条多行 INSERT 语句）
+DB_BULK_CHUNK_SIZE = int(os.getenv('DB_BULK_CHUNK_SIZE', '500'))
+
+# 价格数据后台写入（write-behind）配置
+# 获取价格数据时只把数据放入队列，由后台线程批量写入，分析流程不等待数据库提交
+# 默认关闭（同步写入）；开启后获取函数返回时数据可能尚未写入存储
+WRITE_BEHIND_ENABLED = os.getenv('WRITE_BEHIND_ENABLED', 'False').lower() == 'true'
+# 待写入行数达到该值时立即写入
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv('WRITE_BEHIND_BATCH_SIZE', '2000'))
+# 最早一条待写入数据等待超过该时间（秒）时写入
+WRITE_BEHIND_FLUSH_INTERVAL = float(os.getenv('WRITE_BEHIND_FLUSH_INTERVAL', '2'))
+# 待写入行数上限，超过时获取数据的线程阻塞等待
+WRITE_BEHIND_MAX_PENDING = int(os.getenv('WRITE_BEHIND_MAX_PENDING', '50000'))
+# 存储不可用时的溢出文件（留空则丢弃写入失败的数据），存储恢复后自动写入
+WRITE_BEHIND_SPILL_FILE = os.getenv('WRITE_BEHIND_SPILL_FILE', './cache/write_behind_spill.jsonl')
+# 存储不可用后重试写入溢出文件的间隔（秒）
+WRITE_BEHIND_RETRY_INTERVAL = float(os.getenv('WRITE_BEHIND_RETRY_INTERVAL', '60'))
+
+# 流式读取价格数据（iter_prices）时每批的行数
+DB_STREAM_CHUNK_SIZE = int(os.getenv('DB_STREAM_CHUNK_SIZE', '10000'))
+
+# AKShare 接口缓存配置
+# 接口返回的数据缓存到磁盘，重复运行时不再请求上游
+# 已收盘的历史区间永久缓存，包含当天数据的调用按接口设置较短的缓存时间（见 sector/cache.py 的 ENDPOINT_TTLS）
+AKSHARE_CACHE_ENABLED = os.getenv('AKSHARE_CACHE_ENABLED', 'True').lower() == 'true'
+AKSHARE_CACHE_DIR = os.getenv('AKSHARE_CACHE_DIR', './cache/akshare')
+# 缓存总大小上限（MB），超出时淘汰最久未使用的缓存
+AKSHARE_CACHE_MAX_MB = float(os.getenv('AKSHARE_CACHE_MAX_MB', '512'))
+# 未单独配置的接口的缓存时间（秒）
+AKSHARE_CACHE_DEFAULT_TTL = float(os.getenv('AKSHARE_CACHE_DEFAULT_TTL', '300'))
+
+# AKShare 上游请求限流配置（令牌桶，按数据源分组，多线程共享）
+# 各接口族每秒请求数，格式: 接口族=每秒请求数，用逗号分隔（接口族见 sector/ratelimit.py 的 ENDPOINT_FAMILIES）
+AKSHARE_RATE_LIMITS = os.getenv('AKSHARE_RATE_LIMITS', 'eastmoney=2,sina=2,funddb=1')
+# 未配置的接口族的每秒请求数（0 表示不限流）
+AKSHARE_RATE_DEFAULT = float(os.getenv('AKSHARE_RATE_DEFAULT', '1'))
+# 每个接口族允许的突发请求数
+AKSHARE_RATE_BURST = float(os.getenv('AKSHARE_RATE_BURST', '2'))
+
+# 批量获取板块数据（fetch_many）的并发线程数
+SECTOR_FETCH_WORKERS = int(os.getenv('SECTOR_FETCH_WORKERS', '4'))
+
+# 数据源路由表配置
+# 按代码记录各获取方法（AKShare 接口）的成功/失败情况，后续调用优先使用上次成功的方法
+# 路由表文件（留空则只保存在内存中），查看: python -m sector.routing
+SOURCE_ROUTES_FILE = os.getenv('SOURCE_ROUTES_FILE', './cache/source_routes.json')
+# 重新探测间隔（秒），超过该时间后下一次调用按默认顺序尝试所有方法
+SOURCE_ROUTE_REPROBE_SECONDS = float(os.getenv('SOURCE_ROUTE_REPROBE_SECONDS', '86400'))
+
+# 价格数据存储后端: mysql（远程 MySQL）、sqlite（本地 SQLite，无需外部服务）或 parquet（本地 Parquet 数据集，可离线使用）
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'mysql')
+# 本地 SQLite 数据库文件
+SQLITE_DB_PATH = os.getenv('SQLITE_DB_PATH', './cache/sector.db')
+# 本地 Parquet 存储根目录（按代码和年份分区）
+PARQUET_STORE_DIR = os.getenv('PARQUET_STORE_DIR', './cache/price_store')
@@ -5,7 +5,7 @@ import schedule
 import time
 from datetime import datetime, time as dt_time
 # TradingView相关功能（已注释，暂时不使用）
-# from browser_automation import capture_all_timeframes_for_symbol
+# from capture_farm import capture_symbols
 # from gemini_analyzer import analyze_chart
 # from config import SYMBOLS
 
@@ -71,20 +71,13 @@ def run_analysis(use_api: bool = False):
     # TradingView相关功能（已注释，暂时不使用）
     # all_results = {}
     # 
-    # # 遍历所有币种
-    # for symbol in SYMBOLS:
+    # # 步骤1: 截图农场并行截图所有币种的所有周期，每个币种截图完成后立即分析
+    # print(f"\n[步骤1] 开始截图 {len(SYMBOLS)} 个币种...")
+    # for symbol, screenshot_paths, combined_path in capture_symbols(SYMBOLS):
     #     print(f"\n{'='*50}")
     #     print(f"处理币种: {symbol}")
     #     print(f"{'='*50}")
     #     
-    #     # 步骤1: 截图所有周期并组合
-    #     print(f"\n[步骤1] 开始截图 {symbol}...")
-    #     try:
-    #         screenshot_paths, combined_path = capture_all_timeframes_for_symbol(symbol)
-    #     except Exception as e:
-    #         print(f"[ERROR] {symbol} 截图失败: {e}")
-    #         continue
-    #     
     #     if not screenshot_paths or len(screenshot_paths) < 4:
     #         print(f"[ERROR] {symbol} 截图不完整，跳过")
     #         continue
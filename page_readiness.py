@@ -0,0 +1,395 @@
+"""
+页面就绪检测
+替代截图流程中固定的 time.sleep 等待，页面满足以下条件时即认为就绪：
+
+1. document.readyState 为 complete
+2. 指定的选择器已出现（可选）
+3. 网络空闲：通过 DevTools 协议的 Network 事件（chromedriver 性能日志）统计未完成的请求，
+   未完成请求数不超过 max_inflight 并持续 network_idle_ms 毫秒
+4. DOM 稳定：MutationObserver 在 dom_stable_ms 毫秒内没有观察到 DOM 变化
+
+各条件的参数按目标页面配置（READINESS_PROFILES），可以通过 PAGE_READY_OVERRIDES 覆盖
+"""
+import json
+import threading
+import time
+import weakref
+from typing import Dict, Optional
+
+from config import (
+    PAGE_READY_TIMEOUT,
+    PAGE_NETWORK_IDLE_MS,
+    PAGE_DOM_STABLE_MS,
+    PAGE_READY_OVERRIDES
+)
+
+# 目标页面 -> 就绪参数（未配置的参数使用 default）
+# timeout: 最长等待时间（秒），超时后不再等待（调用方继续截图）
+# selector: 需要出现的 CSS 选择器，None 表示不检查
+# network_idle_ms: 网络空闲需要持续的毫秒数，0 表示不检查网络
+# max_inflight: 未完成请求数不超过该值即视为空闲（长轮询/推送较多的页面可以调大）
+# dom_stable_ms: DOM 无变化需要持续的毫秒数，0 表示不检查 DOM
+# poll_interval: 检查间隔（秒）
+READINESS_PROFILES = {
+    'default': {
+        'timeout': PAGE_READY_TIMEOUT,
+        'selector': None,
+        'network_idle_ms': PAGE_NETWORK_IDLE_MS,
+        'max_inflight': 0,
+        'dom_stable_ms': PAGE_DOM_STABLE_MS,
+        'poll_interval': 0.1,
+    },
+    'tophub': {},
+    # TradingView 图表页面保持行情推送连接，K 线绘制在 canvas 上；实时行情会不停更新图例、价格刻度等 DOM，
+    # 整个文档几乎不会静止，因此不检查 DOM 稳定，只依据图表容器出现和网络空闲（截图前另有 wait_for_paint）
+    'tradingview': {
+        'selector': '#chart-container',
+        'max_inflight': 2,
+        'dom_stable_ms': 0,
+    },
+}
+
+# 合并环境变量中的覆盖配置，格式: {"tradingview": {"network_idle_ms": 800}}
+try:
+    for _target, _overrides in json.loads(PAGE_READY_OVERRIDES or '{}').items():
+        READINESS_PROFILES.setdefault(_target, {}).update(_overrides)
+except (ValueError, AttributeError) as e:
+    print(f"[WARNING] PAGE_READY_OVERRIDES 格式错误，已忽略: {e}")
+
+# 一次返回 readyState、页面地址、选择器是否出现、DOM 无变化的毫秒数（首次调用时安装 MutationObserver）
+_PAGE_STATE_JS = """
+var selector = arguments[0];
+if (!window.__pageReadyObserver && document.documentElement) {
+    window.__pageReadyLastMutation = performance.now();
+    window.__pageReadyObserver = new MutationObserver(function () {
+        window.__pageReadyLastMutation = performance.now();
+    });
+    window.__pageReadyObserver.observe(document.documentElement, {
+        childList: true, subtree: true, attributes: true, characterData: true
+    });
+}
+return [
+    document.readyState,
+    document.URL,
+    selector ? document.querySelector(selector) !== null : true,
+    window.__pageReadyObserver ? performance.now() - window.__pageReadyLastMutation : 0
+];
+"""
+
+# 网络请求开始/结束事件
+_REQUEST_START = 'Network.requestWillBeSent'
+_REQUEST_END = ('Network.loadingFinished', 'Network.loadingFailed')
+
+
+def _first_line(error: Exception) -> str:
+    message = str(error).strip()
+    return message.splitlines()[0] if message else type(error).__name__
+
+
+def get_profile(target: str = 'default', **overrides) -> Dict:
+    """
+    获取目标页面的就绪参数
+
+    Args:
+        target: 目标页面名称（READINESS_PROFILES 的键），未配置的目标使用 default
+        **overrides: 本次调用覆盖的参数（值为 None 的参数忽略）
+
+    Returns:
+        Dict: 完整的就绪参数
+    """
+    profile = dict(READINESS_PROFILES['default'])
+    profile.update(READINESS_PROFILES.get(target, {}))
+    profile.update({key: value for key, value in overrides.items() if value is not None})
+    return profile
+
+
+class NetworkTracker:
+    """
+    根据 chromedriver 性能日志中的 Network 事件统计未完成的请求
+
+    性能日志由 chromedriver 缓存、读取后清空，同一个 driver 只能有一个 NetworkTracker（见 get_network_tracker）；
+    事件按标签页（日志中的 webview，即 DevTools target id）分别统计
+    """
+
+    def __init__(self, driver):
+        """
+        Args:
+            driver: WebDriver 实例（需在启动时开启性能日志，见 enable_network_logging）
+        """
+        self.driver = driver
+        self.available = True
+        self._lock = threading.Lock()
+        self._states = {}
+        self._reset_at = time.monotonic()
+
+    def _state(self, webview) -> Dict:
+        state = self._states.get(webview)
+        if state is None:
+            # changes: 未完成请求数的变化记录 [(时间, 变化后的请求数)]
+            state = self._states[webview] = {'inflight': set(), 'started': time.monotonic(), 'changes': []}
+        return state
+
+    def poll(self):
+        """读取新的性能日志并更新各标签页的未完成请求"""
+        if not self.available:
+            return
+        with self._lock:
+            try:
+                entries = self.driver.get_log('performance')
+            except Exception as e:
+                self.available = False
+                print(f"[WARNING] 无法读取浏览器性能日志，不检查网络空闲: {_first_line(e)}")
+                return
+            now = time.monotonic()
+            for entry in entries:
+                try:
+                    data = json.loads(entry['message'])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                message = data.get('message', {})
+                method = message.get('method')
+                if method != _REQUEST_START and method not in _REQUEST_END:
+                    continue
+                state = self._state(data.get('webview'))
+                request_id = message.get('params', {}).get('requestId')
+                before = len(state['inflight'])
+                if method == _REQUEST_START:
+                    state['inflight'].add(request_id)
+                else:
+                    state['inflight'].discard(request_id)
+                if len(state['inflight']) != before:
+                    state['changes'].append((now, len(state['inflight'])))
+
+    def reset(self, webview=None):
+        """
+        丢弃已缓存的日志并清空统计（导航前调用，避免上一个页面的请求影响判断）
+
+        Args:
+            webview: 只清空该标签页的统计，None 表示全部
+        """
+        self.poll()
+        with self._lock:
+            if webview is None:
+                self._states.clear()
+                self._reset_at = time.monotonic()
+            else:
+                self._states.pop(webview, None)
+
+    @staticmethod
+    def _idle_since(state: Dict, max_inflight: int) -> Optional[float]:
+        """未完成请求数最近一次降到 max_inflight 以下的时间，当前不空闲返回 None"""
+        if len(state['inflight']) > max_inflight:
+            return None
+        since = state['started']
+        for changed_at, count in reversed(state['changes']):
+            if count > max_inflight:
+                break
+            since = changed_at
+        return since
+
+    def idle_ms(self, webview=None, max_inflight: int = 0) -> float:
+        """
+        网络已空闲（未完成请求数不超过 max_inflight）的毫秒数
+
+        Args:
+            webview: 标签页，None 表示所有标签页（每个标签页分别满足条件，取空闲时间最短的一个）
+            max_inflight: 未完成请求数不超过该值即视为空闲
+
+        Returns:
+            float: 已空闲的毫秒数（没有请求时从上次 reset 算起），当前不空闲返回 0；性能日志不可用时返回无穷大
+        """
+        if not self.available:
+            return float('inf')
+        now = time.monotonic()
+        with self._lock:
+            states = list(self._states.values()) if webview is None else [self._state(webview)]
+            since = [self._idle_since(state, max_inflight) for state in states]
+            if None in since:
+                return 0.0
+            return (now - max(since, default=self._reset_at)) * 1000
+
+
+_trackers = weakref.WeakKeyDictionary()
+_trackers_lock = threading.Lock()
+
+
+def enable_network_logging(chrome_options):
+    """在 Chrome 启动参数中开启性能日志（网络空闲检测需要），PAGE_NETWORK_IDLE_MS 为 0 且没有目标页面启用时不开启"""
+    if any(profile.get('network_idle_ms', PAGE_NETWORK_IDLE_MS) for profile in READINESS_PROFILES.values()):
+        chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+
+def get_network_tracker(driver) -> NetworkTracker:
+    """获取 driver 对应的 NetworkTracker（每个 driver 一个）"""
+    with _trackers_lock:
+        tracker = _trackers.get(driver)
+        if tracker is None:
+            tracker = _trackers[driver] = NetworkTracker(driver)
+        return tracker
+
+
+def prepare_navigation(driver, webview=None):
+    """
+    导航前调用：清空网络统计
+
+    Args:
+        driver: WebDriver 实例
+        webview: 只清空该标签页的统计，None 表示全部
+    """
+    get_network_tracker(driver).reset(webview)
+
+
+class ReadinessWaiter:
+    """
+    单个标签页的就绪等待状态
+
+    每次 check() 对当前标签页检查一次；多个标签页并发加载时每个标签页一个 ReadinessWaiter，
+    由调用方切换到对应标签页后轮流 check()
+    """
+
+    def __init__(self, driver, target: str = 'default', webview=None, label: Optional[str] = None, **overrides):
+        """
+        Args:
+            driver: WebDriver 实例
+            target: 目标页面名称，决定使用的就绪参数（见 READINESS_PROFILES）
+            webview: 网络空闲只统计该标签页的请求，None 表示所有标签页
+            label: 日志中显示的名称，默认为 target
+            **overrides: 覆盖就绪参数，如 selector、timeout、dom_stable_ms
+        """
+        self.driver = driver
+        self.target = target
+        self.webview = webview
+        self.label = label or target
+        self.profile = get_profile(target, **overrides)
+        self.tracker = get_network_tracker(driver) if self.profile['network_idle_ms'] else None
+        self.started = time.monotonic()
+        self.deadline = self.started + self.profile['timeout']
+        self.stages = {}
+        self.waiting = []
+
+    def check(self) -> bool:
+        """
+        检查一次当前标签页
+
+        Returns:
+            bool: 是否已结束等待（已就绪或已超时）
+        """
+        profile = self.profile
+        now = time.monotonic()
+        self.waiting = []
+        try:
+            ready_state, url, selector_found, dom_quiet_ms = self.driver.execute_script(
+                _PAGE_STATE_JS, profile['selector'])
+        except Exception as e:
+            # 导航过程中脚本可能执行失败，下次再检查
+            ready_state, url, selector_found, dom_quiet_ms = None, None, False, 0
+            self.waiting.append(f"页面脚本执行失败: {_first_line(e)}")
+
+        # 新标签页导航提交前仍是 about:blank（readyState 为 complete）
+        checks = [('readyState', ready_state == 'complete' and url != 'about:blank'), ('selector', selector_found)]
+        if self.tracker is not None:
+            self.tracker.poll()
+            idle_ms = self.tracker.idle_ms(self.webview, profile['max_inflight'])
+            checks.append(('network_idle', idle_ms >= profile['network_idle_ms']))
+        if profile['dom_stable_ms']:
+            checks.append(('dom_stable', dom_quiet_ms >= profile['dom_stable_ms']))
+
+        for name, passed in checks:
+            if passed:
+                self.stages.setdefault(name, now - self.started)
+            else:
+                self.waiting.append(name)
+        return not self.waiting or now >= self.deadline
+
+    def finish(self) -> Dict:
+        """
+        结束等待并输出日志
+
+        Returns:
+            Dict: ready（是否在超时前就绪）、elapsed（秒）、stages（各条件首次满足的时间，秒）、
+                waiting（超时时仍未满足的条件）
+        """
+        result = {
+            'ready': not self.waiting,
+            'elapsed': time.monotonic() - self.started,
+            'stages': dict(self.stages),
+            'waiting': list(self.waiting),
+        }
+        timings = ', '.join(f"{name} {seconds:.1f}s" for name, seconds in self.stages.items())
+        if result['ready']:
+            print(f"[INFO] 页面就绪（{self.label}）耗时 {result['elapsed']:.1f}s: {timings}")
+        else:
+            print(f"[WARNING] 页面就绪等待超时（{self.label}，{self.profile['timeout']}s），"
+                  f"未满足: {', '.join(self.waiting)}")
+        return result
+
+
+def wait_until_ready(driver, target: str = 'default', webview=None, **overrides) -> Dict:
+    """
+    等待当前标签页就绪
+
+    Args:
+        driver: WebDriver 实例
+        target: 目标页面名称，决定使用的就绪参数（见 READINESS_PROFILES）
+        webview: 网络空闲只统计该标签页的请求，None 表示所有标签页
+        **overrides: 覆盖就绪参数，如 selector、timeout、dom_stable_ms
+
+    Returns:
+        Dict: 见 ReadinessWaiter.finish
+    """
+    waiter = ReadinessWaiter(driver, target, webview, **overrides)
+    while not waiter.check():
+        time.sleep(waiter.profile['poll_interval'])
+    return waiter.finish()
+
+
+def tab_webview(handle: str) -> str:
+    """窗口句柄对应的 DevTools target id（性能日志中的 webview）"""
+    return handle[len('CDwindow-'):] if handle.startswith('CDwindow-') else handle
+
+
+def wait_for_paint(driver, timeout: float = 2.0):
+    """
+    把当前标签页切到前台并等待两帧渲染
+
+    后台标签页的渲染会被浏览器节流，截图前调用，确保 canvas 等内容已绘制
+    """
+    try:
+        driver.execute_cdp_cmd('Page.bringToFront', {})
+    except Exception:
+        pass
+    # 复用的会话上还有其他异步脚本，结束后恢复原来的脚本超时
+    previous_timeout = None
+    try:
+        previous_timeout = driver.timeouts.script
+        driver.set_script_timeout(timeout)
+        driver.execute_async_script(
+            "var done = arguments[arguments.length - 1];"
+            "requestAnimationFrame(function () { requestAnimationFrame(function () { done(true); }); });"
+        )
+    except Exception as e:
+        print(f"[WARNING] 等待页面渲染失败: {_first_line(e)}")
+    finally:
+        if previous_timeout is not None:
+            try:
+                driver.set_script_timeout(previous_timeout)
+            except Exception:
+                pass
+
+
+def load_page(driver, url: str, target: str = 'default', **overrides) -> Dict:
+    """
+    打开页面并等待就绪
+
+    Args:
+        driver: WebDriver 实例
+        url: 页面地址
+        target: 目标页面名称（见 READINESS_PROFILES）
+        **overrides: 覆盖就绪参数
+
+    Returns:
+        Dict: 见 wait_until_ready
+    """
+    prepare_navigation(driver)
+    driver.get(url)
+    return wait_until_ready(driver, target, **overrides)
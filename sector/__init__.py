@@ -1,24 +1,54 @@
 """
 板块数据模块 - 整合价格获取和数据库存储功能
 """
-from .db import (
+from .storage import (
     init_tables,
     check_month_data_exists,
     save_month_record,
-    save_price_data,
     save_price_batch,
+    bulk_upsert_prices,
     get_current_month_prices_from_db,
     get_month_prices_from_db,
-    should_fetch_current_month_data
+    get_month_coverage,
+    get_month_aggregates,
+    get_prices_range,
+    iter_prices,
+    month_bounds,
+    should_fetch_current_month_data,
+    get_storage,
+    set_storage,
+    StorageBackend
 )
 
+# MySQL 相关函数在首次访问时才导入 .db，使用 SQLite/Parquet 后端时不需要安装 pymysql
+_DB_EXPORTS = ('save_price_data', 'get_pool_stats', 'close_db_pool')
+
+
+def __getattr__(name):
+    if name in _DB_EXPORTS:
+        from . import db
+        return getattr(db, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+from .cache import get_akshare_cache_stats
+from .ratelimit import get_rate_limiter_stats
+from .routing import get_source_routes
+from .history import PriceHistory
+from .valuation import ValuationHistory
+from .write_behind import flush_write_behind, close_write_behind, get_write_behind_stats
+
 from .fetcher import (
     get_sector_price_data,
+    fetch_price_history,
+    fetch_valuation_history,
     get_sector_valuation_data,
     get_sector_comprehensive_data,
     get_fund_return_rate,
     fetch_data_by_months,
+    fetch_many,
     format_analysis_result,
+    find_anchor_indices,
     get_symbol_title,
     TIME_PERIODS,
     COMMON_SECTORS,
@@ -32,16 +62,43 @@ __all__ = [
     'save_month_record',
     'save_price_data',
     'save_price_batch',
+    'bulk_upsert_prices',
     'get_current_month_prices_from_db',
     'get_month_prices_from_db',
+    'get_month_coverage',
+    'get_month_aggregates',
+    'get_prices_range',
+    'iter_prices',
+    'month_bounds',
     'should_fetch_current_month_data',
+    'get_pool_stats',
+    'close_db_pool',
+    # 存储后端相关
+    'get_storage',
+    'set_storage',
+    'StorageBackend',
+    # 后台写入相关
+    'flush_write_behind',
+    'close_write_behind',
+    'get_write_behind_stats',
+    # 接口缓存相关
+    'get_akshare_cache_stats',
+    'get_rate_limiter_stats',
+    'get_source_routes',
+    # 价格容器
+    'PriceHistory',
+    'ValuationHistory',
     # 数据获取相关
     'get_sector_price_data',
+    'fetch_price_history',
+    'fetch_valuation_history',
     'get_sector_valuation_data',
     'get_sector_comprehensive_data',
     'get_fund_return_rate',
     'fetch_data_by_months',
+    'fetch_many',
     'format_analysis_result',
+    'find_anchor_indices',
     'get_symbol_title',
     'TIME_PERIODS',
     'COMMON_SECTORS',
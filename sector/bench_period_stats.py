@@ -0,0 +1,106 @@
+"""
+多周期价格统计性能测试
+对比逐周期筛选 + idxmin（旧写法）与一次构建后缀结构 + 二分查找（_compute_period_stats）的速度，并校验两者结果一致
+
+用法:
+    python sector/bench_period_stats.py
+    python sector/bench_period_stats.py --years 10 --repeat 20
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# 添加父目录到路径以便导入sector模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sector.fetcher import _compute_period_stats, _period_target_dates
+
+PERIODS = ['1m', '3m', '6m', '1y', '3y', '5y']
+
+
+def make_frame(years: int) -> pd.DataFrame:
+    """生成截至今天的 years 年工作日日线数据，含少量缺失收盘价"""
+    dates = pd.bdate_range(end=datetime.now().date(), periods=years * 250)
+    rng = np.random.default_rng(0)
+    close = 3000 + rng.standard_normal(len(dates)).cumsum() * 20
+    close[::97] = np.nan
+    return pd.DataFrame({'日期': dates, '收盘': close})
+
+
+def stats_loop(price_df: pd.DataFrame, today: datetime):
+    """旧写法：每个周期筛选一次数据并扫描全部日期"""
+    result = {}
+    for period, target_date in _period_target_dates(PERIODS, today).items():
+        period_data = price_df[price_df['日期'] >= target_date].copy()
+        prices = pd.to_numeric(period_data['收盘'], errors='coerce').dropna()
+        dates = period_data.loc[prices.index, '日期']
+        if len(prices) < 2:
+            continue
+        closest_idx = (dates - target_date).abs().idxmin()
+        start_price = prices.loc[closest_idx]
+        current_price = prices.iloc[-1]
+        result[period] = (
+            float(current_price), float(start_price), float(prices.min()), float(prices.max()),
+            float((current_price - start_price) / start_price * 100), len(period_data),
+            dates.loc[closest_idx].strftime('%Y-%m-%d'), dates.iloc[-1].strftime('%Y-%m-%d'),
+        )
+    return result
+
+
+def stats_engine(price_df: pd.DataFrame, today: datetime):
+    """新写法：一次计算所有周期"""
+    stats = _compute_period_stats(
+        price_df['日期'].to_numpy(),
+        pd.to_numeric(price_df['收盘'], errors='coerce').to_numpy(dtype='float64', na_value=np.nan),
+        _period_target_dates(PERIODS, today)
+    )
+    return {
+        period: (
+            float(s['current_price']), float(s['start_price']), float(s['min_price']), float(s['max_price']),
+            float(s['change_pct']), s['data_points'],
+            s['start_date'].strftime('%Y-%m-%d'), s['end_date'].strftime('%Y-%m-%d'),
+        )
+        for period, s in stats.items() if 'error' not in s
+    }
+
+
+def best_of(func, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='多周期价格统计性能测试')
+    parser.add_argument('--years', type=int, default=5, help='日线数据年数')
+    parser.add_argument('--repeat', type=int, default=10, help='每种写法重复次数（取最快一次）')
+    args = parser.parse_args()
+
+    price_df = make_frame(args.years)
+    today = datetime.now() - timedelta(hours=1)
+
+    print("=" * 60)
+    print(f"多周期价格统计性能测试: {len(price_df)} 行（{args.years} 年），周期 {','.join(PERIODS)}")
+    print("=" * 60)
+
+    if stats_loop(price_df, today) != stats_engine(price_df, today):
+        print("[ERROR] 两种写法结果不一致")
+        sys.exit(1)
+
+    old_time = best_of(lambda: stats_loop(price_df, today), args.repeat)
+    new_time = best_of(lambda: stats_engine(price_df, today), args.repeat)
+    print(f"  逐周期筛选 + idxmin   耗时 {old_time * 1000:8.2f}ms")
+    print(f"  后缀结构 + 二分查找   耗时 {new_time * 1000:8.2f}ms  ({old_time / new_time:.1f}x)")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+价格数据内存占用测试
+对比 AKShare 原始 DataFrame（index_zh_a_hist 格式）+ 各周期 .copy() 切片（旧写法）与 PriceHistory（紧凑容器 + 周期视图）的内存占用
+
+用法:
+    python sector/bench_price_history.py
+    python sector/bench_price_history.py --years 5 --symbols 300
+"""
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# 添加父目录到路径以便导入sector模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sector.history import PriceHistory
+from sector.fetcher import _period_target_dates
+
+PERIODS = ['1m', '3m', '6m', '1y', '3y', '5y']
+
+
+def make_frame(years: int) -> pd.DataFrame:
+    """生成 index_zh_a_hist 格式的 years 年日线数据（日期为字符串列）"""
+    dates = pd.bdate_range(end=datetime.now().date(), periods=years * 250)
+    rng = np.random.default_rng(0)
+    close = np.round(3000 + rng.standard_normal(len(dates)).cumsum() * 20, 2)
+    volume = rng.integers(1e8, 5e8, len(dates))
+    return pd.DataFrame({
+        '日期': dates.strftime('%Y-%m-%d'),
+        '开盘': close - 5, '收盘': close, '最高': close + 10, '最低': close - 10,
+        '成交量': volume, '成交额': volume * close,
+        '振幅': rng.random(len(dates)), '涨跌幅': rng.standard_normal(len(dates)),
+        '涨跌额': rng.standard_normal(len(dates)) * 20, '换手率': rng.random(len(dates)),
+    })
+
+
+def frame_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True).sum())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='价格数据内存占用测试')
+    parser.add_argument('--years', type=int, default=5, help='每个代码的日线年数')
+    parser.add_argument('--symbols', type=int, default=300, help='代码数量（用于估算总占用）')
+    args = parser.parse_args()
+
+    raw = make_frame(args.years)
+    targets = _period_target_dates(PERIODS, datetime.now() - timedelta(hours=1))
+
+    # 旧写法：保留原始数据（日期转换为 datetime64），每个周期复制一份切片
+    old_df = raw.copy()
+    old_df['日期'] = pd.to_datetime(old_df['日期'])
+    old_slices = [old_df[old_df['日期'] >= target].copy() for target in targets.values()]
+    old_total = frame_bytes(old_df) + sum(frame_bytes(part) for part in old_slices)
+
+    # 新写法：紧凑容器，周期为视图
+    history = PriceHistory.from_frame('000300', raw, date_col='日期', close_col='收盘')
+    views = [history.since(target) for target in targets.values()]
+    assert all(np.shares_memory(view.bars, history.bars) for view in views if len(view))
+    new_total = history.nbytes
+
+    per_year = len(raw) / args.years
+
+    print("=" * 60)
+    print(f"价格数据内存占用测试: {len(raw)} 行（{args.years} 年），周期 {','.join(PERIODS)}")
+    print("=" * 60)
+    print(f"  原始 DataFrame            {frame_bytes(raw) / 1024:9.1f} KB（日期为字符串）")
+    print(f"  DataFrame + 周期切片      {old_total / 1024:9.1f} KB  每代码每年 {old_total / args.years / 1024:7.1f} KB  "
+          f"每根K线 {old_total / len(raw):6.1f} 字节")
+    print(f"  PriceHistory + 周期视图   {new_total / 1024:9.1f} KB  每代码每年 {new_total / args.years / 1024:7.1f} KB  "
+          f"每根K线 {new_total / len(raw):6.1f} 字节  ({old_total / new_total:.1f}x)")
+    print(f"  {args.symbols} 个代码估算: {old_total * args.symbols / 1024 / 1024:.1f} MB -> "
+          f"{new_total * args.symbols / 1024 / 1024:.1f} MB（每年约 {per_year:.0f} 根K线）")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""
+价格数据按月查询性能测试
+对比 YEAR()/MONTH() 过滤（旧写法）与半开日期区间过滤（get_prices_range）的查询速度
+
+默认在本地 SQLite 中生成 20 个代码 × 10 年日线数据；
+--mysql 时在 config 配置的 MySQL 中创建临时表 sector_prices_bench（与 sector_prices 结构相同），测试后删除
+
+用法:
+    python sector/bench_price_range_query.py
+    python sector/bench_price_range_query.py --symbols 30 --years 10
+    python sector/bench_price_range_query.py --mysql
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+
+# 添加父目录到路径以便导入sector模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BENCH_TABLE = 'sector_prices_bench'
+
+
+def make_rows(symbols: int, years: int):
+    """生成 symbols 个代码 × years 年的工作日日线数据"""
+    end = date(2025, 12, 31)
+    start = date(end.year - years + 1, 1, 1)
+    days = []
+    day = start
+    while day <= end:
+        if day.weekday() < 5:
+            days.append(day.strftime('%Y-%m-%d'))
+        day += timedelta(days=1)
+
+    rows = []
+    for n in range(symbols):
+        symbol = f"{n:06d}"
+        for i, trade_date in enumerate(days):
+            close = 1000 + n * 10 + (i % 300)
+            rows.append((symbol, symbol, trade_date, close - 1, close + 5, close - 5, close, 100000 + i))
+    return rows, start.year, end.year
+
+
+def month_list(first_year: int, last_year: int):
+    return [(y, m) for y in range(first_year, last_year + 1) for m in range(1, 13)]
+
+
+def bench_sqlite(rows):
+    from sector.db import month_bounds
+
+    conn = sqlite3.connect(':memory:')
+    conn.execute(f"""
+    CREATE TABLE {BENCH_TABLE} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        symbol TEXT NOT NULL, symbol_title TEXT, trade_date TEXT NOT NULL,
+        open_price REAL, high_price REAL, low_price REAL, close_price REAL NOT NULL, volume INTEGER
+    )
+    """)
+    conn.execute(f"CREATE UNIQUE INDEX idx_symbol_date ON {BENCH_TABLE} (symbol, trade_date)")
+    conn.executemany(
+        f"INSERT INTO {BENCH_TABLE} (symbol, symbol_title, trade_date, open_price, high_price, low_price, close_price, volume) "
+        f"VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.execute("ANALYZE")
+
+    columns = 'trade_date, open_price, high_price, low_price, close_price, volume'
+    old_sql = (f"SELECT {columns} FROM {BENCH_TABLE} WHERE symbol = ? "
+               f"AND CAST(strftime('%Y', trade_date) AS INTEGER) = ? "
+               f"AND CAST(strftime('%m', trade_date) AS INTEGER) = ? ORDER BY trade_date ASC")
+    new_sql = (f"SELECT {columns} FROM {BENCH_TABLE} WHERE symbol = ? "
+               f"AND trade_date >= ? AND trade_date < ? ORDER BY trade_date ASC")
+
+    def run_old(symbol, year, month):
+        return conn.execute(old_sql, (symbol, year, month)).fetchall()
+
+    def run_new(symbol, year, month):
+        return conn.execute(new_sql, (symbol, *month_bounds(year, month))).fetchall()
+
+    for name, sql, params in (('YEAR()/MONTH()', old_sql, ('000000', 2020, 6)),
+                              ('半开区间', new_sql, ('000000', '2020-06-01', '2020-07-01'))):
+        plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+        print(f"  查询计划 [{name}]: {' | '.join(str(row[-1]) for row in plan)}")
+
+    return run_old, run_new
+
+
+def bench_mysql(rows):
+    from sector.db import db_connection, month_bounds
+
+    with db_connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE}")
+            cursor.execute(f"CREATE TABLE {BENCH_TABLE} LIKE sector_prices")
+            for start in range(0, len(rows), 1000):
+                cursor.executemany(
+                    f"INSERT INTO {BENCH_TABLE} (symbol, symbol_title, trade_date, open_price, high_price, low_price, close_price, volume) "
+                    f"VALUES (%s, %s, %s, %s, %s, %s, %s, %s)", rows[start:start + 1000])
+            connection.commit()
+            cursor.execute(f"ANALYZE TABLE {BENCH_TABLE}")
+            cursor.fetchall()
+
+    columns = 'trade_date, open_price, high_price, low_price, close_price, volume'
+    old_sql = (f"SELECT {columns} FROM {BENCH_TABLE} WHERE symbol = %s "
+               f"AND YEAR(trade_date) = %s AND MONTH(trade_date) = %s ORDER BY trade_date ASC")
+    new_sql = (f"SELECT {columns} FROM {BENCH_TABLE} WHERE symbol = %s "
+               f"AND trade_date >= %s AND trade_date < %s ORDER BY trade_date ASC")
+
+    def query(sql, params):
+        with db_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                return cursor.fetchall()
+
+    for name, sql, params in (('YEAR()/MONTH()', old_sql, ('000000', 2020, 6)),
+                              ('半开区间', new_sql, ('000000', '2020-06-01', '2020-07-01'))):
+        plan = query(f"EXPLAIN {sql}", params)
+        print(f"  查询计划 [{name}]: " + ' | '.join(
+            f"key={row.get('key')} type={row.get('type')} rows={row.get('rows')}" for row in plan))
+
+    def run_old(symbol, year, month):
+        return query(old_sql, (symbol, year, month))
+
+    def run_new(symbol, year, month):
+        return query(new_sql, (symbol, *month_bounds(year, month)))
+
+    return run_old, run_new
+
+
+def drop_mysql_table():
+    from sector.db import db_connection
+    with db_connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE}")
+        connection.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='价格数据按月查询性能测试')
+    parser.add_argument('--symbols', type=int, default=20, help='代码数量')
+    parser.add_argument('--years', type=int, default=10, help='每个代码的年数')
+    parser.add_argument('--mysql', action='store_true', help='使用 config 中配置的 MySQL')
+    args = parser.parse_args()
+
+    rows, first_year, last_year = make_rows(args.symbols, args.years)
+    symbols = sorted({row[0] for row in rows})
+    months = month_list(first_year, last_year)
+
+    print("=" * 60)
+    print(f"价格数据按月查询性能测试: {len(symbols)} 个代码 × {args.years} 年，共 {len(rows)} 行，"
+          f"{'MySQL' if args.mysql else 'SQLite'}")
+    print("=" * 60)
+
+    try:
+        if args.mysql:
+            run_old, run_new = bench_mysql(rows)
+        else:
+            run_old, run_new = bench_sqlite(rows)
+
+        results = {}
+        for name, func in (('YEAR()/MONTH() 过滤', run_old), ('半开日期区间', run_new)):
+            fetched = 0
+            start = time.perf_counter()
+            for symbol in symbols:
+                for year, month in months:
+                    fetched += len(func(symbol, year, month))
+            results[name] = (time.perf_counter() - start, fetched)
+
+        queries = len(symbols) * len(months)
+        baseline = None
+        for name, (elapsed, fetched) in results.items():
+            per_query = elapsed / queries * 1000
+            baseline = baseline or elapsed
+            print(f"  {name:<20} {queries} 次查询，返回 {fetched} 行，耗时 {elapsed:7.3f}s，"
+                  f"平均 {per_query:.3f}ms/次  ({baseline / elapsed:.1f}x)")
+    finally:
+        if args.mysql:
+            drop_mysql_table()
+
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
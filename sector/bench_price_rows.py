@@ -0,0 +1,119 @@
+"""
+价格数据行转换性能测试
+对比逐行 iterrows（旧写法）与按列向量化转换（normalize_price_frame + to_price_rows）的速度，并校验两者结果一致
+
+数据为模拟的 AKShare 日线格式（index_zh_a_hist 中文列名 / stock_zh_index_daily 英文列名），默认 10 年
+
+用法:
+    python sector/bench_price_rows.py
+    python sector/bench_price_rows.py --years 20 --repeat 5
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# 添加父目录到路径以便导入sector模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sector.normalize import PRICE_COLUMNS, normalize_price_frame, to_price_rows
+
+BENCH_SYMBOL = '000300'
+BENCH_TITLE = '沪深300'
+
+
+def make_frame(years: int, english: bool) -> pd.DataFrame:
+    """生成 years 年工作日日线数据，含少量缺失值"""
+    dates = pd.bdate_range(end='2025-12-31', periods=years * 250)
+    rng = np.random.default_rng(0)
+    close = 3000 + rng.standard_normal(len(dates)).cumsum() * 20
+    volume = rng.integers(1e8, 5e8, len(dates)).astype('float64')
+    close[::97] = np.nan
+    volume[::53] = np.nan
+    if english:
+        return pd.DataFrame({
+            'date': dates, 'open': close - 5, 'high': close + 10, 'low': close - 10,
+            'close': close, 'volume': volume,
+        })
+    return pd.DataFrame({
+        '日期': dates, '开盘': close - 5, '收盘': close, '最高': close + 10, '最低': close - 10,
+        '成交量': volume, '成交额': volume * close,
+    })
+
+
+def rows_iterrows(price_df: pd.DataFrame, close_col: str):
+    """旧写法：逐行读取并构造字典"""
+    price_data_list = []
+    for _, row in price_df.iterrows():
+        open_val = row.get('open') if 'open' in row.index else (row.get('开盘') if '开盘' in row.index else None)
+        high_val = row.get('high') if 'high' in row.index else (row.get('最高') if '最高' in row.index else None)
+        low_val = row.get('low') if 'low' in row.index else (row.get('最低') if '最低' in row.index else None)
+        volume_val = row.get('volume') if 'volume' in row.index else (row.get('成交量') if '成交量' in row.index else None)
+
+        price_data = {
+            'symbol': BENCH_SYMBOL,
+            'symbol_title': BENCH_TITLE,
+            'trade_date': row['日期'].strftime('%Y-%m-%d'),
+            'open_price': float(open_val) if pd.notna(open_val) else None,
+            'high_price': float(high_val) if pd.notna(high_val) else None,
+            'low_price': float(low_val) if pd.notna(low_val) else None,
+            'close_price': float(row[close_col]) if pd.notna(row[close_col]) else None,
+            'volume': int(volume_val) if pd.notna(volume_val) else None,
+        }
+        if price_data['close_price'] is not None:
+            price_data_list.append(price_data)
+    return price_data_list
+
+
+def rows_vectorized(price_df: pd.DataFrame, close_col: str):
+    """新写法：按列标准化后一次生成元组"""
+    canonical = normalize_price_frame(price_df, date_col='日期', close_col=close_col)
+    return to_price_rows(BENCH_SYMBOL, BENCH_TITLE, canonical)
+
+
+def best_of(func, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='价格数据行转换性能测试')
+    parser.add_argument('--years', type=int, default=10, help='日线数据年数')
+    parser.add_argument('--repeat', type=int, default=3, help='每种写法重复次数（取最快一次）')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"价格数据行转换性能测试: {args.years} 年日线")
+    print("=" * 60)
+
+    for label, english in (('index_zh_a_hist 格式', False), ('stock_zh_index_daily 格式', True)):
+        df = make_frame(args.years, english)
+        close_col = 'close' if english else '收盘'
+        if english:
+            # 与 fetcher 一致：英文格式的日期列统一为 '日期'
+            df = df.rename(columns={'date': '日期'})
+
+        old_rows = [tuple(row[col] for col in PRICE_COLUMNS) for row in rows_iterrows(df, close_col)]
+        new_rows = rows_vectorized(df, close_col)
+        if old_rows != new_rows:
+            print(f"[ERROR] {label}: 两种写法结果不一致")
+            sys.exit(1)
+
+        old_time = best_of(lambda: rows_iterrows(df, close_col), args.repeat)
+        new_time = best_of(lambda: rows_vectorized(df, close_col), args.repeat)
+        print(f"  {label}（{len(df)} 行，有效 {len(new_rows)} 行）")
+        print(f"    {'逐行 iterrows':<16} 耗时 {old_time * 1000:9.2f}ms")
+        print(f"    {'按列向量化':<16} 耗时 {new_time * 1000:9.2f}ms  ({old_time / new_time:.1f}x)")
+
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+价格数据批量写入性能测试
+对比逐条 execute（旧写法）与分批多行 upsert（bulk_upsert_prices）的写入速度
+
+用法:
+    python sector/bench_save_price_batch.py                      # 使用本地 SQLite 模拟
+    python sector/bench_save_price_batch.py --latency-ms 20      # 模拟每条语句 20ms 网络往返
+    python sector/bench_save_price_batch.py --mysql              # 使用 config 中配置的 MySQL（写入临时代码后删除）
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+
+# 添加父目录到路径以便导入sector模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BENCH_SYMBOL = '__BENCH__'
+
+
+def make_rows(count: int):
+    """生成 count 条连续日期的模拟价格数据（按 PRICE_COLUMNS 排列的元组）"""
+    start = date(2000, 1, 3)
+    rows = []
+    for i in range(count):
+        close = 3000 + (i % 200) * 1.5
+        rows.append((
+            BENCH_SYMBOL, BENCH_SYMBOL, (start + timedelta(days=i)).strftime('%Y-%m-%d'),
+            close - 5, close + 10, close - 10, close, 100000 + i
+        ))
+    return rows
+
+
+class SQLiteStandIn:
+    """SQLite 模拟库，latency 为每次语句往返的模拟网络延迟（秒）"""
+
+    COLUMNS = 'symbol, symbol_title, trade_date, open_price, high_price, low_price, close_price, volume'
+    UPDATE = """
+    ON CONFLICT(symbol, trade_date) DO UPDATE SET
+        symbol_title = excluded.symbol_title,
+        open_price = excluded.open_price,
+        high_price = excluded.high_price,
+        low_price = excluded.low_price,
+        close_price = excluded.close_price,
+        volume = excluded.volume
+    """
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.execute(f"""
+        CREATE TABLE sector_prices (
+            symbol TEXT NOT NULL, symbol_title TEXT, trade_date TEXT NOT NULL,
+            open_price REAL, high_price REAL, low_price REAL, close_price REAL NOT NULL, volume INTEGER,
+            UNIQUE (symbol, trade_date)
+        )
+        """)
+
+    def _roundtrip(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def reset(self):
+        self.conn.execute("DELETE FROM sector_prices")
+        self.conn.commit()
+
+    def row_loop(self, rows):
+        sql = f"INSERT INTO sector_prices ({self.COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?) {self.UPDATE}"
+        for row in rows:
+            self._roundtrip()
+            self.conn.execute(sql, row)
+        self.conn.commit()
+
+    def bulk(self, rows, chunk_size):
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            values = ', '.join(['(?, ?, ?, ?, ?, ?, ?, ?)'] * len(chunk))
+            params = [value for row in chunk for value in row]
+            # 与 MySQL 路径一致：每批先按日期范围查询已存在的记录（精确统计新增/更新数），再执行一条多行 upsert
+            self._roundtrip()
+            self.conn.execute("SELECT trade_date FROM sector_prices WHERE symbol = ? AND trade_date BETWEEN ? AND ?",
+                              (chunk[0][0], chunk[0][2], chunk[-1][2])).fetchall()
+            self._roundtrip()
+            self.conn.execute(f"INSERT INTO sector_prices ({self.COLUMNS}) VALUES {values} {self.UPDATE}", params)
+            self.conn.commit()
+
+
+def bench_sqlite(rows, chunk_size, latency):
+    db = SQLiteStandIn(latency)
+    results = {}
+    for name, func in (('逐条 execute', lambda: db.row_loop(rows)),
+                       (f'分批 upsert (chunk={chunk_size})', lambda: db.bulk(rows, chunk_size))):
+        db.reset()
+        start = time.perf_counter()
+        func()
+        results[name] = time.perf_counter() - start
+    return results
+
+
+def bench_mysql(rows, chunk_size):
+    from sector.db import db_connection, bulk_upsert_prices, _UPSERT_PRICE_SQL
+
+    def cleanup():
+        with db_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("DELETE FROM sector_prices WHERE symbol = %s", (BENCH_SYMBOL,))
+            connection.commit()
+
+    def row_loop():
+        with db_connection() as connection:
+            with connection.cursor() as cursor:
+                for row in rows:
+                    cursor.execute(_UPSERT_PRICE_SQL, row)
+            connection.commit()
+
+    results = {}
+    try:
+        for name, func in (('逐条 execute', row_loop),
+                           (f'分批 upsert (chunk={chunk_size})', lambda: bulk_upsert_prices(rows, chunk_size))):
+            cleanup()
+            start = time.perf_counter()
+            func()
+            results[name] = time.perf_counter() - start
+    finally:
+        cleanup()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='价格数据批量写入性能测试')
+    parser.add_argument('--rows', type=int, default=1250, help='写入行数（默认约5年日线）')
+    parser.add_argument('--chunk-size', type=int, default=500, help='每批行数')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='SQLite 模拟时每条语句的网络往返延迟（毫秒）')
+    parser.add_argument('--mysql', action='store_true', help='使用 config 中配置的 MySQL')
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+
+    print("=" * 60)
+    print(f"价格数据批量写入性能测试: {args.rows} 行，"
+          f"{'MySQL' if args.mysql else f'SQLite 模拟（往返延迟 {args.latency_ms}ms）'}")
+    print("=" * 60)
+
+    if args.mysql:
+        results = bench_mysql(rows, args.chunk_size)
+    else:
+        results = bench_sqlite(rows, args.chunk_size, args.latency_ms / 1000)
+
+    baseline = None
+    for name, elapsed in results.items():
+        rate = len(rows) / elapsed if elapsed > 0 else float('inf')
+        baseline = baseline or rate
+        print(f"  {name:<28} 耗时 {elapsed:8.3f}s  速度 {rate:12.0f} 行/秒  ({rate / baseline:.1f}x)")
+
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+存储后端吞吐量测试
+对各存储后端分别测试: 首次批量写入（新增）、重复写入（更新）、按月读取、整段区间读取
+
+用法:
+    python sector/bench_storage_backends.py
+    python sector/bench_storage_backends.py --symbols 20 --years 5 --backends sqlite,parquet,mysql
+
+mysql 后端使用 config 中的数据库配置，会写入以 BENCH_ 开头的测试代码，测试结束后删除
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# 添加父目录到路径以便导入sector模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sector.normalize import normalize_price_frame, to_price_rows
+
+
+def make_rows(symbols: int, years: int):
+    """生成 symbols 个代码、每个 years 年的日线数据（fetcher 写入时使用的元组格式）"""
+    dates = pd.bdate_range(end=datetime.now().date(), periods=years * 250)
+    rng = np.random.default_rng(0)
+    rows = []
+    for i in range(symbols):
+        close = np.round(3000 + rng.standard_normal(len(dates)).cumsum() * 20, 2)
+        df = pd.DataFrame({
+            '日期': dates, '开盘': close - 5, '收盘': close, '最高': close + 10, '最低': close - 10,
+            '成交量': rng.integers(1e8, 5e8, len(dates)),
+        })
+        rows.extend(to_price_rows(f"BENCH_{i:03d}", f"测试代码{i}", normalize_price_frame(df)))
+    return rows, dates
+
+
+def create_backend(name: str, workdir: str):
+    if name == 'sqlite':
+        from sector.sqlite_store import SQLiteBackend
+        return SQLiteBackend(os.path.join(workdir, 'bench.db'))
+    if name == 'parquet':
+        from sector.parquet_store import ParquetBackend
+        return ParquetBackend(os.path.join(workdir, 'parquet'))
+    if name == 'mysql':
+        from sector.storage import MySQLBackend
+        return MySQLBackend()
+    raise ValueError(f"未知的后端: {name}")
+
+
+def cleanup_mysql():
+    from sector.db import db_connection
+    with db_connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM sector_prices WHERE symbol LIKE 'BENCH\\_%%'")
+            cursor.execute("DELETE FROM sector_months WHERE symbol LIKE 'BENCH\\_%%'")
+        connection.commit()
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def run_backend(name: str, rows, dates, symbols: int, workdir: str):
+    backend = create_backend(name, workdir)
+    backend.init_tables()
+
+    report, insert_time = timed(lambda: backend.bulk_upsert_prices(rows))
+    if report['inserted'] != len(rows):
+        print(f"[ERROR] {name} 新增记录数不符: {report['inserted']} != {len(rows)}")
+    report, update_time = timed(lambda: backend.bulk_upsert_prices(rows))
+    if report['updated'] != len(rows):
+        print(f"[ERROR] {name} 更新记录数不符: {report['updated']} != {len(rows)}")
+
+    months = sorted({(d.year, d.month) for d in dates})
+    codes = [f"BENCH_{i:03d}" for i in range(symbols)]
+
+    def read_months():
+        return sum(len(backend.get_month_prices_from_db(code, y, m)) for code in codes for y, m in months)
+
+    def read_ranges():
+        return sum(len(backend.get_prices_range(code)) for code in codes)
+
+    month_rows, month_time = timed(read_months)
+    range_rows, range_time = timed(read_ranges)
+    if month_rows != len(rows) or range_rows != len(rows):
+        print(f"[ERROR] {name} 读取记录数不符: 按月 {month_rows}，整段 {range_rows}，应为 {len(rows)}")
+
+    print(f"  {name:<8} 新增 {len(rows) / insert_time:>9.0f} 行/秒  更新 {len(rows) / update_time:>9.0f} 行/秒  "
+          f"按月读取 {len(codes) * len(months) / month_time:>7.0f} 次/秒  整段读取 {len(rows) / range_time:>9.0f} 行/秒")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='存储后端吞吐量测试')
+    parser.add_argument('--symbols', type=int, default=10, help='代码数量')
+    parser.add_argument('--years', type=int, default=5, help='每个代码的日线年数')
+    parser.add_argument('--backends', default='sqlite,parquet', help='测试的后端，逗号分隔（sqlite、parquet、mysql）')
+    args = parser.parse_args()
+
+    rows, dates = make_rows(args.symbols, args.years)
+    backends = [b.strip() for b in args.backends.split(',') if b.strip()]
+
+    print("=" * 60)
+    print(f"存储后端吞吐量测试: {args.symbols} 个代码 x {args.years} 年，共 {len(rows)} 行")
+    print("=" * 60)
+
+    workdir = tempfile.mkdtemp(prefix='bench_storage_')
+    try:
+        for name in backends:
+            try:
+                run_backend(name, rows, dates, args.symbols, workdir)
+            except Exception as e:
+                print(f"  {name:<8} [ERROR] 测试失败: {e}")
+            finally:
+                if name == 'mysql':
+                    try:
+                        cleanup_mysql()
+                    except Exception as e:
+                        print(f"[WARNING] 清理 MySQL 测试数据失败: {e}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+估值统计性能测试
+对比逐周期筛选 + to_numeric（旧写法）与 ValuationHistory 一次计算所有周期的速度，
+以及滚动分位数逐窗口重新计算与增量计算的速度，并校验结果一致
+
+用法:
+    python sector/bench_valuation_stats.py
+    python sector/bench_valuation_stats.py --years 15 --window 1095 --repeat 5
+"""
+import argparse
+import math
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# 添加父目录到路径以便导入sector模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sector.fetcher import TIME_PERIODS
+from sector.valuation import ValuationHistory
+
+PERIODS = ['1m', '3m', '6m', '1y', '3y', '5y']
+
+
+def make_frame(years: int) -> pd.DataFrame:
+    """生成截至今天的 years 年估值数据（funddb 格式，含少量缺失值）"""
+    dates = pd.bdate_range(end=datetime.now().date(), periods=years * 250)
+    rng = np.random.default_rng(0)
+    pe = np.round(20 + rng.standard_normal(len(dates)).cumsum() * 0.2, 2)
+    pe[::53] = np.nan
+    pb = np.round(3 + rng.standard_normal(len(dates)).cumsum() * 0.02, 2)
+    return pd.DataFrame({'日期': dates.strftime('%Y-%m-%d'), '市盈率': pe, '市净率': pb})
+
+
+def stats_loop(valuation_df: pd.DataFrame, today: datetime):
+    """旧写法：每个周期筛选一次数据、重新识别列并转换为数值"""
+    valuation_df = valuation_df.copy()
+    valuation_df['日期'] = pd.to_datetime(valuation_df['日期'])
+    valuation_df = valuation_df.sort_values('日期')
+    result = {}
+    for period in PERIODS:
+        period_data = valuation_df[valuation_df['日期'] >= today - timedelta(days=TIME_PERIODS[period] * 30)]
+        period_result = {'data_points': len(period_data)}
+        for metric, col in (('pe', '市盈率'), ('pb', '市净率')):
+            values = pd.to_numeric(period_data[col], errors='coerce').dropna()
+            current = values.iloc[-1]
+            period_result[metric] = (
+                float(current), float(values.min()), float(values.max()),
+                float((values <= current).sum() / len(values)), float(values.mean()), float(values.median()),
+            )
+        result[period] = period_result
+    return result
+
+
+def stats_engine(valuation_df: pd.DataFrame, today: datetime):
+    """新写法：标准化一次，一次计算所有周期"""
+    history = ValuationHistory.from_frame('bench', valuation_df)
+    stats = history.period_stats({p: today - timedelta(days=TIME_PERIODS[p] * 30) for p in PERIODS})
+    return {
+        period: {
+            'data_points': s['data_points'],
+            **{metric: (s[metric]['current'], s[metric]['min'], s[metric]['max'], s[metric]['percentile'],
+                        s[metric]['mean'], s[metric]['median']) for metric in ('pe', 'pb')},
+        }
+        for period, s in stats.items()
+    }
+
+
+def same_stats(a, b) -> bool:
+    if a.keys() != b.keys():
+        return False
+    for period in a:
+        if a[period]['data_points'] != b[period]['data_points']:
+            return False
+        for metric in ('pe', 'pb'):
+            if not all(math.isclose(x, y, rel_tol=1e-9) for x, y in zip(a[period][metric], b[period][metric])):
+                return False
+    return True
+
+
+def rolling_naive(history: ValuationHistory, window_days: int) -> np.ndarray:
+    """逐窗口重新计算滚动分位数"""
+    dates, values = history.dates, history.values['pe']
+    result = np.full(len(values), np.nan)
+    lefts = np.searchsorted(dates, dates - np.timedelta64(window_days, 'D'), side='left')
+    for i, left in enumerate(lefts):
+        if np.isnan(values[i]):
+            continue
+        window = values[left:i + 1]
+        window = window[~np.isnan(window)]
+        result[i] = (window <= values[i]).sum() / len(window)
+    return result
+
+
+def best_of(func, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='估值统计性能测试')
+    parser.add_argument('--years', type=int, default=10, help='估值数据年数')
+    parser.add_argument('--window', type=int, default=1095, help='滚动分位数窗口天数')
+    parser.add_argument('--repeat', type=int, default=5, help='每种写法重复次数（取最快一次）')
+    args = parser.parse_args()
+
+    valuation_df = make_frame(args.years)
+    today = datetime.now() - timedelta(hours=1)
+
+    print("=" * 60)
+    print(f"估值统计性能测试: {len(valuation_df)} 行（{args.years} 年），周期 {','.join(PERIODS)}")
+    print("=" * 60)
+
+    if not same_stats(stats_loop(valuation_df, today), stats_engine(valuation_df, today)):
+        print("[ERROR] 两种写法的周期统计不一致")
+        sys.exit(1)
+
+    history = ValuationHistory.from_frame('bench', valuation_df)
+    if not np.array_equal(rolling_naive(history, args.window), history.rolling_percentile('pe', args.window).to_numpy(),
+                          equal_nan=True):
+        print("[ERROR] 两种写法的滚动分位数不一致")
+        sys.exit(1)
+
+    old_time = best_of(lambda: stats_loop(valuation_df, today), args.repeat)
+    new_time = best_of(lambda: stats_engine(valuation_df, today), args.repeat)
+    print(f"  逐周期筛选 + to_numeric   耗时 {old_time * 1000:8.2f}ms")
+    print(f"  标准化一次 + 后缀结构     耗时 {new_time * 1000:8.2f}ms  ({old_time / new_time:.1f}x)")
+
+    old_time = best_of(lambda: rolling_naive(history, args.window), args.repeat)
+    new_time = best_of(lambda: history.rolling_percentile('pe', args.window), args.repeat)
+    print(f"  滚动分位数（{args.window} 天）逐窗口计算 耗时 {old_time * 1000:8.2f}ms")
+    print(f"  滚动分位数（{args.window} 天）增量计算   耗时 {new_time * 1000:8.2f}ms  ({old_time / new_time:.1f}x)")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,392 @@
+"""
+AKShare 接口响应的磁盘缓存模块
+按 "接口名 + 规范化参数" 的哈希值缓存返回的 DataFrame，按接口设置过期时间，按总大小淘汰最久未使用的缓存
+"""
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from datetime import date, datetime
+from typing import Callable, Dict, Optional
+
+import pandas as pd
+
+# 添加父目录到路径，以便导入config
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import (
+    AKSHARE_CACHE_ENABLED,
+    AKSHARE_CACHE_DIR,
+    AKSHARE_CACHE_MAX_MB,
+    AKSHARE_CACHE_DEFAULT_TTL
+)
+
+# Parquet 需要 pyarrow，未安装时退化为 pickle
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# 各接口的缓存时间（秒），用于结果包含当天数据的调用
+# 指定了 end_date 且早于今天的调用（已收盘的历史区间）永久缓存
+ENDPOINT_TTLS = {
+    'index_zh_a_hist': 300,
+    'stock_zh_index_daily': 600,
+    'index_zh_a_hist_min_em': 300,
+    'stock_zh_index_spot': 60,
+    'index_value_hist_funddb': 3600,
+    'fund_etf_hist_sina': 600,
+    'stock_zh_a_hist': 600,
+    'fund_em_fund_info': 3600,
+    'fund_etf_spot_em': 60,
+}
+
+# 超过缓存上限时淘汰到上限的该比例以下
+EVICT_TARGET = 0.9
+
+
+def _normalize(value):
+    """把参数转换为可稳定序列化的形式"""
+    if isinstance(value, (datetime, date, pd.Timestamp)):
+        return value.strftime('%Y%m%d')
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in sorted(value.items())}
+    return value
+
+
+def make_cache_key(func_name: str, args: tuple, kwargs: dict) -> str:
+    """
+    生成缓存键：接口名 + 规范化参数的 SHA-256
+
+    Args:
+        func_name: 接口名
+        args: 位置参数
+        kwargs: 关键字参数
+
+    Returns:
+        str: 缓存键
+    """
+    payload = json.dumps(
+        {'func': func_name, 'args': _normalize(list(args)), 'kwargs': _normalize(kwargs)},
+        ensure_ascii=False, sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _parse_day(value) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return pd.Timestamp(str(value)).date()
+    except (ValueError, TypeError):
+        return None
+
+
+class AkshareCache:
+    """
+    AKShare 响应磁盘缓存
+
+    每条缓存为 <cache_dir>/<接口名>/<key>.parquet（或 .pkl）加一个 .json 元数据文件
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int, default_ttl: float = 300.0,
+                 ttls: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            cache_dir: 缓存目录
+            max_bytes: 缓存总大小上限（字节），超出时按最近访问时间淘汰
+            default_ttl: 未在 ttls 中配置的接口的缓存时间（秒）
+            ttls: 各接口的缓存时间（秒），默认 ENDPOINT_TTLS
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.ttls = dict(ENDPOINT_TTLS if ttls is None else ttls)
+        self._lock = threading.Lock()
+        # 缓存总大小（字节）的估计值，None 表示尚未统计；写入时累加，超过上限时才扫描目录淘汰并重新统计
+        # 覆盖写入和过期删除不扣减，估计值只会偏大（提前扫描一次，不会漏淘汰）
+        self._size = None
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'expired': 0,
+            'writes': 0,
+            'evictions': 0,
+            'errors': 0,
+        }
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            self._stats[name] += n
+
+    def resolve_ttl(self, func_name: str, kwargs: dict) -> Optional[float]:
+        """
+        计算缓存时间
+
+        Returns:
+            Optional[float]: 秒数，None 表示永久缓存
+        """
+        end_day = _parse_day(kwargs.get('end_date'))
+        if end_day is not None and end_day < date.today():
+            return None
+        return self.ttls.get(func_name, self.default_ttl)
+
+    def _paths(self, func_name: str, key: str):
+        base = os.path.join(self.cache_dir, func_name, key)
+        return base + '.json', base + '.parquet', base + '.pkl'
+
+    def _remove(self, *paths):
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def get(self, func_name: str, key: str) -> Optional[pd.DataFrame]:
+        """
+        读取缓存
+
+        Returns:
+            Optional[pd.DataFrame]: 未命中或已过期时返回 None
+        """
+        meta_path, parquet_path, pickle_path = self._paths(func_name, key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            self._count('misses')
+            return None
+
+        data_path = parquet_path if meta.get('format') == 'parquet' else pickle_path
+        expires_at = meta.get('expires_at')
+        if expires_at is not None and time.time() >= expires_at:
+            self._remove(meta_path, data_path)
+            self._count('expired')
+            self._count('misses')
+            return None
+
+        try:
+            if meta.get('format') == 'parquet':
+                df = pd.read_parquet(data_path)
+            else:
+                df = pd.read_pickle(data_path)
+            # 用数据文件的修改时间记录最近访问时间，供淘汰使用
+            os.utime(data_path, None)
+        except Exception:
+            self._remove(meta_path, data_path)
+            self._count('errors')
+            self._count('misses')
+            return None
+
+        self._count('hits')
+        return df
+
+    def put(self, func_name: str, key: str, df: pd.DataFrame, ttl: Optional[float], params: Optional[dict] = None):
+        """
+        写入缓存（先写临时文件再原子替换）
+
+        Args:
+            func_name: 接口名
+            key: 缓存键
+            df: 要缓存的数据
+            ttl: 缓存时间（秒），None 表示永久
+            params: 调用参数（仅写入元数据，便于排查）
+        """
+        meta_path, parquet_path, pickle_path = self._paths(func_name, key)
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        tmp_suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+
+        fmt = None
+        if PARQUET_AVAILABLE:
+            try:
+                df.to_parquet(parquet_path + tmp_suffix)
+                written = os.path.getsize(parquet_path + tmp_suffix)
+                os.replace(parquet_path + tmp_suffix, parquet_path)
+                fmt = 'parquet'
+            except Exception:
+                # 列类型无法转换为 Parquet 时退化为 pickle
+                self._remove(parquet_path + tmp_suffix)
+        if fmt is None:
+            try:
+                df.to_pickle(pickle_path + tmp_suffix)
+                written = os.path.getsize(pickle_path + tmp_suffix)
+                os.replace(pickle_path + tmp_suffix, pickle_path)
+                fmt = 'pickle'
+            except Exception as e:
+                self._remove(pickle_path + tmp_suffix)
+                self._count('errors')
+                print(f"[WARNING] 写入 {func_name} 缓存失败: {e}")
+                return
+
+        now = time.time()
+        meta = {
+            'func': func_name,
+            'params': params,
+            'format': fmt,
+            'created_at': now,
+            'expires_at': None if ttl is None else now + ttl,
+            'rows': len(df),
+        }
+        with open(meta_path + tmp_suffix, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, default=str)
+        os.replace(meta_path + tmp_suffix, meta_path)
+        self._count('writes')
+        with self._lock:
+            if self._size is not None:
+                self._size += written
+            due = self._size is None or self._size > self.max_bytes
+        if due:
+            self.evict()
+
+    def evict(self) -> int:
+        """
+        扫描缓存目录统计总大小，超过上限时按最近访问时间从旧到新删除缓存，直到低于上限的 EVICT_TARGET
+
+        put 只在估计的总大小超过上限（或首次写入）时调用
+
+        Returns:
+            int: 删除的缓存条数
+        """
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not (name.endswith('.parquet') or name.endswith('.pkl')):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        evicted = 0
+        if total > self.max_bytes:
+            # 淘汰到上限的 EVICT_TARGET 以下，留出余量，避免缓存写满后每次写入都扫描目录
+            target = self.max_bytes * EVICT_TARGET
+            for _, size, path in sorted(entries):
+                if total <= target:
+                    break
+                self._remove(path, os.path.splitext(path)[0] + '.json')
+                total -= size
+                evicted += 1
+            self._count('evictions', evicted)
+        with self._lock:
+            self._size = total
+        return evicted
+
+    def clear(self):
+        """清空缓存"""
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                self._remove(os.path.join(root, name))
+        with self._lock:
+            self._size = 0
+
+    def get_stats(self) -> Dict:
+        """
+        获取缓存统计信息
+
+        Returns:
+            Dict: hits/misses(命中/未命中)、expired(过期)、writes(写入)、evictions(淘汰)、errors、hit_rate
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+    def wrap(self, func_name: str, func: Callable) -> Callable:
+        """
+        包装 AKShare 接口：命中缓存时直接返回，否则调用接口并缓存非空 DataFrame 结果
+        接口抛出的异常不缓存
+        """
+        def cached_func(*args, **kwargs):
+            key = make_cache_key(func_name, args, kwargs)
+            df = self.get(func_name, key)
+            if df is not None:
+                return df
+            result = func(*args, **kwargs)
+            if isinstance(result, pd.DataFrame) and not result.empty:
+                try:
+                    self.put(func_name, key, result, self.resolve_ttl(func_name, kwargs),
+                             params={'args': _normalize(list(args)), 'kwargs': _normalize(kwargs)})
+                except Exception as e:
+                    self._count('errors')
+                    print(f"[WARNING] 写入 {func_name} 缓存失败: {e}")
+                # 返回副本，调用方原地修改不会影响后续读取
+                return result.copy()
+            return result
+
+        cached_func.__name__ = func_name
+        cached_func.__wrapped__ = func
+        return cached_func
+
+
+class CachedModule:
+    """
+    模块代理：访问的函数自动经过 AkshareCache 包装，其他属性原样返回
+
+    用法:
+        import akshare
+        ak = CachedModule(akshare, cache)
+        ak.index_zh_a_hist(symbol='000300', ...)
+    """
+
+    def __init__(self, module, cache: Optional[AkshareCache]):
+        self._module = module
+        self._cache = cache
+        self._wrapped = {}
+
+    def __getattr__(self, name):
+        attr = getattr(self._module, name)
+        if self._cache is None or not callable(attr) or name.startswith('_'):
+            return attr
+        wrapped = self._wrapped.get(name)
+        if wrapped is None or wrapped.__wrapped__ is not attr:
+            wrapped = self._cache.wrap(name, attr)
+            self._wrapped[name] = wrapped
+        return wrapped
+
+
+# 进程级缓存实例（AKSHARE_CACHE_ENABLED=False 时为 None）
+_default_cache: Optional[AkshareCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_akshare_cache() -> Optional[AkshareCache]:
+    """
+    获取按 config 配置创建的进程级缓存
+
+    Returns:
+        Optional[AkshareCache]: 未启用缓存时返回 None
+    """
+    global _default_cache
+    if not AKSHARE_CACHE_ENABLED:
+        return None
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = AkshareCache(
+                    AKSHARE_CACHE_DIR,
+                    max_bytes=int(AKSHARE_CACHE_MAX_MB * 1024 * 1024),
+                    default_ttl=AKSHARE_CACHE_DEFAULT_TTL
+                )
+    return _default_cache
+
+
+def get_akshare_cache_stats() -> Dict:
+    """
+    获取 AKShare 缓存的命中/未命中等统计信息
+
+    Returns:
+        Dict: 见 AkshareCache.get_stats()，未启用缓存时返回空字典
+    """
+    cache = get_akshare_cache()
+    return cache.get_stats() if cache else {}
@@ -3,16 +3,32 @@
 负责将板块数据存储到MySQL数据库
 """
 import pymysql
-from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 import sys
 import os
+import threading
 import sys as sys_module
 
 # 添加父目录到路径，以便导入config
 sys_module.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from config import DB_HOST, DB_PORT, DB_USER, DB_PASSWORD, DB_NAME
+# 直接运行本文件（python sector/db.py）时没有所属的包，按 sector 包解析下面的相对导入
+if __name__ == '__main__' and not __package__:
+    __package__ = 'sector'
+
+from config import (
+    DB_HOST, DB_PORT, DB_USER, DB_PASSWORD, DB_NAME,
+    DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_POOL_IDLE_TIMEOUT, DB_POOL_PING_INTERVAL,
+    DB_BULK_CHUNK_SIZE, DB_STREAM_CHUNK_SIZE
+)
+
+from .pool import ConnectionPool, get_pool, close_pool
+from .normalize import PRICE_COLUMNS
+from .storage import (
+    DEFAULT_PRICE_QUERY_COLUMNS, MONTH_AGGREGATE_COLUMNS, dedupe_price_rows, month_bounds,
+    month_key_range, is_month_start, to_date, check_stream_args, rows_to_price_chunk
+)
 
 # 设置输出编码为UTF-8（Windows，安全方式）
 if sys.platform == 'win32':
@@ -49,66 +65,222 @@ def get_db_connection():
         raise
 
 
-def init_tables():
+def get_connection_pool() -> ConnectionPool:
     """
-    初始化数据库表结构
-    创建月份表和价格表
+    获取进程级共享的数据库连接池
+    
+    Returns:
+        ConnectionPool: 连接池对象
     """
-    connection = None
-    try:
-        connection = get_db_connection()
+    return get_pool(
+        get_db_connection,
+        max_size=DB_POOL_SIZE,
+        timeout=DB_POOL_TIMEOUT,
+        idle_timeout=DB_POOL_IDLE_TIMEOUT,
+        ping_interval=DB_POOL_PING_INTERVAL
+    )
+
+
+def db_connection():
+    """
+    从连接池借出连接（上下文管理器），退出时自动归还，出错时自动回滚
+    
+    用法:
+        with db_connection() as connection:
+            with connection.cursor() as cursor:
+                ...
+    """
+    return get_connection_pool().connection()
+
+
+def get_pool_stats() -> Dict:
+    """
+    获取连接池统计信息（借出次数、等待时间、重连次数等）
+    
+    Returns:
+        Dict: 统计信息，见 ConnectionPool.get_stats()
+    """
+    return get_connection_pool().get_stats()
+
+
+def close_db_pool():
+    """关闭连接池（进程退出前调用）"""
+    close_pool()
+
+
+# 按 (代码, 年, 月) 分组计算月份聚合，首尾收盘价通过 GROUP_CONCAT 按日期排序后取第一个
+_MONTH_AGGREGATE_SELECT = """
+SELECT symbol, YEAR(trade_date) AS year, MONTH(trade_date) AS month,
+       MIN(trade_date) AS first_date,
+       MAX(trade_date) AS last_date,
+       CAST(SUBSTRING_INDEX(GROUP_CONCAT(close_price ORDER BY trade_date ASC), ',', 1) AS DECIMAL(15, 2)) AS first_close,
+       CAST(SUBSTRING_INDEX(GROUP_CONCAT(close_price ORDER BY trade_date DESC), ',', 1) AS DECIMAL(15, 2)) AS last_close,
+       MIN(close_price) AS min_close,
+       MAX(close_price) AS max_close,
+       SUM(volume) AS volume_sum,
+       COUNT(*) AS bar_count
+FROM sector_prices
+{where}
+GROUP BY symbol, YEAR(trade_date), MONTH(trade_date)
+"""
+
+# 没有价格数据的月份聚合为空、bar_count 为 0；updated_at 保持不变（只在保存月份记录时更新）
+_MONTH_AGGREGATE_ASSIGN = """
+m.first_date = a.first_date,
+m.last_date = a.last_date,
+m.first_close = a.first_close,
+m.last_close = a.last_close,
+m.min_close = a.min_close,
+m.max_close = a.max_close,
+m.volume_sum = a.volume_sum,
+m.bar_count = COALESCE(a.bar_count, 0),
+m.updated_at = m.updated_at
+"""
+
+# 数据库表结构迁移：(版本号, 说明, SQL 语句列表)，按版本号顺序执行，已执行的版本记录在 schema_version 表中
+# 修改表结构（新增索引、列等）时在末尾追加新版本，不要修改已发布的版本
+SCHEMA_MIGRATIONS = [
+    (1, '创建月份表和价格表', [
+        """
+        CREATE TABLE IF NOT EXISTS sector_months (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            symbol VARCHAR(50) NOT NULL COMMENT '板块/指数代码',
+            symbol_title VARCHAR(100) COMMENT '板块/指数完整名称',
+            symbol_type VARCHAR(20) NOT NULL COMMENT '类型: index(指数) 或 sector(板块)',
+            year INT NOT NULL COMMENT '年份',
+            month INT NOT NULL COMMENT '月份 (1-12)',
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
+            UNIQUE KEY uk_symbol_year_month (symbol, year, month),
+            INDEX idx_symbol (symbol),
+            INDEX idx_year_month (year, month)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='板块月份表';
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS sector_prices (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            symbol VARCHAR(50) NOT NULL COMMENT '板块/指数代码',
+            symbol_title VARCHAR(100) COMMENT '板块/指数完整名称',
+            trade_date DATE NOT NULL COMMENT '交易日期',
+            open_price DECIMAL(15, 2) COMMENT '开盘价',
+            high_price DECIMAL(15, 2) COMMENT '最高价',
+            low_price DECIMAL(15, 2) COMMENT '最低价',
+            close_price DECIMAL(15, 2) NOT NULL COMMENT '收盘价',
+            volume BIGINT COMMENT '成交量',
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
+            UNIQUE KEY uk_symbol_date (symbol, trade_date),
+            INDEX idx_symbol (symbol),
+            INDEX idx_trade_date (trade_date),
+            INDEX idx_symbol_date (symbol, trade_date)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='板块价格表';
+        """,
+    ]),
+    (2, '月份表增加价格聚合列', [
+        """
+        ALTER TABLE sector_months
+            ADD COLUMN first_date DATE NULL COMMENT '当月第一个交易日',
+            ADD COLUMN last_date DATE NULL COMMENT '当月最后一个交易日',
+            ADD COLUMN first_close DECIMAL(15, 2) NULL COMMENT '当月第一个交易日收盘价',
+            ADD COLUMN last_close DECIMAL(15, 2) NULL COMMENT '当月最后一个交易日收盘价',
+            ADD COLUMN min_close DECIMAL(15, 2) NULL COMMENT '当月最低收盘价',
+            ADD COLUMN max_close DECIMAL(15, 2) NULL COMMENT '当月最高收盘价',
+            ADD COLUMN volume_sum BIGINT NULL COMMENT '当月成交量合计',
+            ADD COLUMN bar_count INT NULL COMMENT '当月价格记录数（NULL 表示尚未计算）';
+        """,
+        # 为已有的月份记录计算聚合
+        f"""
+        UPDATE sector_months m
+        LEFT JOIN ({_MONTH_AGGREGATE_SELECT.format(where='')}) a
+        ON a.symbol = m.symbol AND a.year = m.year AND a.month = m.month
+        SET {_MONTH_AGGREGATE_ASSIGN};
+        """,
+    ]),
+]
+
+_REFRESH_MONTH_AGGREGATES_SQL = f"""
+UPDATE sector_months m
+LEFT JOIN ({_MONTH_AGGREGATE_SELECT.format(where='WHERE symbol = %s AND trade_date >= %s AND trade_date < %s')}) a
+ON a.symbol = m.symbol AND a.year = m.year AND a.month = m.month
+SET {_MONTH_AGGREGATE_ASSIGN}
+WHERE m.symbol = %s AND m.year * 100 + m.month BETWEEN %s AND %s
+"""
+
+_CREATE_SCHEMA_VERSION_SQL = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INT PRIMARY KEY COMMENT '迁移版本号',
+    description VARCHAR(200) COMMENT '迁移说明',
+    applied_at DATETIME DEFAULT CURRENT_TIMESTAMP COMMENT '执行时间'
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='表结构版本表';
+"""
+
+# 重复列名的错误码
+_ER_DUP_FIELDNAME = 1060
+
+# 本进程是否已完成表结构迁移
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+
+def migrate_schema() -> int:
+    """
+    执行尚未执行的表结构迁移（SCHEMA_MIGRATIONS）
+    
+    Returns:
+        int: 迁移后的表结构版本号
+    """
+    with db_connection() as connection:
         with connection.cursor() as cursor:
-            # 创建月份表
-            create_month_table_sql = """
-            CREATE TABLE IF NOT EXISTS sector_months (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                symbol VARCHAR(50) NOT NULL COMMENT '板块/指数代码',
-                symbol_title VARCHAR(100) COMMENT '板块/指数完整名称',
-                symbol_type VARCHAR(20) NOT NULL COMMENT '类型: index(指数) 或 sector(板块)',
-                year INT NOT NULL COMMENT '年份',
-                month INT NOT NULL COMMENT '月份 (1-12)',
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
-                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
-                UNIQUE KEY uk_symbol_year_month (symbol, year, month),
-                INDEX idx_symbol (symbol),
-                INDEX idx_year_month (year, month)
-            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='板块月份表';
-            """
-            cursor.execute(create_month_table_sql)
+            cursor.execute(_CREATE_SCHEMA_VERSION_SQL)
+            cursor.execute("SELECT COALESCE(MAX(version), 0) as version FROM schema_version")
+            current = int(cursor.fetchone()['version'])
             
-            # 创建价格表
-            create_price_table_sql = """
-            CREATE TABLE IF NOT EXISTS sector_prices (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                symbol VARCHAR(50) NOT NULL COMMENT '板块/指数代码',
-                symbol_title VARCHAR(100) COMMENT '板块/指数完整名称',
-                trade_date DATE NOT NULL COMMENT '交易日期',
-                open_price DECIMAL(15, 2) COMMENT '开盘价',
-                high_price DECIMAL(15, 2) COMMENT '最高价',
-                low_price DECIMAL(15, 2) COMMENT '最低价',
-                close_price DECIMAL(15, 2) NOT NULL COMMENT '收盘价',
-                volume BIGINT COMMENT '成交量',
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
-                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
-                UNIQUE KEY uk_symbol_date (symbol, trade_date),
-                INDEX idx_symbol (symbol),
-                INDEX idx_trade_date (trade_date),
-                INDEX idx_symbol_date (symbol, trade_date)
-            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='板块价格表';
-            """
-            cursor.execute(create_price_table_sql)
+            for version, description, statements in SCHEMA_MIGRATIONS:
+                if version <= current:
+                    continue
+                for statement in statements:
+                    try:
+                        cursor.execute(statement)
+                    except pymysql.MySQLError as e:
+                        # 其他进程已执行同一迁移的 ADD COLUMN（MySQL 不支持 ADD COLUMN IF NOT EXISTS）
+                        if e.args and e.args[0] == _ER_DUP_FIELDNAME:
+                            continue
+                        raise
+                # MySQL 的 DDL 会隐式提交，多个进程同时迁移时依赖 IF NOT EXISTS 保证幂等
+                cursor.execute(
+                    "INSERT IGNORE INTO schema_version (version, description) VALUES (%s, %s)",
+                    (version, description)
+                )
+                connection.commit()
+                current = version
+                print(f"[OK] 已执行数据库迁移 v{version}: {description}")
             
             connection.commit()
-            print("[OK] 数据库表初始化成功")
-            
-    except Exception as e:
-        print(f"[ERROR] 数据库表初始化失败: {e}")
-        if connection:
-            connection.rollback()
-        raise
-    finally:
-        if connection:
-            connection.close()
+            return current
+
+
+def init_tables(force: bool = False):
+    """
+    初始化数据库表结构（执行尚未执行的迁移）
+    
+    每个进程只执行一次，之后的调用直接返回，不再发出 DDL
+    
+    Args:
+        force: 为 True 时忽略本进程的执行记录，重新检查迁移
+    """
+    global _schema_ready
+    if _schema_ready and not force:
+        return
+    with _schema_lock:
+        if _schema_ready and not force:
+            return
+        try:
+            version = migrate_schema()
+            _schema_ready = True
+            print(f"[OK] 数据库表初始化成功（表结构版本 v{version}）")
+        except Exception as e:
+            print(f"[ERROR] 数据库表初始化失败: {e}")
+            raise
 
 
 def check_month_data_exists(symbol: str, year: int, month: int) -> bool:
@@ -123,29 +295,138 @@ def check_month_data_exists(symbol: str, year: int, month: int) -> bool:
     Returns:
         bool: 如果数据存在返回 True，否则返回 False
     """
-    connection = None
     try:
-        connection = get_db_connection()
-        with connection.cursor() as cursor:
-            sql = """
-            SELECT COUNT(*) as count 
-            FROM sector_months 
-            WHERE symbol = %s AND year = %s AND month = %s
-            """
-            cursor.execute(sql, (symbol, year, month))
-            result = cursor.fetchone()
-            return result['count'] > 0
+        with db_connection() as connection:
+            with connection.cursor() as cursor:
+                sql = """
+                SELECT COUNT(*) as count 
+                FROM sector_months 
+                WHERE symbol = %s AND year = %s AND month = %s
+                """
+                cursor.execute(sql, (symbol, year, month))
+                result = cursor.fetchone()
+                return result['count'] > 0
     except Exception as e:
         print(f"[WARNING] 检查月份数据失败: {e}")
         return False
-    finally:
-        if connection:
-            connection.close()
+
+
+def get_month_coverage(
+    symbol: str,
+    start_date,
+    end_date,
+    require_month_record: bool = True
+) -> Dict[Tuple[int, int], int]:
+    """
+    一次分组查询获取指定日期区间内每个月已存储的价格记录数
+    
+    区间两端都是月初且 require_month_record 为 True 时直接使用月份记录中的聚合（bar_count）
+    
+    Args:
+        symbol: 板块/指数代码
+        start_date: 起始日期（含），'YYYY-MM-DD' 或 date
+        end_date: 结束日期（不含），'YYYY-MM-DD' 或 date
+        require_month_record: 为 True 时只统计 sector_months 中有月份记录的月份
+            （与 check_month_data_exists + get_month_prices_from_db 的判断一致）
+    
+    Returns:
+        Dict[Tuple[int, int], int]: {(年份, 月份): 记录数}，没有数据的月份不出现在结果中
+    """
+    if require_month_record and is_month_start(start_date) and is_month_start(end_date):
+        # 区间按月对齐时直接读取月份记录中的 bar_count，有尚未计算聚合的月份时回退到分组查询
+        aggregates = get_month_aggregates(symbol, start_date, end_date, include_pending=True)
+        if aggregates is not None:
+            return {ym: agg['bar_count'] for ym, agg in aggregates.items() if agg['bar_count']}
+    
+    try:
+        with db_connection() as connection:
+            with connection.cursor() as cursor:
+                sql = """
+                SELECT YEAR(trade_date) as year, MONTH(trade_date) as month, COUNT(*) as count
+                FROM sector_prices
+                WHERE symbol = %s
+                AND trade_date >= %s
+                AND trade_date < %s
+                GROUP BY YEAR(trade_date), MONTH(trade_date)
+                """
+                params = [symbol, start_date, end_date]
+                if require_month_record:
+                    sql = f"""
+                    SELECT c.year, c.month, c.count
+                    FROM ({sql}) c
+                    JOIN sector_months m
+                    ON m.symbol = %s AND m.year = c.year AND m.month = c.month
+                    """
+                    params.append(symbol)
+                cursor.execute(sql, params)
+                return {(int(row['year']), int(row['month'])): int(row['count']) for row in cursor.fetchall()}
+    except Exception as e:
+        print(f"[WARNING] 获取 {symbol} 月份覆盖情况失败: {e}")
+        return {}
+
+
+def get_month_aggregates(symbol: str, start_date, end_date, include_pending: bool = False):
+    """
+    获取日期区间 [start_date, end_date) 覆盖的月份的聚合
+    
+    Args:
+        symbol: 板块/指数代码
+        start_date: 起始日期（含），'YYYY-MM-DD' 或 date
+        end_date: 结束日期（不含），'YYYY-MM-DD' 或 date
+        include_pending: 为 True 时如果有尚未计算聚合的月份（v2 迁移前写入且迁移后未更新）返回 None
+    
+    Returns:
+        Dict[Tuple[int, int], Dict]: {(年份, 月份): {MONTH_AGGREGATE_COLUMNS 对应的值}}，
+            价格为 float；默认跳过尚未计算聚合的月份
+    """
+    first, last = month_key_range(start_date, end_date)
+    try:
+        with db_connection() as connection:
+            with connection.cursor() as cursor:
+                sql = f"""
+                SELECT year, month, {', '.join(MONTH_AGGREGATE_COLUMNS)}
+                FROM sector_months
+                WHERE symbol = %s AND year * 100 + month BETWEEN %s AND %s
+                ORDER BY year, month
+                """
+                cursor.execute(sql, (symbol, first, last))
+                rows = cursor.fetchall()
+    except Exception as e:
+        print(f"[WARNING] 获取 {symbol} 月份聚合失败: {e}")
+        return None if include_pending else {}
+    
+    result = {}
+    for row in rows:
+        if row['bar_count'] is None:
+            if include_pending:
+                return None
+            continue
+        result[(int(row['year']), int(row['month']))] = {
+            col: (float(row[col]) if col.endswith('_close') and row[col] is not None else row[col])
+            for col in MONTH_AGGREGATE_COLUMNS
+        }
+    return result
+
+
+def _refresh_month_aggregates(cursor, symbol: str, start_date, end_date):
+    """
+    重新计算 [start_date, end_date) 覆盖的月份的聚合（只更新已有的月份记录，调用方负责提交）
+    
+    Args:
+        cursor: 数据库游标
+        symbol: 板块/指数代码
+        start_date: 起始日期（含）
+        end_date: 结束日期（不含）
+    """
+    first, last = month_key_range(start_date, end_date)
+    start, _ = month_bounds(first // 100, first % 100)
+    _, end = month_bounds(last // 100, last % 100)
+    cursor.execute(_REFRESH_MONTH_AGGREGATES_SQL, (symbol, start, end, symbol, first, last))
 
 
 def save_month_record(symbol: str, symbol_title: str, symbol_type: str, year: int, month: int) -> bool:
     """
-    保存月份记录
+    保存月份记录（同时计算该月的价格聚合）
     
     Args:
         symbol: 板块/指数代码
@@ -157,28 +438,23 @@ def save_month_record(symbol: str, symbol_title: str, symbol_type: str, year: in
     Returns:
         bool: 保存成功返回 True
     """
-    connection = None
     try:
-        connection = get_db_connection()
-        with connection.cursor() as cursor:
-            sql = """
-            INSERT INTO sector_months (symbol, symbol_title, symbol_type, year, month)
-            VALUES (%s, %s, %s, %s, %s)
-            ON DUPLICATE KEY UPDATE 
-                symbol_title = VALUES(symbol_title),
-                updated_at = CURRENT_TIMESTAMP
-            """
-            cursor.execute(sql, (symbol, symbol_title, symbol_type, year, month))
-            connection.commit()
-            return True
+        with db_connection() as connection:
+            with connection.cursor() as cursor:
+                sql = """
+                INSERT INTO sector_months (symbol, symbol_title, symbol_type, year, month)
+                VALUES (%s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE 
+                    symbol_title = VALUES(symbol_title),
+                    updated_at = CURRENT_TIMESTAMP
+                """
+                cursor.execute(sql, (symbol, symbol_title, symbol_type, year, month))
+                _refresh_month_aggregates(cursor, symbol, *month_bounds(year, month))
+                connection.commit()
+                return True
     except Exception as e:
         print(f"[ERROR] 保存月份记录失败: {e}")
-        if connection:
-            connection.rollback()
         return False
-    finally:
-        if connection:
-            connection.close()
 
 
 def save_price_data(
@@ -206,46 +482,176 @@ def save_price_data(
     Returns:
         bool: 保存成功返回 True
     """
-    connection = None
     try:
-        connection = get_db_connection()
-        with connection.cursor() as cursor:
-            sql = """
-            INSERT INTO sector_prices 
-            (symbol, symbol_title, trade_date, open_price, high_price, low_price, close_price, volume)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            ON DUPLICATE KEY UPDATE
-                symbol_title = VALUES(symbol_title),
-                open_price = VALUES(open_price),
-                high_price = VALUES(high_price),
-                low_price = VALUES(low_price),
-                close_price = VALUES(close_price),
-                volume = VALUES(volume),
-                updated_at = CURRENT_TIMESTAMP
-            """
-            cursor.execute(sql, (
-                symbol,
-                symbol_title if symbol_title else symbol,  # 如果没有提供，使用symbol作为默认值
-                trade_date,
-                open_price,
-                high_price,
-                low_price,
-                close_price,
-                volume
-            ))
-            connection.commit()
-            return True
+        with db_connection() as connection:
+            with connection.cursor() as cursor:
+                sql = """
+                INSERT INTO sector_prices 
+                (symbol, symbol_title, trade_date, open_price, high_price, low_price, close_price, volume)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    symbol_title = VALUES(symbol_title),
+                    open_price = VALUES(open_price),
+                    high_price = VALUES(high_price),
+                    low_price = VALUES(low_price),
+                    close_price = VALUES(close_price),
+                    volume = VALUES(volume),
+                    updated_at = CURRENT_TIMESTAMP
+                """
+                cursor.execute(sql, (
+                    symbol,
+                    symbol_title if symbol_title else symbol,  # 如果没有提供，使用symbol作为默认值
+                    trade_date,
+                    open_price,
+                    high_price,
+                    low_price,
+                    close_price,
+                    volume
+                ))
+                connection.commit()
+                return True
     except Exception as e:
         print(f"[ERROR] 保存价格数据失败: {e}")
-        if connection:
-            connection.rollback()
         return False
-    finally:
-        if connection:
-            connection.close()
 
 
-def save_price_batch(price_data_list: List[Dict]) -> int:
+_UPSERT_PRICE_SQL = """
+INSERT INTO sector_prices 
+(symbol, symbol_title, trade_date, open_price, high_price, low_price, close_price, volume)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE
+    symbol_title = VALUES(symbol_title),
+    open_price = VALUES(open_price),
+    high_price = VALUES(high_price),
+    low_price = VALUES(low_price),
+    close_price = VALUES(close_price),
+    volume = VALUES(volume),
+    updated_at = CURRENT_TIMESTAMP
+"""
+
+
+def _date_span_by_symbol(rows: List[Tuple]) -> Dict[str, Tuple[date, date]]:
+    """每个代码的最早、最晚交易日期"""
+    spans = {}
+    for row in rows:
+        trade_date = to_date(row[2])
+        first, last = spans.get(row[0], (trade_date, trade_date))
+        spans[row[0]] = (min(first, trade_date), max(last, trade_date))
+    return spans
+
+
+def _existing_price_keys(cursor, chunk: List[Tuple]) -> set:
+    """
+    本批数据中数据库已存在的 (代码, 交易日期)，用于精确统计新增和更新的记录数
+
+    ON DUPLICATE KEY UPDATE 的影响行数无法区分新增和值未变化的已有记录，因此写入前先查询；
+    每个代码一次按日期范围的查询，走 (symbol, trade_date) 唯一索引
+    """
+    existing = set()
+    for symbol, (first, last) in _date_span_by_symbol(chunk).items():
+        cursor.execute(
+            "SELECT trade_date FROM sector_prices WHERE symbol = %s AND trade_date BETWEEN %s AND %s",
+            (symbol, first, last)
+        )
+        existing.update((symbol, to_date(row['trade_date'])) for row in cursor.fetchall())
+    return existing
+
+
+def bulk_upsert_prices(price_data_list: List, chunk_size: Optional[int] = None) -> Dict:
+    """
+    分批批量写入价格数据（INSERT ... ON DUPLICATE KEY UPDATE）
+    
+    每批使用 executemany 合并为一条多行 VALUES 语句并单独提交，写入前按日期范围查询已存在的记录，
+    精确统计新增和更新数；某一批失败时回滚该批并改为逐条写入，其余批次不受影响。
+    全部写入后更新涉及月份的月份聚合。
+    
+    Args:
+        price_data_list: 价格数据列表，元素为字典（键同 PRICE_COLUMNS）或按 PRICE_COLUMNS 排列的元组
+        chunk_size: 每批行数，默认使用 DB_BULK_CHUNK_SIZE
+    
+    Returns:
+        Dict: 写入结果
+            {
+                'total': int,          # 去重后的记录数
+                'inserted': int,       # 新增记录数
+                'updated': int,        # 更新记录数
+                'failed': int,         # 写入失败的记录数
+                'chunks': int,         # 批次数
+                'failed_chunks': list  # 失败批次详情: {'index', 'rows', 'error', 'failed_rows'}
+            }
+    """
+    rows = dedupe_price_rows(price_data_list)
+    result = {
+        'total': len(rows),
+        'inserted': 0,
+        'updated': 0,
+        'failed': 0,
+        'chunks': 0,
+        'failed_chunks': []
+    }
+    if not rows:
+        return result
+    
+    chunk_size = chunk_size or DB_BULK_CHUNK_SIZE
+    try:
+        with db_connection() as connection:
+            with connection.cursor() as cursor:
+                for index, start in enumerate(range(0, len(rows), chunk_size)):
+                    chunk = rows[start:start + chunk_size]
+                    result['chunks'] += 1
+                    try:
+                        existing = _existing_price_keys(cursor, chunk)
+                        cursor.executemany(_UPSERT_PRICE_SQL, chunk)
+                        connection.commit()
+                        updated = sum(1 for row in chunk if (row[0], to_date(row[2])) in existing)
+                        result['inserted'] += len(chunk) - updated
+                        result['updated'] += updated
+                        continue
+                    except Exception as e:
+                        connection.rollback()
+                        print(f"[WARNING] 第 {index + 1} 批价格数据写入失败（{len(chunk)} 条），改为逐条写入: {e}")
+                        chunk_report = {
+                            'index': index,
+                            'rows': len(chunk),
+                            'error': str(e),
+                            'failed_rows': []
+                        }
+                    
+                    # 逐条写入失败的批次：单行 upsert 的影响行数 1 表示新增，2（值有变化）/0（值未变化）表示更新
+                    for row in chunk:
+                        try:
+                            affected = cursor.execute(_UPSERT_PRICE_SQL, row)
+                            if affected == 1:
+                                result['inserted'] += 1
+                            else:
+                                result['updated'] += 1
+                        except Exception as e:
+                            result['failed'] += 1
+                            chunk_report['failed_rows'].append({
+                                'symbol': row[0],
+                                'trade_date': str(row[2]),
+                                'error': str(e)
+                            })
+                            print(f"[WARNING] 保存单条价格数据失败: {e}, 数据: {row}")
+                    connection.commit()
+                    result['failed_chunks'].append(chunk_report)
+                
+                # 更新写入涉及的已有月份记录的聚合（尚无月份记录的月份在保存月份记录时计算）
+                try:
+                    for symbol, (first, last) in _date_span_by_symbol(rows).items():
+                        _refresh_month_aggregates(cursor, symbol, first, last + timedelta(days=1))
+                    connection.commit()
+                except Exception as e:
+                    connection.rollback()
+                    print(f"[WARNING] 更新月份聚合失败: {e}")
+    except Exception as e:
+        print(f"[ERROR] 批量保存价格数据失败: {e}")
+        result['failed'] = result['total'] - result['inserted'] - result['updated']
+    
+    return result
+
+
+def save_price_batch(price_data_list: List[Dict], chunk_size: Optional[int] = None) -> int:
     """
     批量保存价格数据
     
@@ -253,6 +659,7 @@ def save_price_batch(price_data_list: List[Dict]) -> int:
         price_data_list: 价格数据列表，每个元素包含:
             {
                 'symbol': str,
+                'symbol_title': str,
                 'trade_date': str,
                 'open_price': float,
                 'high_price': float,
@@ -260,59 +667,19 @@ def save_price_batch(price_data_list: List[Dict]) -> int:
                 'close_price': float,
                 'volume': int
             }
+            也可以是按 PRICE_COLUMNS 排列的元组
+        chunk_size: 每批行数，默认使用 DB_BULK_CHUNK_SIZE
     
     Returns:
-        int: 成功保存的记录数
+        int: 成功保存的记录数（新增 + 更新）
     """
     if not price_data_list:
         return 0
     
-    connection = None
-    success_count = 0
-    try:
-        connection = get_db_connection()
-        with connection.cursor() as cursor:
-            sql = """
-            INSERT INTO sector_prices 
-            (symbol, symbol_title, trade_date, open_price, high_price, low_price, close_price, volume)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            ON DUPLICATE KEY UPDATE
-                symbol_title = VALUES(symbol_title),
-                open_price = VALUES(open_price),
-                high_price = VALUES(high_price),
-                low_price = VALUES(low_price),
-                close_price = VALUES(close_price),
-                volume = VALUES(volume),
-                updated_at = CURRENT_TIMESTAMP
-            """
-            
-            for data in price_data_list:
-                try:
-                    cursor.execute(sql, (
-                        data.get('symbol'),
-                        data.get('symbol_title'),
-                        data.get('trade_date'),
-                        data.get('open_price'),
-                        data.get('high_price'),
-                        data.get('low_price'),
-                        data.get('close_price'),
-                        data.get('volume')
-                    ))
-                    success_count += 1
-                except Exception as e:
-                    print(f"[WARNING] 保存单条价格数据失败: {e}, 数据: {data}")
-            
-            connection.commit()
-            print(f"[OK] 批量保存价格数据: 成功 {success_count}/{len(price_data_list)} 条")
-            
-    except Exception as e:
-        print(f"[ERROR] 批量保存价格数据失败: {e}")
-        if connection:
-            connection.rollback()
-    finally:
-        if connection:
-            connection.close()
-    
+    report = bulk_upsert_prices(price_data_list, chunk_size)
+    success_count = report['inserted'] + report['updated']
+    print(f"[OK] 批量保存价格数据: 成功 {success_count}/{report['total']} 条"
+          f"（新增 {report['inserted']}，更新 {report['updated']}，失败 {report['failed']}，共 {report['chunks']} 批）")
     return success_count
 
 
@@ -330,6 +697,55 @@ def get_current_month_prices_from_db(symbol: str) -> List[Dict]:
     return get_month_prices_from_db(symbol, now.year, now.month)
 
 
+_PRICE_QUERY_COLUMNS = set(PRICE_COLUMNS) | {'created_at', 'updated_at'}
+
+
+def get_prices_range(
+    symbol: str,
+    start=None,
+    end=None,
+    columns: Optional[Sequence[str]] = None
+) -> List[Dict]:
+    """
+    按日期区间读取价格数据
+    
+    条件为 symbol = ? AND trade_date >= start AND trade_date < end，
+    可直接使用 (symbol, trade_date) 复合索引做范围扫描
+    
+    Args:
+        symbol: 板块/指数代码
+        start: 起始日期（含），'YYYY-MM-DD'、date 或 None（不限）
+        end: 结束日期（不含），'YYYY-MM-DD'、date 或 None（不限）
+        columns: 返回的列，默认 DEFAULT_PRICE_QUERY_COLUMNS
+    
+    Returns:
+        List[Dict]: 按 trade_date 升序排列的价格数据列表
+    """
+    columns = tuple(columns) if columns else DEFAULT_PRICE_QUERY_COLUMNS
+    invalid = [col for col in columns if col not in _PRICE_QUERY_COLUMNS]
+    if invalid:
+        raise ValueError(f"不支持的列: {invalid}，支持的列: {sorted(_PRICE_QUERY_COLUMNS)}")
+    
+    sql = f"SELECT {', '.join(columns)} FROM sector_prices WHERE symbol = %s"
+    params = [symbol]
+    if start is not None:
+        sql += " AND trade_date >= %s"
+        params.append(start)
+    if end is not None:
+        sql += " AND trade_date < %s"
+        params.append(end)
+    sql += " ORDER BY trade_date ASC"
+    
+    try:
+        with db_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                return cursor.fetchall()
+    except Exception as e:
+        print(f"[ERROR] 获取 {symbol} 价格数据失败（{start} ~ {end}）: {e}")
+        return []
+
+
 def get_month_prices_from_db(symbol: str, year: int, month: int) -> List[Dict]:
     """
     从数据库获取指定月份的价格数据
@@ -342,27 +758,69 @@ def get_month_prices_from_db(symbol: str, year: int, month: int) -> List[Dict]:
     Returns:
         List[Dict]: 价格数据列表
     """
-    connection = None
+    start, end = month_bounds(year, month)
+    return get_prices_range(symbol, start, end)
+
+
+def iter_prices(
+    symbols: Optional[Sequence[str]] = None,
+    start=None,
+    end=None,
+    columns: Optional[Sequence[str]] = None,
+    chunk_size: Optional[int] = None,
+    output: str = 'numpy'
+) -> Iterator:
+    """
+    流式读取价格数据（服务端游标 SSCursor），按批返回，用于全表导出和跨代码分析
+    
+    结果集不会一次性读入内存，每批只转换 chunk_size 行；按 (symbol, trade_date) 排序，走唯一索引，无需额外排序。
+    使用单独的连接（不占用连接池），迭代结束或提前退出时关闭
+    
+    Args:
+        symbols: 代码列表，None 表示全部
+        start: 起始日期（含），'YYYY-MM-DD'、date 或 None（不限）
+        end: 结束日期（不含），'YYYY-MM-DD'、date 或 None（不限）
+        columns: 返回的列，默认 symbol + DEFAULT_PRICE_QUERY_COLUMNS
+        chunk_size: 每批行数，默认使用 DB_STREAM_CHUNK_SIZE
+        output: 'numpy' 每批为结构化数组，'frame' 每批为 DataFrame
+    
+    Yields:
+        np.ndarray 或 pd.DataFrame: 一批价格数据（列类型见 storage.PRICE_COLUMN_DTYPES）
+    """
+    columns = check_stream_args(columns, output, _PRICE_QUERY_COLUMNS)
+    chunk_size = chunk_size or DB_STREAM_CHUNK_SIZE
+    
+    sql = f"SELECT {', '.join(columns)} FROM sector_prices WHERE 1 = 1"
+    params = []
+    if symbols is not None:
+        symbols = list(symbols)
+        if not symbols:
+            return
+        sql += f" AND symbol IN ({', '.join(['%s'] * len(symbols))})"
+        params.extend(symbols)
+    if start is not None:
+        sql += " AND trade_date >= %s"
+        params.append(start)
+    if end is not None:
+        sql += " AND trade_date < %s"
+        params.append(end)
+    sql += " ORDER BY symbol ASC, trade_date ASC"
+    
+    connection = get_db_connection()
     try:
-        connection = get_db_connection()
-        with connection.cursor() as cursor:
-            sql = """
-            SELECT trade_date, open_price, high_price, low_price, close_price, volume
-            FROM sector_prices
-            WHERE symbol = %s 
-            AND YEAR(trade_date) = %s 
-            AND MONTH(trade_date) = %s
-            ORDER BY trade_date ASC
-            """
-            cursor.execute(sql, (symbol, year, month))
-            results = cursor.fetchall()
-            return results
-    except Exception as e:
-        print(f"[ERROR] 获取 {year}年{month}月价格数据失败: {e}")
-        return []
+        cursor = connection.cursor(pymysql.cursors.SSCursor)
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows_to_price_chunk(rows, columns, output)
     finally:
-        if connection:
+        # 提前退出时不关闭游标（SSCursor 关闭时会读完剩余结果），直接断开连接
+        try:
             connection.close()
+        except Exception:
+            pass
 
 
 def should_fetch_current_month_data(symbol: str) -> bool:
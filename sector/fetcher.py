@@ -2,29 +2,55 @@
 板块数据获取模块 - 使用AKShare获取国内和港股板块的估值、价格数据
 支持获取1月、3月、6月、1年、3年、5年的历史数据
 """
-import akshare as ak
+import akshare
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
-import time
+from typing import Dict, Iterator, List, Optional, Tuple
 import os
 import sys
 import warnings
+from concurrent.futures import ThreadPoolExecutor, as_completed
 warnings.filterwarnings('ignore')
 
-# 导入数据库模块
+# 导入存储模块（按 config 的 STORAGE_BACKEND 选择 MySQL 或本地 Parquet 后端）
 try:
-    from .db import (
+    from .storage import (
+        get_storage,
         init_tables,
         should_fetch_current_month_data,
         save_month_record,
         save_price_batch,
-        get_current_month_prices_from_db
+        get_current_month_prices_from_db,
+        get_month_coverage,
+        get_month_aggregates,
+        month_bounds,
+        bulk_upsert_prices,
+        get_prices_range,
+        failed_price_months
     )
+    get_storage()
     DB_AVAILABLE = True
 except ImportError:
     print("[WARNING] 数据库模块未导入，将跳过数据库存储功能")
     DB_AVAILABLE = False
+except ValueError as e:
+    # STORAGE_BACKEND 配置错误时不影响数据获取
+    print(f"[WARNING] 存储后端配置错误，将跳过数据库存储功能: {e}")
+    DB_AVAILABLE = False
+
+from .cache import CachedModule, get_akshare_cache
+from .ratelimit import RateLimitedModule, get_rate_limiter
+from .routing import get_source_router
+from .normalize import PRICE_COLUMNS, normalize_price_frame, to_price_rows
+from .history import PriceHistory
+from .valuation import ValuationHistory
+from .write_behind import get_write_behind
+
+from config import SECTOR_FETCH_WORKERS, WRITE_BEHIND_ENABLED
+
+# AKShare 接口先查磁盘缓存（AKSHARE_CACHE_ENABLED=False 时跳过），未命中时按接口族限流后请求上游
+ak = CachedModule(RateLimitedModule(akshare, get_rate_limiter()), get_akshare_cache())
 
 # 设置输出编码为UTF-8（Windows，安全方式）
 if sys.platform == 'win32':
@@ -64,7 +90,8 @@ def fetch_data_by_months(
     period: str = None,
     start_month: str = None,
     end_month: str = None,
-    symbol_type: str = 'index'
+    symbol_type: str = 'index',
+    fetch_strategy: str = 'span'
 ) -> Dict:
     """
     按月批量获取数据并存储到数据库
@@ -84,6 +111,9 @@ def fetch_data_by_months(
         start_month: 起始月份，格式 'YYYYMM'（如 '202101'），仅在 mode='range' 时使用
         end_month: 结束月份，格式 'YYYYMM'（如 '202103'），仅在 mode='range' 时使用。如果为None，则到当前月
         symbol_type: 类型，'index' 或 'sector'，默认 'index'
+        fetch_strategy: 上游接口调用方式
+            - 'span': 一次获取所有缺失月份所在的整段区间，按月拆分后一次批量写入（默认）
+            - 'month': 逐月调用上游接口
     
     Returns:
         包含获取结果的字典
@@ -174,29 +204,42 @@ def fetch_data_by_months(
         result['total_months'] = len(months_to_fetch)
         print(f"[INFO] 准备获取 {symbol} ({result['symbol_title']}) 共 {len(months_to_fetch)} 个月的数据")
         
+        if fetch_strategy not in ('span', 'month'):
+            raise ValueError(f"不支持的获取方式: {fetch_strategy}，支持的方式: 'span', 'month'")
+        
+        # 一次查询数据库覆盖情况，预先算出需要获取的月份
+        covered_months, missing_months = _plan_month_backfill(symbol, months_to_fetch)
+        if covered_months:
+            print(f"[INFO] 数据库已有 {len(covered_months)} 个月的数据，需要获取 {len(missing_months)} 个月")
+        
+        # 整段获取：所有缺失月份只调用一次（最多两次）上游接口
+        span_results = {}
+        if fetch_strategy == 'span' and missing_months:
+            span_results = _fetch_months_by_span(symbol, missing_months, symbol_type)
+        
         # 逐月获取数据
         for year, month in months_to_fetch:
             month_str = f"{year}年{month}月"
             try:
-                # 检查该月数据是否已存在
-                if DB_AVAILABLE:
-                    from .db import check_month_data_exists, get_month_prices_from_db
-                    if check_month_data_exists(symbol, year, month):
-                        prices = get_month_prices_from_db(symbol, year, month)
-                        if prices and len(prices) > 0:
-                            print(f"[INFO] {month_str} 数据已存在，跳过（共 {len(prices)} 条记录）")
-                            result['skipped_months'] += 1
-                            result['months_detail'].append({
-                                'year': year,
-                                'month': month,
-                                'status': 'skipped',
-                                'records': len(prices)
-                            })
-                            continue
+                # 该月数据已存在则跳过
+                if (year, month) in covered_months:
+                    records = covered_months[(year, month)]
+                    print(f"[INFO] {month_str} 数据已存在，跳过（共 {records} 条记录）")
+                    result['skipped_months'] += 1
+                    result['months_detail'].append({
+                        'year': year,
+                        'month': month,
+                        'status': 'skipped',
+                        'records': records
+                    })
+                    continue
                 
                 # 获取该月数据
-                print(f"[INFO] 正在获取 {month_str} 的数据...")
-                month_data = _fetch_single_month_data(symbol, year, month, symbol_type)
+                if fetch_strategy == 'span':
+                    month_data = span_results.get((year, month))
+                else:
+                    print(f"[INFO] 正在获取 {month_str} 的数据...")
+                    month_data = _fetch_single_month_data(symbol, year, month, symbol_type)
                 
                 if month_data and month_data.get('success'):
                     records = month_data.get('records', 0)
@@ -219,9 +262,6 @@ def fetch_data_by_months(
                         'error': error_msg
                     })
                 
-                # 避免请求过快
-                time.sleep(0.5)
-                
             except Exception as e:
                 print(f"[ERROR] {month_str} 处理失败: {e}")
                 result['failed_months'] += 1
@@ -244,6 +284,134 @@ def fetch_data_by_months(
         return result
 
 
+def _plan_month_backfill(
+    symbol: str,
+    months_to_fetch: List[Tuple[int, int]]
+) -> Tuple[Dict[Tuple[int, int], int], List[Tuple[int, int]]]:
+    """
+    根据数据库已有数据规划回补（内部函数），整个区间只查询一次数据库
+    
+    Args:
+        symbol: 板块/指数代码
+        months_to_fetch: 按时间升序排列的 (年份, 月份) 列表
+    
+    Returns:
+        (已有数据的月份 {(年份, 月份): 记录数}, 需要获取的月份列表)
+    """
+    if not DB_AVAILABLE or not months_to_fetch:
+        return {}, list(months_to_fetch)
+    
+    range_start, _ = month_bounds(*months_to_fetch[0])
+    _, range_end = month_bounds(*months_to_fetch[-1])
+    
+    coverage = get_month_coverage(symbol, range_start, range_end)
+    covered = {ym: coverage[ym] for ym in months_to_fetch if coverage.get(ym, 0) > 0}
+    missing = [ym for ym in months_to_fetch if ym not in covered]
+    return covered, missing
+
+
+def _fetch_price_history(
+    symbol: str,
+    start_date: datetime,
+    end_date: datetime
+) -> Tuple[Optional[pd.DataFrame], Optional[str], Optional[str]]:
+    """
+    获取指定日期区间（含首尾）的日线数据（内部函数），最多调用两次上游接口
+    
+    Args:
+        symbol: 板块/指数代码
+        start_date: 起始日期
+        end_date: 结束日期
+    
+    Returns:
+        (价格数据, 收盘价列名, 错误信息)，价格数据含 '日期' 列并按日期升序排列；失败时价格数据为 None
+    """
+    start_date_str = start_date.strftime('%Y%m%d')
+    end_date_str = end_date.strftime('%Y%m%d')
+    
+    price_df = None
+    
+    # 方法1: 使用 index_zh_a_hist
+    try:
+        price_df = ak.index_zh_a_hist(symbol=symbol, period="daily", start_date=start_date_str, end_date=end_date_str)
+        if not price_df.empty:
+            print(f"[DEBUG] 方法1成功，获取 {len(price_df)} 条记录")
+    except Exception as e:
+        price_df = None
+    
+    # 方法2: 使用 stock_zh_index_daily（需要添加市场前缀，返回全部历史，再截取区间）
+    if price_df is None or price_df.empty:
+        try:
+            if symbol.startswith('000'):
+                symbol_with_prefix = f"sh{symbol}"
+            elif symbol.startswith('399'):
+                symbol_with_prefix = f"sz{symbol}"
+            else:
+                symbol_with_prefix = f"sh{symbol}"
+            
+            price_df = ak.stock_zh_index_daily(symbol=symbol_with_prefix)
+            if not price_df.empty:
+                # 过滤出区间内的数据
+                price_df['日期'] = pd.to_datetime(price_df.get('date', price_df.get('日期', price_df.index)))
+                range_start = pd.Timestamp(start_date.date())
+                range_end = pd.Timestamp(end_date.date()) + pd.Timedelta(days=1)
+                price_df = price_df[(price_df['日期'] >= range_start) & (price_df['日期'] < range_end)]
+                if not price_df.empty:
+                    print(f"[DEBUG] 方法2成功，获取 {len(price_df)} 条记录")
+        except Exception as e:
+            price_df = None
+    
+    if price_df is None or price_df.empty:
+        return None, None, '无法获取数据'
+    
+    # 处理日期列
+    date_col = None
+    for col in price_df.columns:
+        col_str = str(col).lower()
+        if '日期' in col_str or 'date' in col_str:
+            date_col = col
+            break
+    
+    if date_col:
+        price_df[date_col] = pd.to_datetime(price_df[date_col], errors='coerce')
+        if date_col != '日期':
+            price_df.rename(columns={date_col: '日期'}, inplace=True)
+    else:
+        return None, None, '无法识别日期列'
+    
+    price_df = price_df.dropna(subset=['日期'])
+    price_df = price_df.sort_values('日期')
+    
+    # 找到收盘价列
+    close_col = None
+    for col in price_df.columns:
+        col_str = str(col).lower()
+        if '收盘' in col_str or 'close' in col_str:
+            close_col = col
+            break
+    
+    if not close_col:
+        return None, None, '无法识别收盘价列'
+    
+    return price_df, close_col, None
+
+
+def _price_rows_from_frame(symbol: str, price_df: pd.DataFrame, close_col: str) -> List[Tuple]:
+    """
+    将价格数据转换为 save_price_batch 所需的元组列表（内部函数），跳过收盘价为空的行
+    
+    Args:
+        symbol: 板块/指数代码
+        price_df: 含 '日期' 列的价格数据
+        close_col: 收盘价列名
+    
+    Returns:
+        List[Tuple]: 按 PRICE_COLUMNS 排列的价格数据
+    """
+    canonical = normalize_price_frame(price_df, date_col='日期', close_col=close_col)
+    return to_price_rows(symbol, get_symbol_title(symbol), canonical)
+
+
 def _fetch_single_month_data(
     symbol: str,
     year: int,
@@ -282,102 +450,14 @@ def _fetch_single_month_data(
         if end_date > today:
             end_date = today
         
-        start_date_str = start_date.strftime('%Y%m%d')
-        end_date_str = end_date.strftime('%Y%m%d')
-        
-        # 获取数据
-        price_df = None
-        
-        # 方法1: 使用 index_zh_a_hist
-        try:
-            price_df = ak.index_zh_a_hist(symbol=symbol, period="daily", start_date=start_date_str, end_date=end_date_str)
-            if not price_df.empty:
-                print(f"[DEBUG] 方法1成功，获取 {len(price_df)} 条记录")
-        except Exception as e:
-            price_df = None
-        
-        # 方法2: 使用 stock_zh_index_daily（需要添加市场前缀）
-        if price_df is None or price_df.empty:
-            try:
-                if symbol.startswith('000'):
-                    symbol_with_prefix = f"sh{symbol}"
-                elif symbol.startswith('399'):
-                    symbol_with_prefix = f"sz{symbol}"
-                else:
-                    symbol_with_prefix = f"sh{symbol}"
-                
-                price_df = ak.stock_zh_index_daily(symbol=symbol_with_prefix)
-                if not price_df.empty:
-                    # 过滤出该月的数据
-                    price_df['日期'] = pd.to_datetime(price_df.get('date', price_df.get('日期', price_df.index)))
-                    price_df = price_df[
-                        (price_df['日期'].dt.year == year) & 
-                        (price_df['日期'].dt.month == month)
-                    ]
-                    if not price_df.empty:
-                        print(f"[DEBUG] 方法2成功，获取 {len(price_df)} 条记录")
-            except Exception as e:
-                price_df = None
-        
-        if price_df is None or price_df.empty:
-            result['error'] = '无法获取数据'
-            return result
-        
-        # 处理日期列
-        date_col = None
-        for col in price_df.columns:
-            col_str = str(col).lower()
-            if '日期' in col_str or 'date' in col_str:
-                date_col = col
-                break
-        
-        if date_col:
-            price_df[date_col] = pd.to_datetime(price_df[date_col], errors='coerce')
-            if date_col != '日期':
-                price_df.rename(columns={date_col: '日期'}, inplace=True)
-        else:
-            result['error'] = '无法识别日期列'
-            return result
-        
-        price_df = price_df.dropna(subset=['日期'])
-        price_df = price_df.sort_values('日期')
-        
-        # 找到收盘价列
-        close_col = None
-        for col in price_df.columns:
-            col_str = str(col).lower()
-            if '收盘' in col_str or 'close' in col_str:
-                close_col = col
-                break
-        
-        if not close_col:
-            result['error'] = '无法识别收盘价列'
+        price_df, close_col, error = _fetch_price_history(symbol, start_date, end_date)
+        if error:
+            result['error'] = error
             return result
         
         # 存储到数据库
         if DB_AVAILABLE:
-            from .db import save_price_batch, save_month_record
-            
-            price_data_list = []
-            for _, row in price_df.iterrows():
-                open_val = row.get('open') if 'open' in row.index else (row.get('开盘') if '开盘' in row.index else None)
-                high_val = row.get('high') if 'high' in row.index else (row.get('最高') if '最高' in row.index else None)
-                low_val = row.get('low') if 'low' in row.index else (row.get('最低') if '最低' in row.index else None)
-                volume_val = row.get('volume') if 'volume' in row.index else (row.get('成交量') if '成交量' in row.index else None)
-                
-                symbol_title = get_symbol_title(symbol)
-                price_data = {
-                    'symbol': symbol,
-                    'symbol_title': symbol_title,
-                    'trade_date': row['日期'].strftime('%Y-%m-%d'),
-                    'open_price': float(open_val) if pd.notna(open_val) else None,
-                    'high_price': float(high_val) if pd.notna(high_val) else None,
-                    'low_price': float(low_val) if pd.notna(low_val) else None,
-                    'close_price': float(row[close_col]) if pd.notna(row[close_col]) else None,
-                    'volume': int(volume_val) if pd.notna(volume_val) else None,
-                }
-                if price_data['close_price'] is not None:
-                    price_data_list.append(price_data)
+            price_data_list = _price_rows_from_frame(symbol, price_df, close_col)
             
             if price_data_list:
                 saved_count = save_price_batch(price_data_list)
@@ -398,6 +478,129 @@ def _fetch_single_month_data(
         return result
 
 
+def _fetch_months_by_span(
+    symbol: str,
+    months: List[Tuple[int, int]],
+    symbol_type: str = 'index'
+) -> Dict[Tuple[int, int], Dict]:
+    """
+    一次获取多个月份所在的整段区间数据，在内存中按月拆分后一次批量写入（内部函数）
+    
+    Args:
+        symbol: 板块/指数代码
+        months: 按时间升序排列的 (年份, 月份) 列表
+        symbol_type: 类型
+    
+    Returns:
+        {(年份, 月份): 与 _fetch_single_month_data 相同格式的结果字典}
+    """
+    results = {ym: {'success': False, 'records': 0, 'error': None} for ym in months}
+    if not months:
+        return results
+    
+    first_year, first_month = months[0]
+    last_year, last_month = months[-1]
+    span_start = datetime(first_year, first_month, 1)
+    if last_month == 12:
+        span_end = datetime(last_year + 1, 1, 1) - timedelta(days=1)
+    else:
+        span_end = datetime(last_year, last_month + 1, 1) - timedelta(days=1)
+    today = datetime.now()
+    if span_end > today:
+        span_end = today
+    
+    print(f"[INFO] 一次获取 {span_start.strftime('%Y-%m-%d')} ~ {span_end.strftime('%Y-%m-%d')} 的数据（{len(months)} 个月）")
+    try:
+        price_df, close_col, error = _fetch_price_history(symbol, span_start, span_end)
+    except Exception as e:
+        price_df, close_col, error = None, None, str(e)
+    
+    if error:
+        for month_result in results.values():
+            month_result['error'] = error
+        return results
+    
+    # 按月拆分，只保留需要获取的月份
+    month_frames = {}
+    for (year, month), group in price_df.groupby([price_df['日期'].dt.year, price_df['日期'].dt.month]):
+        if (year, month) in results:
+            month_frames[(year, month)] = group
+    
+    for ym, result in results.items():
+        if ym not in month_frames:
+            result['error'] = '无法获取数据'
+    
+    if not DB_AVAILABLE:
+        for ym, group in month_frames.items():
+            results[ym]['records'] = len(group)
+            results[ym]['success'] = True
+        return results
+    
+    month_rows = {}
+    for ym, group in month_frames.items():
+        rows = _price_rows_from_frame(symbol, group, close_col)
+        if rows:
+            month_rows[ym] = rows
+        else:
+            results[ym]['error'] = '没有有效数据'
+    
+    if not month_rows:
+        return results
+    
+    all_rows = [row for rows in month_rows.values() for row in rows]
+    report = bulk_upsert_prices(all_rows)
+    saved_total = report['inserted'] + report['updated']
+    print(f"[OK] 批量保存价格数据: 成功 {saved_total}/{report['total']} 条"
+          f"（新增 {report['inserted']}，更新 {report['updated']}，失败 {report['failed']}，共 {report['chunks']} 批）")
+    
+    # 有记录写入失败的月份不写月份记录，下次重新获取（失败无法定位到具体行时所有月份都视为失败）
+    failed_months = failed_price_months(report)
+    
+    symbol_title = get_symbol_title(symbol)
+    for ym, rows in month_rows.items():
+        if failed_months is None or (symbol, ym[0], ym[1]) in failed_months:
+            results[ym]['error'] = '保存到数据库失败'
+            continue
+        save_month_record(symbol, symbol_title, symbol_type, ym[0], ym[1])
+        results[ym]['records'] = len(rows)
+        results[ym]['success'] = True
+    
+    return results
+
+
+def fetch_valuation_history(symbol: str) -> Optional[ValuationHistory]:
+    """
+    获取板块估值历史（PE、PB等），标准化为 ValuationHistory
+    
+    Args:
+        symbol: 板块代码，如 "中证消费"、"中证医药"、"恒生科技" 等
+    
+    Returns:
+        Optional[ValuationHistory]: 估值历史（见 valuation.py），获取失败或数据为空时返回 None
+    """
+    print(f"[INFO] 正在获取 {symbol} 的估值数据...")
+    
+    # 方法1: 使用 index_value_hist_funddb 获取估值历史
+    try:
+        valuation_df = ak.index_value_hist_funddb(symbol=symbol)
+        print(f"[OK] 成功获取 {symbol} 的估值数据，共 {len(valuation_df)} 条记录")
+    except Exception as e:
+        print(f"[WARNING] 方法1失败: {e}，尝试其他方法...")
+        try:
+            valuation_df = ak.tool_trade_date_hist_sina()
+            raise Exception("需要根据实际板块代码调整接口")
+        except Exception as e2:
+            print(f"[ERROR] 无法获取 {symbol} 的估值数据: {e2}")
+            return None
+    
+    if valuation_df.empty:
+        print(f"[WARNING] {symbol} 的估值数据为空")
+        return None
+    
+    # 只标准化一次：识别 PE/PB 列、转为数值并按日期排序
+    return ValuationHistory.from_frame(symbol, valuation_df)
+
+
 def get_sector_valuation_data(
     symbol: str,
     periods: List[str] = ['1m', '3m', '6m', '1y', '3y', '5y']
@@ -405,6 +608,9 @@ def get_sector_valuation_data(
     """
     获取板块估值数据（PE、PB等）的历史分位数
     
+    各周期为最近 月数 × 30 天，一次计算所有周期（见 ValuationHistory.period_stats）；
+    滚动分位数序列使用 fetch_valuation_history(symbol).rolling_percentile('pe', 1095)
+    
     Args:
         symbol: 板块代码，如 "中证消费"、"中证医药"、"恒生科技" 等
         periods: 时间周期列表，默认获取所有周期
@@ -415,110 +621,25 @@ def get_sector_valuation_data(
     result = {}
     
     try:
-        # 获取板块估值历史数据
-        print(f"[INFO] 正在获取 {symbol} 的估值数据...")
-        
-        # 方法1: 使用 index_value_hist_funddb 获取估值历史
-        try:
-            valuation_df = ak.index_value_hist_funddb(symbol=symbol)
-            print(f"[OK] 成功获取 {symbol} 的估值数据，共 {len(valuation_df)} 条记录")
-        except Exception as e:
-            print(f"[WARNING] 方法1失败: {e}，尝试其他方法...")
-            try:
-                valuation_df = ak.tool_trade_date_hist_sina()
-                raise Exception("需要根据实际板块代码调整接口")
-            except Exception as e2:
-                print(f"[ERROR] 无法获取 {symbol} 的估值数据: {e2}")
-                return result
-        
-        if valuation_df.empty:
-            print(f"[WARNING] {symbol} 的估值数据为空")
+        history = fetch_valuation_history(symbol)
+        if history is None:
             return result
         
-        # 确保日期列为datetime类型
-        if '日期' in valuation_df.columns:
-            valuation_df['日期'] = pd.to_datetime(valuation_df['日期'])
-        elif 'date' in valuation_df.columns:
-            valuation_df['date'] = pd.to_datetime(valuation_df['date'])
-            valuation_df.rename(columns={'date': '日期'}, inplace=True)
-        
-        # 按日期排序
-        valuation_df = valuation_df.sort_values('日期')
-        
         # 获取当前日期
         today = datetime.now()
+        cutoffs = {
+            period: today - timedelta(days=TIME_PERIODS[period] * 30)  # 近似计算
+            for period in periods if period in TIME_PERIODS
+        }
         
-        # 计算各周期的数据
-        for period in periods:
-            if period not in TIME_PERIODS:
-                continue
-            
-            months = TIME_PERIODS[period]
-            cutoff_date = today - timedelta(days=months * 30)  # 近似计算
-            
-            # 筛选该周期内的数据
-            period_data = valuation_df[valuation_df['日期'] >= cutoff_date].copy()
-            
-            if period_data.empty:
+        # 计算各周期的数据（一次计算所有周期）
+        period_stats = history.period_stats(cutoffs)
+        for period in cutoffs:
+            if period not in period_stats:
                 print(f"[WARNING] {period} 周期内无数据")
                 continue
-            
-            # 提取PE和PB数据（列名可能不同，需要适配）
-            pe_col = None
-            pb_col = None
-            
-            # 尝试找到PE列
-            for col in valuation_df.columns:
-                col_lower = str(col).lower()
-                if 'pe' in col_lower or '市盈率' in col_lower:
-                    pe_col = col
-                if 'pb' in col_lower or '市净率' in col_lower:
-                    pb_col = col
-            
-            period_result = {
-                'data_points': len(period_data),
-                'start_date': period_data['日期'].min().strftime('%Y-%m-%d'),
-                'end_date': period_data['日期'].max().strftime('%Y-%m-%d'),
-            }
-            
-            # 计算PE统计信息
-            if pe_col and pe_col in period_data.columns:
-                pe_values = pd.to_numeric(period_data[pe_col], errors='coerce').dropna()
-                if not pe_values.empty:
-                    current_pe = pe_values.iloc[-1] if len(pe_values) > 0 else None
-                    min_pe = pe_values.min()
-                    max_pe = pe_values.max()
-                    percentile = (pe_values <= current_pe).sum() / len(pe_values) if current_pe else None
-                    
-                    period_result['pe'] = {
-                        'current': float(current_pe) if current_pe else None,
-                        'min': float(min_pe),
-                        'max': float(max_pe),
-                        'percentile': float(percentile) if percentile else None,
-                        'mean': float(pe_values.mean()),
-                        'median': float(pe_values.median()),
-                    }
-            
-            # 计算PB统计信息
-            if pb_col and pb_col in period_data.columns:
-                pb_values = pd.to_numeric(period_data[pb_col], errors='coerce').dropna()
-                if not pb_values.empty:
-                    current_pb = pb_values.iloc[-1] if len(pb_values) > 0 else None
-                    min_pb = pb_values.min()
-                    max_pb = pb_values.max()
-                    percentile = (pb_values <= current_pb).sum() / len(pb_values) if current_pb else None
-                    
-                    period_result['pb'] = {
-                        'current': float(current_pb) if current_pb else None,
-                        'min': float(min_pb),
-                        'max': float(max_pb),
-                        'percentile': float(percentile) if percentile else None,
-                        'mean': float(pb_values.mean()),
-                        'median': float(pb_values.median()),
-                    }
-            
-            result[period] = period_result
-            print(f"[OK] {period} 周期数据: {len(period_data)} 个数据点")
+            result[period] = period_stats[period]
+            print(f"[OK] {period} 周期数据: {period_stats[period]['data_points']} 个数据点")
         
         return result
         
@@ -531,7 +652,8 @@ def get_sector_valuation_data(
 
 def get_sector_price_data(
     symbol: str,
-    periods: List[str] = ['1m', '3m', '6m', '1y', '3y', '5y']
+    periods: List[str] = ['1m', '3m', '6m', '1y', '3y', '5y'],
+    incremental: bool = False
 ) -> Dict[str, Dict]:
     """
     获取板块价格数据（指数点位、涨跌幅等）
@@ -539,18 +661,102 @@ def get_sector_price_data(
     Args:
         symbol: 板块代码，如 "000300" (沪深300)、"399006" (创业板指) 等
         periods: 时间周期列表
+        incremental: 增量同步模式。数据库已完整覆盖统计区间时，只向上游请求最后一根K线之后的数据，
+            统计基于数据库数据 + 新增数据；否则全量获取并把整个区间写入数据库，供下次增量使用。
+            长周期（1y/3y/5y）的中间月份使用月份聚合（每月一行），不读取日线
     
     Returns:
         包含各周期价格数据的字典
     """
     result = {}
     
+    # 增量模式下长周期（1y/3y/5y）优先使用月份聚合，只读取近期日线
+    period_stats = None
+    if incremental and DB_AVAILABLE:
+        try:
+            period_stats = _period_stats_from_month_aggregates(symbol, periods, datetime.now())
+        except Exception as e:
+            print(f"[WARNING] 使用月份聚合计算 {symbol} 长周期数据失败，改为读取全部日线: {e}")
+    
+    if period_stats is None:
+        history = fetch_price_history(symbol, periods, incremental=incremental)
+        if history is None:
+            return result
+    
+    try:
+        # 计算各周期的数据（一次计算所有周期）
+        if period_stats is None:
+            period_stats = _compute_period_stats(history.dates, history.close, _period_target_dates(periods, datetime.now()))
+        for period, stats in period_stats.items():
+            if 'error' in stats:
+                print(f"[WARNING] {period} {stats['error']}")
+                continue
+            
+            current_price = stats['current_price']
+            start_price = stats['start_price']
+            change_pct = stats['change_pct']
+            start_date = stats['start_date']
+            current_date = stats['end_date']
+            
+            if current_price < 10 and symbol.startswith('00'):
+                print(f"[WARNING] {period} 周期价格异常低 ({current_price:.2f})")
+            
+            if abs(change_pct) > 100 and period in ['1y', '3y', '5y']:
+                print(f"[WARNING] {period} 周期涨跌幅异常 ({change_pct:.2f}%)")
+            
+            period_result = {
+                'current_price': float(current_price),
+                'start_price': float(start_price),
+                'min_price': float(stats['min_price']),
+                'max_price': float(stats['max_price']),
+                'change_pct': float(change_pct),
+                'data_points': stats['data_points'],
+                'start_date': start_date.strftime('%Y-%m-%d'),
+                'end_date': current_date.strftime('%Y-%m-%d'),
+            }
+            
+            result[period] = period_result
+            print(f"[OK] {period} 周期价格数据: 起始 {start_date.strftime('%Y-%m-%d')} ({start_price:.2f}) -> 当前 {current_date.strftime('%Y-%m-%d')} ({current_price:.2f}), 涨跌幅 {change_pct:.2f}%")
+        
+        return result
+        
+    except Exception as e:
+        print(f"[ERROR] 计算 {symbol} 价格统计时出错: {e}")
+        import traceback
+        traceback.print_exc()
+        return result
+
+
+def fetch_price_history(
+    symbol: str,
+    periods: List[str] = ['1m', '3m', '6m', '1y', '3y', '5y'],
+    incremental: bool = False,
+    start: Optional[datetime] = None
+) -> Optional[PriceHistory]:
+    """
+    获取指数日线数据（覆盖 periods 中最长的周期），按需写入数据库
+    
+    Args:
+        symbol: 板块代码，如 "000300" (沪深300)、"399006" (创业板指) 等
+        periods: 时间周期列表，决定获取的时间范围
+        incremental: 增量同步模式，见 get_sector_price_data
+        start: 起始日期，默认按 periods 中最长的周期计算（见 _history_window_start）
+    
+    Returns:
+        Optional[PriceHistory]: 紧凑的日线价格容器（见 history.py），获取失败时返回 None
+    """
     try:
         print(f"[INFO] 正在获取 {symbol} 的价格数据...")
         
         # 检查是否需要获取当前月份数据
         need_fetch = True
-        if DB_AVAILABLE:
+        if DB_AVAILABLE and incremental:
+            try:
+                init_tables()
+            except Exception as e:
+                print(f"[WARNING] 数据库初始化失败，将全量获取数据: {e}")
+                incremental = False
+        elif DB_AVAILABLE:
             try:
                 # 初始化数据库表（如果不存在）
                 init_tables()
@@ -579,83 +785,30 @@ def get_sector_price_data(
             # 继续执行获取逻辑，因为需要历史数据来计算收益率
         
         # 获取指数历史行情数据
-        max_months = max([TIME_PERIODS[p] for p in periods if p in TIME_PERIODS], default=60)
-        days_back = max_months * 30
-        start_date = (datetime.now() - timedelta(days=days_back)).strftime('%Y%m%d')
+        window_start = start or _history_window_start(periods, datetime.now())
+        start_date = window_start.strftime('%Y%m%d')
         end_date = datetime.now().strftime('%Y%m%d')
         
         price_df = None
+        synced = False
         
-        # 方法1: 使用 index_zh_a_hist 接口（最常用）
-        try:
-            print(f"[INFO] 尝试方法1: index_zh_a_hist (日期范围: {start_date} ~ {end_date})")
-            price_df = ak.index_zh_a_hist(symbol=symbol, period="daily", start_date=start_date, end_date=end_date)
-            if not price_df.empty:
-                print(f"[OK] 方法1成功，获取 {len(price_df)} 条记录")
-        except Exception as e:
-            print(f"[WARNING] 方法1失败: {str(e)[:100]}...")
-            price_df = None
-        
-        # 方法2: 使用 stock_zh_index_daily（需要添加市场前缀）
-        if price_df is None or price_df.empty:
-            try:
-                print(f"[INFO] 尝试方法2: stock_zh_index_daily")
-                if symbol.startswith('000'):
-                    symbol_with_prefix = f"sh{symbol}"
-                elif symbol.startswith('399'):
-                    symbol_with_prefix = f"sz{symbol}"
-                elif symbol.startswith('00') and len(symbol) == 6:
-                    symbol_with_prefix = f"sh{symbol}"
-                else:
-                    symbol_with_prefix = f"sh{symbol}"
-                
-                print(f"[DEBUG] 使用市场前缀: {symbol_with_prefix}")
-                price_df = ak.stock_zh_index_daily(symbol=symbol_with_prefix)
-                if not price_df.empty:
-                    print(f"[OK] 方法2成功，获取 {len(price_df)} 条记录")
-            except Exception as e:
-                print(f"[WARNING] 方法2失败: {str(e)[:100]}...")
-                try:
-                    if symbol_with_prefix.startswith('sh'):
-                        symbol_with_prefix = f"sz{symbol}"
-                    else:
-                        symbol_with_prefix = f"sh{symbol}"
-                    print(f"[INFO] 尝试另一个市场: {symbol_with_prefix}")
-                    price_df = ak.stock_zh_index_daily(symbol=symbol_with_prefix)
-                    if not price_df.empty:
-                        print(f"[OK] 方法2（备用市场）成功，获取 {len(price_df)} 条记录")
-                except Exception as e2:
-                    print(f"[WARNING] 备用市场也失败: {str(e2)[:100]}...")
-                    price_df = None
-        
-        # 方法3: 使用 index_zh_a_hist_min_em
-        if price_df is None or price_df.empty:
-            try:
-                print(f"[INFO] 尝试方法3: index_zh_a_hist_min_em")
-                if hasattr(ak, 'index_zh_a_hist_min_em'):
-                    price_df = ak.index_zh_a_hist_min_em(symbol=symbol, period="daily", adjust="")
-                    if not price_df.empty:
-                        print(f"[OK] 方法3成功，获取 {len(price_df)} 条记录")
-            except Exception as e:
-                print(f"[WARNING] 方法3失败: {str(e)[:100]}...")
-                price_df = None
+        # 增量同步：数据库数据 + 最后一根K线之后的新数据
+        if incremental and DB_AVAILABLE:
+            price_df = _sync_price_history_incremental(symbol, window_start)
+            synced = price_df is not None
         
-        # 方法4: 使用实时数据接口
-        if price_df is None or price_df.empty:
-            try:
-                print(f"[INFO] 尝试方法4: 通过实时数据接口")
-                spot_data = ak.stock_zh_index_spot()
-                if spot_data is not None and not spot_data.empty:
-                    price_df = ak.index_zh_a_hist(symbol=symbol, period="daily", start_date="", end_date="")
-                    if not price_df.empty:
-                        print(f"[OK] 方法4成功，获取 {len(price_df)} 条记录")
-            except Exception as e:
-                print(f"[WARNING] 方法4失败: {str(e)[:100]}...")
-                price_df = None
+        # 依次尝试各数据源，优先使用该代码上次成功的方法（见 routing.py）
+        if price_df is None:
+            _, price_df = get_source_router().run('index_price', symbol, [
+                ('index_zh_a_hist', '方法1', lambda: _index_source_hist(symbol, start_date, end_date)),
+                ('stock_zh_index_daily', '方法2', lambda: _index_source_daily(symbol)),
+                ('index_zh_a_hist_min_em', '方法3', lambda: _index_source_hist_min(symbol)),
+                ('stock_zh_index_spot', '方法4', lambda: _index_source_spot(symbol)),
+            ])
         
         if price_df is None or price_df.empty:
             print(f"[ERROR] 所有方法都失败，无法获取 {symbol} 的价格数据")
-            return result
+            return None
         
         # 处理日期列
         date_col = None
@@ -677,7 +830,6 @@ def get_sector_price_data(
         
         price_df = price_df.dropna(subset=['日期'])
         price_df = price_df.sort_values('日期')
-        today = datetime.now()
         
         # 找到收盘价列
         close_col = None
@@ -703,135 +855,516 @@ def get_sector_price_data(
         
         if not close_col:
             print(f"[ERROR] 未找到收盘价列，可用列: {list(price_df.columns)}")
-            return result
+            return None
         
-        # 存储数据到数据库（仅存储当前月份的数据）
-        if DB_AVAILABLE and need_fetch:
+        canonical = normalize_price_frame(price_df, date_col='日期', close_col=close_col, drop_missing_close=False)
+        
+        # 增量模式下全量获取时，把整个区间写入数据库，下次即可增量同步
+        if DB_AVAILABLE and incremental and not synced:
+            try:
+                # 区间起始月份只获取了 window_start 之后的数据，不写该月的月份记录，由按月回补获取整月
+                saved_count, queued = _store_price_rows(symbol, to_price_rows(symbol, get_symbol_title(symbol), canonical),
+                                                        record_from=window_start)
+                if not queued:
+                    print(f"[OK] 已保存 {saved_count} 条价格数据到数据库，下次将增量同步")
+            except Exception as e:
+                print(f"[WARNING] 保存数据到数据库失败: {e}")
+        
+        # 存储数据到数据库（仅存储当前月份的数据）
+        elif DB_AVAILABLE and need_fetch and not incremental:
             try:
                 now = datetime.now()
                 current_year = now.year
                 current_month = now.month
                 
-                current_month_data = price_df[
-                    (price_df['日期'].dt.year == current_year) & 
-                    (price_df['日期'].dt.month == current_month)
-                ].copy()
+                current_month_data = canonical[
+                    (canonical['trade_date'].dt.year == current_year) & 
+                    (canonical['trade_date'].dt.month == current_month)
+                ]
                 
                 if not current_month_data.empty:
-                    price_data_list = []
-                    for _, row in current_month_data.iterrows():
-                        open_val = row.get('open') if 'open' in row.index else (row.get('开盘') if '开盘' in row.index else None)
-                        high_val = row.get('high') if 'high' in row.index else (row.get('最高') if '最高' in row.index else None)
-                        low_val = row.get('low') if 'low' in row.index else (row.get('最低') if '最低' in row.index else None)
-                        volume_val = row.get('volume') if 'volume' in row.index else (row.get('成交量') if '成交量' in row.index else None)
-                        
-                        symbol_title = get_symbol_title(symbol)
-                        price_data = {
-                            'symbol': symbol,
-                            'symbol_title': symbol_title,
-                            'trade_date': row['日期'].strftime('%Y-%m-%d'),
-                            'open_price': float(open_val) if pd.notna(open_val) else None,
-                            'high_price': float(high_val) if pd.notna(high_val) else None,
-                            'low_price': float(low_val) if pd.notna(low_val) else None,
-                            'close_price': float(row[close_col]) if pd.notna(row[close_col]) else None,
-                            'volume': int(volume_val) if pd.notna(volume_val) else None,
-                        }
-                        if price_data['close_price'] is not None:
-                            price_data_list.append(price_data)
+                    price_data_list = to_price_rows(symbol, get_symbol_title(symbol), current_month_data)
                     
                     if price_data_list:
-                        saved_count = save_price_batch(price_data_list)
-                        print(f"[OK] 已保存 {saved_count} 条当前月份价格数据到数据库")
-                        symbol_title = get_symbol_title(symbol)
-                        save_month_record(symbol, symbol_title, 'index', current_year, current_month)
-                        print(f"[OK] 已保存月份记录: {symbol} {current_year}年{current_month}月")
+                        saved_count, queued = _store_price_rows(symbol, price_data_list)
+                        if not queued:
+                            print(f"[OK] 已保存 {saved_count} 条当前月份价格数据到数据库")
                         
             except Exception as e:
                 print(f"[WARNING] 保存数据到数据库失败: {e}")
                 import traceback
                 traceback.print_exc()
         
-        # 计算各周期的数据
-        for period in periods:
-            if period not in TIME_PERIODS:
-                continue
-            
-            months = TIME_PERIODS[period]
-            if period == '1y':
-                target_days = 365
-            elif period == '3y':
-                target_days = 1095
-            elif period == '5y':
-                target_days = 1825
-            else:
-                target_days = months * 30
-            
-            target_date = today - timedelta(days=target_days)
-            period_data = price_df[price_df['日期'] >= target_date].copy()
-            
-            if period_data.empty:
-                print(f"[WARNING] {period} 周期内无价格数据")
-                continue
-            
-            prices = pd.to_numeric(period_data[close_col], errors='coerce').dropna()
-            dates = period_data.loc[prices.index, '日期']
-            
-            if prices.empty or len(prices) < 2:
-                print(f"[WARNING] {period} 周期数据点不足")
-                continue
-            
-            current_price = prices.iloc[-1]
-            current_date = dates.iloc[-1]
-            
-            date_diff = (dates - target_date).abs()
-            closest_idx = date_diff.idxmin()
-            start_price = prices.loc[closest_idx]
-            start_date = dates.loc[closest_idx]
-            
-            if start_date >= current_date:
-                print(f"[WARNING] {period} 周期数据不足")
-                continue
-            
-            if current_price < 10 and symbol.startswith('00'):
-                print(f"[WARNING] {period} 周期价格异常低 ({current_price:.2f})")
-            
-            min_price = prices.min()
-            max_price = prices.max()
-            change_pct = ((current_price - start_price) / start_price * 100) if start_price > 0 else 0
-            
-            if abs(change_pct) > 100 and period in ['1y', '3y', '5y']:
-                print(f"[WARNING] {period} 周期涨跌幅异常 ({change_pct:.2f}%)")
-            
-            period_result = {
-                'current_price': float(current_price),
-                'start_price': float(start_price),
-                'min_price': float(min_price),
-                'max_price': float(max_price),
-                'change_pct': float(change_pct),
-                'data_points': len(period_data),
-                'start_date': start_date.strftime('%Y-%m-%d'),
-                'end_date': current_date.strftime('%Y-%m-%d'),
-            }
-            
-            result[period] = period_result
-            print(f"[OK] {period} 周期价格数据: 起始 {start_date.strftime('%Y-%m-%d')} ({start_price:.2f}) -> 当前 {current_date.strftime('%Y-%m-%d')} ({current_price:.2f}), 涨跌幅 {change_pct:.2f}%")
-        
-        return result
+        return PriceHistory.from_canonical(symbol, canonical)
         
     except Exception as e:
         print(f"[ERROR] 获取 {symbol} 价格数据时出错: {e}")
         import traceback
         traceback.print_exc()
-        return result
+        return None
+
+
+def find_anchor_indices(dates, target_dates) -> np.ndarray:
+    """
+    在按升序排列的日期序列中批量查找各目标日期的锚点位置（二分查找）
+    
+    锚点为第一个不早于目标日期的位置。周期统计只使用目标日期之后的数据，
+    因此锚点即为周期内离目标日期最近的一天
+    
+    Args:
+        dates: 按升序排列的日期（Series、DatetimeIndex、datetime64 数组或日期字符串列表）
+        target_dates: 目标日期列表（datetime、pd.Timestamp 或日期字符串）
+    
+    Returns:
+        np.ndarray: 与 target_dates 一一对应的位置，目标日期晚于所有日期时为 len(dates)
+    
+    示例:
+        >>> find_anchor_indices(['2024-01-02', '2024-01-03', '2024-01-05'], ['2024-01-03', '2024-01-04', '2024-02-01'])
+        array([1, 2, 3])
+    """
+    dates = np.asarray(pd.to_datetime(dates), dtype='datetime64[ns]')
+    targets = np.asarray(pd.to_datetime(list(target_dates)), dtype='datetime64[ns]')
+    return np.searchsorted(dates, targets, side='left')
+
+
+def _index_source_hist(symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+    """价格数据源 方法1: index_zh_a_hist（内部函数）"""
+    print(f"[INFO] 尝试方法1: index_zh_a_hist (日期范围: {start_date} ~ {end_date})")
+    price_df = ak.index_zh_a_hist(symbol=symbol, period="daily", start_date=start_date, end_date=end_date)
+    if price_df is None or price_df.empty:
+        raise Exception("数据为空")
+    print(f"[OK] 方法1成功，获取 {len(price_df)} 条记录")
+    return price_df
+
+
+def _index_source_daily(symbol: str) -> pd.DataFrame:
+    """价格数据源 方法2: stock_zh_index_daily（需要添加市场前缀，失败时尝试另一个市场）（内部函数）"""
+    print(f"[INFO] 尝试方法2: stock_zh_index_daily")
+    if symbol.startswith('000'):
+        symbol_with_prefix = f"sh{symbol}"
+    elif symbol.startswith('399'):
+        symbol_with_prefix = f"sz{symbol}"
+    elif symbol.startswith('00') and len(symbol) == 6:
+        symbol_with_prefix = f"sh{symbol}"
+    else:
+        symbol_with_prefix = f"sh{symbol}"
+    
+    print(f"[DEBUG] 使用市场前缀: {symbol_with_prefix}")
+    label = '方法2'
+    try:
+        price_df = ak.stock_zh_index_daily(symbol=symbol_with_prefix)
+    except Exception as e:
+        print(f"[WARNING] 方法2失败: {str(e)[:100]}...")
+        if symbol_with_prefix.startswith('sh'):
+            symbol_with_prefix = f"sz{symbol}"
+        else:
+            symbol_with_prefix = f"sh{symbol}"
+        print(f"[INFO] 尝试另一个市场: {symbol_with_prefix}")
+        price_df = ak.stock_zh_index_daily(symbol=symbol_with_prefix)
+        label = '方法2（备用市场）'
+    
+    if price_df is None or price_df.empty:
+        raise Exception("数据为空")
+    print(f"[OK] {label}成功，获取 {len(price_df)} 条记录")
+    return price_df
+
+
+def _index_source_hist_min(symbol: str) -> pd.DataFrame:
+    """价格数据源 方法3: index_zh_a_hist_min_em（内部函数）"""
+    print(f"[INFO] 尝试方法3: index_zh_a_hist_min_em")
+    if not hasattr(ak, 'index_zh_a_hist_min_em'):
+        raise Exception("当前 AKShare 版本没有 index_zh_a_hist_min_em 接口")
+    price_df = ak.index_zh_a_hist_min_em(symbol=symbol, period="daily", adjust="")
+    if price_df is None or price_df.empty:
+        raise Exception("数据为空")
+    print(f"[OK] 方法3成功，获取 {len(price_df)} 条记录")
+    return price_df
+
+
+def _index_source_spot(symbol: str) -> pd.DataFrame:
+    """价格数据源 方法4: 通过实时数据接口确认可用后获取全部历史数据（内部函数）"""
+    print(f"[INFO] 尝试方法4: 通过实时数据接口")
+    spot_data = ak.stock_zh_index_spot()
+    if spot_data is None or spot_data.empty:
+        raise Exception("实时行情数据为空")
+    price_df = ak.index_zh_a_hist(symbol=symbol, period="daily", start_date="", end_date="")
+    if price_df is None or price_df.empty:
+        raise Exception("数据为空")
+    print(f"[OK] 方法4成功，获取 {len(price_df)} 条记录")
+    return price_df
+
+
+def _period_target_dates(periods: List[str], today: datetime) -> Dict[str, datetime]:
+    """
+    计算各周期的起始目标日期（内部函数），忽略 TIME_PERIODS 之外的周期
+    
+    Args:
+        periods: 时间周期列表
+        today: 当前时间
+    
+    Returns:
+        Dict[str, datetime]: 周期 -> 目标日期（1y/3y/5y 按 365/1095/1825 天，其余按月数 × 30 天）
+    """
+    targets = {}
+    for period in periods:
+        if period not in TIME_PERIODS:
+            continue
+        
+        months = TIME_PERIODS[period]
+        if period == '1y':
+            target_days = 365
+        elif period == '3y':
+            target_days = 1095
+        elif period == '5y':
+            target_days = 1825
+        else:
+            target_days = months * 30
+        
+        targets[period] = today - timedelta(days=target_days)
+    return targets
+
+
+def _history_window_start(periods: List[str], now: datetime) -> datetime:
+    """
+    日线数据的起始日期（内部函数）：periods 中最长周期的月数 × 30 天之前
+    
+    Args:
+        periods: 时间周期列表
+        now: 当前时间
+    
+    Returns:
+        datetime: 起始日期
+    """
+    max_months = max([TIME_PERIODS[p] for p in periods if p in TIME_PERIODS], default=60)
+    return now - timedelta(days=max_months * 30)
+
+
+def _compute_period_stats(
+    dates: np.ndarray,
+    prices: np.ndarray,
+    targets: Dict[str, datetime],
+    counts: Optional[np.ndarray] = None
+) -> Dict[str, Dict]:
+    """
+    一次计算所有周期的价格统计（内部函数）
+    
+    各周期都是 [目标日期, 最新日期] 的后缀区间：先构建后缀结构（有效价格数、下一个有效价格位置、最小/最大价格），
+    再用 find_anchor_indices() 二分查找各周期的起点，每个周期 O(1) 得出结果
+    
+    Args:
+        dates: 按升序排列的日期数组（不含 NaT）
+        prices: 与 dates 对应的收盘价，缺失为 NaN
+        targets: 周期 -> 目标日期，见 _period_target_dates()
+        counts: 每行代表的K线数，默认每行一根；月份聚合展开的行见 _month_aggregate_rows()
+    
+    Returns:
+        Dict[str, Dict]: 周期 -> current_price/start_price/min_price/max_price/change_pct/data_points/
+            start_date/end_date（日期为 pd.Timestamp）；数据不足的周期只含 error（警告信息）
+    """
+    dates = np.asarray(dates)
+    prices = np.asarray(prices, dtype='float64')
+    n = len(dates)
+    valid = ~np.isnan(prices)
+    counts = np.ones(n, dtype='int64') if counts is None else np.asarray(counts, dtype='int64')
+    
+    # 后缀结构，末尾补一个哨兵位置 n
+    count_after = np.append(np.cumsum(counts[::-1])[::-1], 0)
+    valid_after = np.append(np.cumsum((valid * counts)[::-1])[::-1], 0)
+    next_valid = np.append(np.minimum.accumulate(np.where(valid, np.arange(n), n)[::-1])[::-1], n)
+    min_after = np.fmin.accumulate(prices[::-1])[::-1]
+    max_after = np.fmax.accumulate(prices[::-1])[::-1]
+    valid_positions = np.flatnonzero(valid)
+    last_valid = valid_positions[-1] if len(valid_positions) else -1
+    
+    anchors = find_anchor_indices(dates, list(targets.values()))
+    
+    stats = {}
+    for period, pos in zip(targets, anchors):
+        if pos >= n:
+            stats[period] = {'error': '周期内无价格数据'}
+            continue
+        if valid_after[pos] < 2:
+            stats[period] = {'error': '周期数据点不足'}
+            continue
+        
+        # 周期内所有日期都不早于目标日期，离目标日期最近的就是第一个有效价格
+        start_pos = next_valid[pos]
+        start_date = pd.Timestamp(dates[start_pos])
+        current_date = pd.Timestamp(dates[last_valid])
+        if start_date >= current_date:
+            stats[period] = {'error': '周期数据不足'}
+            continue
+        
+        current_price = float(prices[last_valid])
+        start_price = float(prices[start_pos])
+        stats[period] = {
+            'current_price': current_price,
+            'start_price': start_price,
+            'min_price': float(min_after[pos]),
+            'max_price': float(max_after[pos]),
+            'change_pct': ((current_price - start_price) / start_price * 100) if start_price > 0 else 0,
+            'data_points': int(count_after[pos]),
+            'start_date': start_date,
+            'end_date': current_date,
+        }
+    return stats
+
+
+# 使用月份聚合计算的长周期
+AGGREGATE_PERIODS = ('1y', '3y', '5y')
+
+# 一个月的交易日数比工作日数最多少的天数（春节、国庆等长假），少得更多时视为数据有缺口
+MONTH_HOLIDAY_TOLERANCE = 7
+
+
+def _min_expected_bars(start, end) -> int:
+    """日期区间 [start, end) 内至少应有的日线条数（工作日数减去长假容差）"""
+    return int(np.busday_count(pd.Timestamp(start).date(), pd.Timestamp(end).date())) - MONTH_HOLIDAY_TOLERANCE
+
+
+def _month_aggregate_rows(aggregate: Dict) -> List[Tuple]:
+    """
+    把一个月的聚合展开为 _compute_period_stats 使用的行（内部函数）
+    
+    展开为 4 行 (日期, 价格, K线数)：首日收盘、最低收盘、最高收盘（K线数为 0，只参与最小/最大值）、
+    末日收盘（代表其余K线），K线数合计为 bar_count。周期起点不落在聚合月份内时，统计结果与逐日数据一致
+    """
+    first_date = np.datetime64(aggregate['first_date'], 'D')
+    last_date = np.datetime64(aggregate['last_date'], 'D')
+    return [
+        (first_date, float(aggregate['first_close']), 1),
+        (first_date, float(aggregate['min_close']), 0),
+        (first_date, float(aggregate['max_close']), 0),
+        (last_date, float(aggregate['last_close']), int(aggregate['bar_count']) - 1),
+    ]
+
+
+def _period_stats_from_month_aggregates(symbol: str, periods: List[str], now: datetime) -> Optional[Dict[str, Dict]]:
+    """
+    使用月份聚合计算长周期统计（内部函数，增量模式）
+    
+    长周期（AGGREGATE_PERIODS）的数据分三段：起点所在月份读取日线，之后的完整月份使用月份聚合（每月一行），
+    近期（最早的短周期起点所在月份至今）增量同步日线；短周期只使用近期日线。
+    统计区间与 fetch_price_history 一致（从 _history_window_start 开始），结果与读取全部日线相同
+    
+    Args:
+        symbol: 板块/指数代码
+        periods: 时间周期列表
+        now: 当前时间
+    
+    Returns:
+        Optional[Dict[str, Dict]]: 同 _compute_period_stats；没有长周期、月份聚合不完整或获取近期数据失败时返回 None
+    """
+    targets = _period_target_dates(periods, now)
+    window_start = _history_window_start(periods, now)
+    # 日线从 window_start 当天开始，早于该日期的起点与从该日期开始一致
+    window_day = window_start.replace(hour=0, minute=0, second=0, microsecond=0)
+    long_targets = {p: max(t, window_day) for p, t in targets.items() if p in AGGREGATE_PERIODS}
+    if not long_targets:
+        return None
+    short_targets = {p: t for p, t in targets.items() if p not in long_targets}
+    recent_start = min(short_targets.values(), default=now).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    
+    # 起点所在月份读取日线（统计区间起始月份从 window_start 开始，其余月份读取整月）
+    head_months = {(t.year, t.month) for t in long_targets.values()}
+    first_month = datetime(*min(head_months), 1)
+    months = [(d.year, d.month) for d in pd.date_range(first_month, recent_start, freq='MS', inclusive='left')]
+    
+    init_tables()
+    aggregates = get_month_aggregates(symbol, first_month, recent_start)
+    missing = [ym for ym in months if ym not in head_months and not (aggregates.get(ym) or {}).get('bar_count')]
+    if missing:
+        print(f"[INFO] {symbol} 缺少 {len(missing)} 个月的月份聚合，读取全部日线")
+        return None
+    
+    # 月份记录可能在部分日线写入失败时写入过，日线条数明显少于交易日数的月份不能信任聚合
+    rows = []
+    sparse = []
+    for year, month in months:
+        month_first, month_end = month_bounds(year, month)
+        if (year, month) in head_months:
+            month_start = max(datetime(year, month, 1), window_start)
+            month_rows = get_prices_range(symbol, month_start.strftime('%Y-%m-%d'), month_end,
+                                          columns=('trade_date', 'close_price'))
+            bar_count = len(month_rows)
+            expected = _min_expected_bars(month_start, month_end)
+            for row in month_rows:
+                rows.append((np.datetime64(row['trade_date'], 'D'), float(row['close_price']), 1))
+        else:
+            bar_count = aggregates[(year, month)]['bar_count']
+            expected = _min_expected_bars(month_first, month_end)
+            rows.extend(_month_aggregate_rows(aggregates[(year, month)]))
+        if bar_count < expected:
+            sparse.append(f"{year}-{month:02d}（{bar_count} 条）")
+    if sparse:
+        print(f"[WARNING] {symbol} {len(sparse)} 个月的日线少于预期交易日数，可能有缺口，读取全部日线: "
+              f"{', '.join(sparse[:5])}{' 等' if len(sparse) > 5 else ''}")
+        return None
+    
+    # 与 _sync_price_history_incremental 的检查一致：起始日期附近允许有节假日空档
+    if not rows or (rows[0][0] - np.datetime64(window_start.date(), 'D')).astype(int) > 10:
+        print(f"[INFO] 数据库中 {symbol} 的数据未覆盖统计区间，读取全部日线")
+        return None
+    
+    history = fetch_price_history(symbol, periods, incremental=True, start=recent_start)
+    if history is None:
+        return None
+    recent = history.dates >= np.datetime64(recent_start.date(), 'D')
+    recent_dates, recent_close = history.dates[recent], history.close[recent]
+    print(f"[INFO] {symbol} 长周期使用 {len(months)} 个月的数据（{len(rows)} 行）+ 近期 {len(recent_dates)} 条日线")
+    
+    dates = np.concatenate([np.array([r[0] for r in rows], dtype='datetime64[D]'), recent_dates])
+    prices = np.concatenate([np.array([r[1] for r in rows], dtype='float64'), recent_close])
+    counts = np.concatenate([np.array([r[2] for r in rows], dtype='int64'), np.ones(len(recent_dates), dtype='int64')])
+    
+    stats = _compute_period_stats(dates, prices, long_targets, counts)
+    if short_targets:
+        stats.update(_compute_period_stats(recent_dates, recent_close, short_targets))
+    return {period: stats[period] for period in targets}
+
+
+# 数据库价格列 -> 价格数据列（与 akshare index_zh_a_hist 的中文列名一致）
+_DB_PRICE_COLUMN_MAP = {
+    'trade_date': '日期',
+    'open_price': '开盘',
+    'high_price': '最高',
+    'low_price': '最低',
+    'close_price': '收盘',
+    'volume': '成交量',
+}
+
+
+def _price_frame_from_rows(rows: List[Dict]) -> pd.DataFrame:
+    """
+    将数据库行或 _price_rows_from_frame 的结果转换为价格数据（内部函数）
+    
+    Args:
+        rows: 含 trade_date/open_price/.../volume 键的字典列表，或按 PRICE_COLUMNS 排列的元组列表
+    
+    Returns:
+        pd.DataFrame: 含 日期/开盘/最高/最低/收盘/成交量 列，按日期升序排列
+    """
+    if rows and not isinstance(rows[0], dict):
+        frame = pd.DataFrame(rows, columns=PRICE_COLUMNS)[list(_DB_PRICE_COLUMN_MAP.keys())]
+    else:
+        frame = pd.DataFrame(rows, columns=list(_DB_PRICE_COLUMN_MAP.keys()))
+    frame = frame.rename(columns=_DB_PRICE_COLUMN_MAP)
+    frame['日期'] = pd.to_datetime(frame['日期'])
+    for col in ('开盘', '最高', '最低', '收盘', '成交量'):
+        frame[col] = pd.to_numeric(frame[col], errors='coerce')
+    return frame.sort_values('日期').reset_index(drop=True)
+
+
+def _store_price_rows(symbol: str, price_data_list: List[Dict], symbol_type: str = 'index',
+                      record_from: Optional[datetime] = None) -> Tuple[int, bool]:
+    """
+    批量写入价格数据，并为涉及的每个月份写入月份记录（内部函数）
+    
+    有记录写入失败的月份不写月份记录，下次重新获取。启用 WRITE_BEHIND_ENABLED 时放入后台写入队列后立即返回，
+    月份记录在价格数据写入成功后由后台线程写入
+    
+    Args:
+        symbol: 板块/指数代码
+        price_data_list: _price_rows_from_frame 的结果
+        symbol_type: 类型
+        record_from: 只为从该日期所在月份的下一个月（该日期为月初时为当月）开始的月份写月份记录，
+            用于获取区间从月中开始的情况：区间起始月份只有部分数据，写入月份记录会被视为已完整覆盖
+    
+    Returns:
+        Tuple[int, bool]: (记录数, 是否放入后台写入队列)；同步写入时为实际保存的记录数，放入队列时为排队的记录数
+    """
+    if not price_data_list:
+        return 0, False
+    symbol_title = get_symbol_title(symbol)
+    months = sorted({(int(row[2][:4]), int(row[2][5:7])) for row in price_data_list})
+    if record_from is not None:
+        first_full = (record_from.year, record_from.month)
+        if record_from.day != 1:
+            first_full = (record_from.year + record_from.month // 12, record_from.month % 12 + 1)
+        months = [ym for ym in months if ym >= first_full]
+    month_records = [(symbol, symbol_title, symbol_type, year, month) for year, month in months]
+    
+    if WRITE_BEHIND_ENABLED and get_write_behind().submit(price_data_list, month_records):
+        print(f"[INFO] {symbol} {len(price_data_list)} 条价格数据已放入后台写入队列")
+        return len(price_data_list), True
+    
+    report = bulk_upsert_prices(price_data_list)
+    saved_count = report['inserted'] + report['updated']
+    print(f"[OK] 批量保存价格数据: 成功 {saved_count}/{report['total']} 条"
+          f"（新增 {report['inserted']}，更新 {report['updated']}，失败 {report['failed']}，共 {report['chunks']} 批）")
+    if saved_count:
+        failed_months = failed_price_months(report)
+        for record in month_records:
+            if failed_months is not None and (symbol, record[3], record[4]) not in failed_months:
+                save_month_record(*record)
+    return saved_count, False
+
+
+def _sync_price_history_incremental(symbol: str, window_start: datetime) -> Optional[pd.DataFrame]:
+    """
+    增量同步价格数据（内部函数）
+    
+    读取数据库中统计区间内的日线，只向上游请求数据库最后一根K线（含，可能是盘中数据）到今天的数据，
+    写回数据库后与数据库数据合并
+    
+    Args:
+        symbol: 板块/指数代码
+        window_start: 统计区间起始日期
+    
+    Returns:
+        合并后的价格数据（列同 _price_frame_from_rows）；数据库未完整覆盖统计区间时返回 None，需要全量获取
+    """
+    db_rows = get_prices_range(symbol, window_start.strftime('%Y-%m-%d'))
+    if not db_rows:
+        print(f"[INFO] 数据库中没有 {symbol} 的历史数据，全量获取")
+        return None
+    
+    db_df = _price_frame_from_rows(db_rows)
+    first_date = db_df['日期'].iloc[0]
+    latest_date = db_df['日期'].iloc[-1]
+    
+    # 起始日期附近允许有节假日空档，中间不允许缺月
+    if (first_date - pd.Timestamp(window_start.date())).days > 10:
+        print(f"[INFO] 数据库中 {symbol} 的数据从 {first_date.strftime('%Y-%m-%d')} 开始，未覆盖统计区间，全量获取")
+        return None
+    stored_months = set(zip(db_df['日期'].dt.year, db_df['日期'].dt.month))
+    expected_months = set(
+        (d.year, d.month) for d in pd.date_range(first_date.replace(day=1), latest_date, freq='MS')
+    )
+    missing_months = expected_months - stored_months
+    if missing_months:
+        print(f"[INFO] 数据库中 {symbol} 缺少 {len(missing_months)} 个月的数据，全量获取")
+        return None
+    
+    print(f"[INFO] 从数据库读取到 {len(db_df)} 条 {symbol} 价格数据（最新 {latest_date.strftime('%Y-%m-%d')}），增量获取之后的数据")
+    delta_df, close_col, error = _fetch_price_history(symbol, latest_date.to_pydatetime(), datetime.now())
+    if error:
+        print(f"[WARNING] 增量获取失败: {error}，仅使用数据库数据")
+        return db_df
+    
+    delta_rows = _price_rows_from_frame(symbol, delta_df, close_col)
+    if not delta_rows:
+        return db_df
+    
+    saved_count, queued = _store_price_rows(symbol, delta_rows)
+    if not queued:
+        print(f"[OK] 增量保存 {saved_count} 条价格数据到数据库")
+    
+    merged = pd.concat([db_df, _price_frame_from_rows(delta_rows)], ignore_index=True)
+    merged = merged.drop_duplicates(subset=['日期'], keep='last')
+    return merged.sort_values('日期').reset_index(drop=True)
 
 
 def get_sector_comprehensive_data(
     symbol: str,
     symbol_type: str = 'index',
-    periods: List[str] = ['1m', '3m', '6m', '1y', '3y', '5y']
+    periods: List[str] = ['1m', '3m', '6m', '1y', '3y', '5y'],
+    incremental: bool = False
 ) -> Dict:
     """
     获取板块综合数据（估值 + 价格）
+    
+    incremental 为 True 时价格数据使用增量同步，见 get_sector_price_data
     """
     symbol_title = get_symbol_title(symbol, symbol_type)
     result = {
@@ -848,18 +1381,109 @@ def get_sector_comprehensive_data(
         print(f"获取板块估值数据: {symbol}")
         print(f"{'='*50}")
         result['valuation'] = get_sector_valuation_data(symbol, periods)
-        time.sleep(1)
     
     if symbol_type == 'index':
         print(f"\n{'='*50}")
         print(f"获取指数价格数据: {symbol}")
         print(f"{'='*50}")
-        result['price'] = get_sector_price_data(symbol, periods)
-        time.sleep(1)
+        result['price'] = get_sector_price_data(symbol, periods, incremental=incremental)
     
     return result
 
 
+def _resolve_symbol(symbol) -> Tuple[str, str]:
+    """
+    解析 fetch_many 的代码参数（内部函数）
+    
+    Args:
+        symbol: (代码, 类型) 元组；或 COMMON_SECTORS / COMMON_FUNDS 中的名称；
+            或代码（ETF代码为 etf，其余纯数字代码为 index，中文名称为 sector）
+    
+    Returns:
+        Tuple[str, str]: (代码, 类型)
+    """
+    if isinstance(symbol, (tuple, list)):
+        return symbol[0], symbol[1]
+    if symbol in COMMON_SECTORS:
+        return COMMON_SECTORS[symbol]['code'], COMMON_SECTORS[symbol]['type']
+    if symbol in COMMON_FUNDS:
+        return COMMON_FUNDS[symbol], 'etf'
+    if len(symbol) == 6 and symbol.isdigit() and symbol.startswith(('51', '15', '16')):
+        return symbol, 'etf'
+    if symbol.isdigit():
+        return symbol, 'index'
+    return symbol, 'sector'
+
+
+def _fetch_one(symbol: str, symbol_type: str, periods: List[str], incremental: bool) -> Dict:
+    """获取单个代码的数据（内部函数），ETF 获取收益率，其余获取综合数据"""
+    if symbol_type == 'etf':
+        return get_fund_return_rate(symbol, periods)
+    return get_sector_comprehensive_data(symbol, symbol_type, periods, incremental=incremental)
+
+
+def fetch_many(
+    symbols: List,
+    periods: List[str] = ['1m', '3m', '6m', '1y', '3y', '5y'],
+    max_workers: Optional[int] = None,
+    incremental: bool = False
+) -> Iterator[Tuple[str, Dict]]:
+    """
+    并发获取多个板块/指数/ETF 的数据，每个代码完成后立即返回结果
+    
+    上游请求由进程级令牌桶按接口族限流（见 ratelimit.py），吞吐量取决于配置的配额而不是固定的等待间隔
+    
+    Args:
+        symbols: 代码列表，元素可以是代码、COMMON_SECTORS / COMMON_FUNDS 中的名称或 (代码, 类型) 元组，
+            如 config.SECTORS
+        periods: 时间周期列表
+        max_workers: 并发线程数，默认 SECTOR_FETCH_WORKERS
+        incremental: 指数价格数据是否使用增量同步，见 get_sector_price_data
+    
+    Yields:
+        Tuple[str, Dict]: (代码, 结果)，按完成顺序返回。ETF 的结果同 get_fund_return_rate，
+            其余同 get_sector_comprehensive_data；出错时结果含 error 字段
+    
+    示例:
+        >>> for symbol, data in fetch_many(['000300', '中证消费', '513050'], periods=['1m', '1y']):
+        ...     print(format_analysis_result(data))
+    """
+    resolved = []
+    for symbol in symbols:
+        code, symbol_type = _resolve_symbol(symbol)
+        if (code, symbol_type) not in resolved:
+            resolved.append((code, symbol_type))
+    if not resolved:
+        return
+    
+    workers = max(1, min(max_workers or SECTOR_FETCH_WORKERS, len(resolved)))
+    print(f"[INFO] 并发获取 {len(resolved)} 个代码的数据（{workers} 个线程）")
+    
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sector-fetch')
+    try:
+        futures = {
+            executor.submit(_fetch_one, code, symbol_type, periods, incremental): (code, symbol_type)
+            for code, symbol_type in resolved
+        }
+        for future in as_completed(futures):
+            code, symbol_type = futures[future]
+            try:
+                data = future.result()
+            except Exception as e:
+                print(f"[ERROR] 获取 {code} 数据时出错: {e}")
+                data = {
+                    'symbol': code,
+                    'symbol_title': get_symbol_title(code, symbol_type),
+                    'symbol_type': symbol_type,
+                    'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                    'error': str(e),
+                }
+            yield code, data
+    finally:
+        # 调用方提前停止迭代时，取消尚未开始的任务
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
 def format_analysis_result(data: Dict) -> str:
     """
     格式化分析结果为可读文本
@@ -966,6 +1590,133 @@ def get_fund_return_rate(
         return result
 
 
+def _etf_clean_frame(etf_df: pd.DataFrame, date_col: str, close_col: str) -> pd.DataFrame:
+    """转换ETF数据的日期和价格列，按日期排序并去掉空值（内部函数）"""
+    etf_df[date_col] = pd.to_datetime(etf_df[date_col], errors='coerce')
+    etf_df = etf_df.sort_values(date_col)
+    etf_df[close_col] = pd.to_numeric(etf_df[close_col], errors='coerce')
+    etf_df = etf_df.dropna(subset=[date_col, close_col])
+    if etf_df.empty:
+        raise Exception("数据清洗后为空")
+    return etf_df
+
+
+def _etf_source_hist_sina(etf_code: str) -> Tuple[pd.DataFrame, str, str]:
+    """ETF数据源 方法1: fund_etf_hist_sina（内部函数）"""
+    print(f"[INFO] 尝试方法1: fund_etf_hist_sina")
+    etf_df = ak.fund_etf_hist_sina(symbol=etf_code)
+    if etf_df.empty:
+        raise Exception("数据为空")
+    
+    # 标准化列名
+    date_col = None
+    close_col = None
+    for col in etf_df.columns:
+        col_lower = str(col).lower()
+        if 'date' in col_lower or '日期' in col_lower or 'time' in col_lower or '时间' in col_lower:
+            date_col = col
+        if 'close' in col_lower or '收盘' in col_lower or '净值' in col_lower or 'net' in col_lower:
+            close_col = col
+    
+    if date_col is None or close_col is None:
+        raise Exception(f"无法识别日期列或收盘价列，列名: {list(etf_df.columns)}")
+    
+    etf_df = _etf_clean_frame(etf_df, date_col, close_col)
+    print(f"[OK] 方法1成功，获取 {len(etf_df)} 条记录")
+    return etf_df, date_col, close_col
+
+
+def _etf_source_stock_hist(etf_code: str) -> Tuple[pd.DataFrame, str, str]:
+    """ETF数据源 方法2: 使用股票接口获取ETF数据（ETF也是可交易的）（内部函数）"""
+    print(f"[INFO] 尝试方法2: 使用股票接口获取ETF数据")
+    # ETF代码需要添加市场前缀
+    if etf_code.startswith('51'):
+        symbol_with_prefix = f"sh{etf_code}"
+    elif etf_code.startswith('15') or etf_code.startswith('16'):
+        symbol_with_prefix = f"sz{etf_code}"
+    else:
+        symbol_with_prefix = f"sh{etf_code}"
+    
+    etf_df = ak.stock_zh_a_hist(symbol=symbol_with_prefix, period="daily", adjust="")
+    if etf_df.empty:
+        raise Exception("数据为空")
+    
+    # 标准化列名
+    date_col = None
+    close_col = None
+    for col in etf_df.columns:
+        col_lower = str(col).lower()
+        if 'date' in col_lower or '日期' in col_lower:
+            date_col = col
+        if 'close' in col_lower or '收盘' in col_lower:
+            close_col = col
+    
+    if date_col is None or close_col is None:
+        raise Exception(f"无法识别日期列或收盘价列，列名: {list(etf_df.columns)}")
+    
+    etf_df = _etf_clean_frame(etf_df, date_col, close_col)
+    print(f"[OK] 方法2成功，获取 {len(etf_df)} 条记录")
+    return etf_df, date_col, close_col
+
+
+def _etf_frame_from_fund_info(fund_info: pd.DataFrame, extended_match: bool) -> pd.DataFrame:
+    """
+    从基金净值走势数据中提取日期和净值列，统一为 '日期'/'收盘'（内部函数）
+    
+    Args:
+        fund_info: fund_em_fund_info 返回的数据
+        extended_match: 是否同时按 time/时间/value 匹配列名
+    """
+    date_col = None
+    close_col = None
+    for col in fund_info.columns:
+        col_lower = str(col).lower()
+        if 'date' in col_lower or '日期' in col_lower or (extended_match and ('time' in col_lower or '时间' in col_lower)):
+            date_col = col
+        if '净值' in col_lower or 'net' in col_lower or (extended_match and 'value' in col_lower) or '单位净值' in col_lower:
+            close_col = col
+    
+    if not (date_col and close_col):
+        raise Exception(f"无法识别日期列或净值列，列名: {list(fund_info.columns)}")
+    
+    etf_df = fund_info[[date_col, close_col]].copy()
+    etf_df.rename(columns={date_col: '日期', close_col: '收盘'}, inplace=True)
+    return _etf_clean_frame(etf_df, '日期', '收盘')
+
+
+def _etf_source_fund_info(etf_code: str) -> Tuple[pd.DataFrame, str, str]:
+    """ETF数据源 方法3: 使用基金净值接口（适用于QDII基金等）（内部函数）"""
+    print(f"[INFO] 尝试方法3: 使用基金净值接口 fund_em_fund_info")
+    fund_info = ak.fund_em_fund_info(fund=etf_code, indicator="单位净值走势")
+    if fund_info.empty:
+        raise Exception("数据为空")
+    etf_df = _etf_frame_from_fund_info(fund_info, extended_match=True)
+    print(f"[OK] 方法3成功，获取 {len(etf_df)} 条记录")
+    return etf_df, '日期', '收盘'
+
+
+def _etf_source_spot(etf_code: str) -> Tuple[pd.DataFrame, str, str]:
+    """ETF数据源 方法4: 通过基金实时行情接口找到基金代码后获取净值（内部函数）"""
+    print(f"[INFO] 尝试方法4: 使用基金实时行情接口 fund_etf_spot_em")
+    spot_df = ak.fund_etf_spot_em()
+    if spot_df.empty:
+        raise Exception("实时行情数据为空")
+    
+    # 查找对应的ETF
+    etf_row = spot_df[spot_df['代码'] == etf_code]
+    if etf_row.empty:
+        raise Exception(f"未找到代码为 {etf_code} 的ETF")
+    
+    # 获取基金代码（可能是6位数字），再次尝试使用基金净值接口
+    fund_code = etf_row.iloc[0].get('基金代码', etf_code)
+    fund_info = ak.fund_em_fund_info(fund=fund_code, indicator="单位净值走势")
+    if fund_info.empty:
+        raise Exception("基金净值数据为空")
+    etf_df = _etf_frame_from_fund_info(fund_info, extended_match=False)
+    print(f"[OK] 方法4成功，获取 {len(etf_df)} 条记录")
+    return etf_df, '日期', '收盘'
+
+
 def _get_etf_return_rate(
     etf_code: str,
     periods: List[str] = ['1m', '3m', '6m', '1y', '3y', '5y']
@@ -979,274 +1730,82 @@ def _get_etf_return_rate(
     close_col = None
     
     try:
-        # 方法1: 使用 fund_etf_hist_sina 获取ETF历史数据（不传period参数）
-        try:
-            print(f"[INFO] 尝试方法1: fund_etf_hist_sina")
-            etf_df = ak.fund_etf_hist_sina(symbol=etf_code)
-            
-            if etf_df.empty:
-                raise Exception("数据为空")
-            
-            # 标准化列名
-            date_col = None
-            close_col = None
-            
-            for col in etf_df.columns:
-                col_lower = str(col).lower()
-                if 'date' in col_lower or '日期' in col_lower or 'time' in col_lower or '时间' in col_lower:
-                    date_col = col
-                if 'close' in col_lower or '收盘' in col_lower or '净值' in col_lower or 'net' in col_lower:
-                    close_col = col
-            
-            if date_col is None or close_col is None:
-                raise Exception(f"无法识别日期列或收盘价列，列名: {list(etf_df.columns)}")
-            
-            # 转换日期列
-            etf_df[date_col] = pd.to_datetime(etf_df[date_col])
-            etf_df = etf_df.sort_values(date_col)
-            
-            # 转换价格列
-            etf_df[close_col] = pd.to_numeric(etf_df[close_col], errors='coerce')
-            etf_df = etf_df.dropna(subset=[date_col, close_col])
-            
-            if etf_df.empty:
-                raise Exception("数据清洗后为空")
-            
-            print(f"[OK] 方法1成功，获取 {len(etf_df)} 条记录")
-            
-        except Exception as e1:
-            print(f"[WARNING] 方法1失败: {e1}，尝试其他方法...")
+        # 方法1-4: 依次尝试各数据源，优先使用该代码上次成功的方法（见 routing.py）
+        _, fetched = get_source_router().run('etf', etf_code, [
+            ('fund_etf_hist_sina', '方法1', lambda: _etf_source_hist_sina(etf_code)),
+            ('stock_zh_a_hist', '方法2', lambda: _etf_source_stock_hist(etf_code)),
+            ('fund_em_fund_info', '方法3', lambda: _etf_source_fund_info(etf_code)),
+            ('fund_etf_spot_em', '方法4', lambda: _etf_source_spot(etf_code)),
+        ])
+        
+        if fetched is not None:
+            etf_df, date_col, close_col = fetched
+        else:
+            # 方法5: 使用ETF对应的指数代码（最后备选方案）
+            # 中概互联ETF对应中概互联指数，但指数代码可能不同
+            # 这里提供一个映射，如果ETF获取失败，可以尝试使用指数
+            etf_to_index_map = {
+                '513050': 'HSTECH',  # 中概互联ETF -> 恒生科技指数（近似）
+                '510300': '000300',  # 沪深300ETF -> 沪深300
+                '510500': '000905',  # 中证500ETF -> 中证500
+                '159915': '399006',  # 创业板ETF -> 创业板指
+            }
             
-            # 方法2: 使用股票接口获取ETF数据（ETF也是可交易的）
-            try:
-                print(f"[INFO] 尝试方法2: 使用股票接口获取ETF数据")
-                # ETF代码需要添加市场前缀
-                if etf_code.startswith('51'):
-                    symbol_with_prefix = f"sh{etf_code}"
-                elif etf_code.startswith('15') or etf_code.startswith('16'):
-                    symbol_with_prefix = f"sz{etf_code}"
-                else:
-                    symbol_with_prefix = f"sh{etf_code}"
-                
-                etf_df = ak.stock_zh_a_hist(symbol=symbol_with_prefix, period="daily", adjust="")
-                
-                if etf_df.empty:
-                    raise Exception("数据为空")
-                
-                # 标准化列名
-                date_col = None
-                close_col = None
-                
-                for col in etf_df.columns:
-                    col_lower = str(col).lower()
-                    if 'date' in col_lower or '日期' in col_lower:
-                        date_col = col
-                    if 'close' in col_lower or '收盘' in col_lower:
-                        close_col = col
-                
-                if date_col is None or close_col is None:
-                    raise Exception(f"无法识别日期列或收盘价列，列名: {list(etf_df.columns)}")
-                
-                # 转换日期列
-                etf_df[date_col] = pd.to_datetime(etf_df[date_col])
-                etf_df = etf_df.sort_values(date_col)
-                
-                # 转换价格列
-                etf_df[close_col] = pd.to_numeric(etf_df[close_col], errors='coerce')
-                etf_df = etf_df.dropna(subset=[date_col, close_col])
-                
-                if etf_df.empty:
-                    raise Exception("数据清洗后为空")
-                
-                print(f"[OK] 方法2成功，获取 {len(etf_df)} 条记录")
-                
-            except Exception as e2:
-                print(f"[WARNING] 方法2失败: {e2}，尝试方法3...")
-                
-                # 方法3: 使用基金净值接口（适用于QDII基金等）
-                try:
-                    print(f"[INFO] 尝试方法3: 使用基金净值接口 fund_em_fund_info")
-                    # 先获取基金信息，找到基金代码
-                    fund_info = ak.fund_em_fund_info(fund=etf_code, indicator="单位净值走势")
-                    if not fund_info.empty:
-                        # 查找日期和净值列
-                        date_col = None
-                        close_col = None
-                        for col in fund_info.columns:
-                            col_lower = str(col).lower()
-                            if 'date' in col_lower or '日期' in col_lower or 'time' in col_lower or '时间' in col_lower:
-                                date_col = col
-                            if '净值' in col_lower or 'net' in col_lower or 'value' in col_lower or '单位净值' in col_lower:
-                                close_col = col
-                        
-                        if date_col and close_col:
-                            etf_df = fund_info[[date_col, close_col]].copy()
-                            etf_df.rename(columns={date_col: '日期', close_col: '收盘'}, inplace=True)
-                            etf_df['日期'] = pd.to_datetime(etf_df['日期'], errors='coerce')
-                            etf_df['收盘'] = pd.to_numeric(etf_df['收盘'], errors='coerce')
-                            etf_df = etf_df.dropna(subset=['日期', '收盘'])
-                            etf_df = etf_df.sort_values('日期')
-                            
-                            if not etf_df.empty:
-                                date_col = '日期'
-                                close_col = '收盘'
-                                print(f"[OK] 方法3成功，获取 {len(etf_df)} 条记录")
-                            else:
-                                raise Exception("数据清洗后为空")
-                        else:
-                            raise Exception(f"无法识别日期列或净值列，列名: {list(fund_info.columns)}")
-                    else:
-                        raise Exception("数据为空")
-                        
-                except Exception as e3:
-                    print(f"[WARNING] 方法3失败: {e3}，尝试方法4...")
-                    
-                    # 方法4: 使用基金实时行情接口
-                    try:
-                        print(f"[INFO] 尝试方法4: 使用基金实时行情接口 fund_etf_spot_em")
-                        spot_df = ak.fund_etf_spot_em()
-                        if not spot_df.empty:
-                            # 查找对应的ETF
-                            etf_row = spot_df[spot_df['代码'] == etf_code]
-                            if not etf_row.empty:
-                                # 获取基金代码（可能是6位数字）
-                                fund_code = etf_row.iloc[0].get('基金代码', etf_code)
-                                # 再次尝试使用基金净值接口
-                                fund_info = ak.fund_em_fund_info(fund=fund_code, indicator="单位净值走势")
-                                if not fund_info.empty:
-                                    # 处理数据（同方法3）
-                                    date_col = None
-                                    close_col = None
-                                    for col in fund_info.columns:
-                                        col_lower = str(col).lower()
-                                        if 'date' in col_lower or '日期' in col_lower:
-                                            date_col = col
-                                        if '净值' in col_lower or 'net' in col_lower or '单位净值' in col_lower:
-                                            close_col = col
-                                    
-                                    if date_col and close_col:
-                                        etf_df = fund_info[[date_col, close_col]].copy()
-                                        etf_df.rename(columns={date_col: '日期', close_col: '收盘'}, inplace=True)
-                                        etf_df['日期'] = pd.to_datetime(etf_df['日期'], errors='coerce')
-                                        etf_df['收盘'] = pd.to_numeric(etf_df['收盘'], errors='coerce')
-                                        etf_df = etf_df.dropna(subset=['日期', '收盘'])
-                                        etf_df = etf_df.sort_values('日期')
-                                        
-                                        if not etf_df.empty:
-                                            date_col = '日期'
-                                            close_col = '收盘'
-                                            print(f"[OK] 方法4成功，获取 {len(etf_df)} 条记录")
-                                        else:
-                                            raise Exception("数据清洗后为空")
-                                    else:
-                                        raise Exception(f"无法识别日期列或净值列")
-                                else:
-                                    raise Exception("基金净值数据为空")
-                            else:
-                                raise Exception(f"未找到代码为 {etf_code} 的ETF")
-                        else:
-                            raise Exception("实时行情数据为空")
-                            
-                    except Exception as e4:
-                        print(f"[WARNING] 方法4失败: {e4}，尝试方法5...")
-                        
-                        # 方法5: 使用ETF对应的指数代码（最后备选方案）
-                        # 中概互联ETF对应中概互联指数，但指数代码可能不同
-                        # 这里提供一个映射，如果ETF获取失败，可以尝试使用指数
-                        etf_to_index_map = {
-                            '513050': 'HSTECH',  # 中概互联ETF -> 恒生科技指数（近似）
-                            '510300': '000300',  # 沪深300ETF -> 沪深300
-                            '510500': '000905',  # 中证500ETF -> 中证500
-                            '159915': '399006',  # 创业板ETF -> 创业板指
+            if etf_code in etf_to_index_map:
+                index_code = etf_to_index_map[etf_code]
+                print(f"[INFO] 方法5: ETF获取失败，尝试使用对应指数代码 {index_code}")
+                print(f"[WARNING] 注意: 这是指数数据，可能与ETF净值有差异")
+                # 使用指数数据获取函数（避免循环导入，直接调用）
+                index_data = get_sector_price_data(index_code, periods)
+                if index_data:
+                    # 转换为ETF格式
+                    for period, period_data in index_data.items():
+                        result[period] = {
+                            'return_rate': period_data.get('change_pct', 0),
+                            'current_price': period_data.get('current_price', 0),
+                            'start_price': period_data.get('start_price', 0),
+                            'start_date': period_data.get('start_date', ''),
+                            'end_date': period_data.get('end_date', ''),
+                            'data_points': period_data.get('data_points', 0),
                         }
-                        
-                        if etf_code in etf_to_index_map:
-                            index_code = etf_to_index_map[etf_code]
-                            print(f"[INFO] 方法5: ETF获取失败，尝试使用对应指数代码 {index_code}")
-                            print(f"[WARNING] 注意: 这是指数数据，可能与ETF净值有差异")
-                            # 使用指数数据获取函数（避免循环导入，直接调用）
-                            index_data = get_sector_price_data(index_code, periods)
-                            if index_data:
-                                # 转换为ETF格式
-                                for period, period_data in index_data.items():
-                                    result[period] = {
-                                        'return_rate': period_data.get('change_pct', 0),
-                                        'current_price': period_data.get('current_price', 0),
-                                        'start_price': period_data.get('start_price', 0),
-                                        'start_date': period_data.get('start_date', ''),
-                                        'end_date': period_data.get('end_date', ''),
-                                        'data_points': period_data.get('data_points', 0),
-                                    }
-                                print(f"[OK] 方法5成功，使用指数数据作为替代")
-                                return result
-                        
-                        print(f"[ERROR] 所有方法都失败，无法获取 {etf_code} 的ETF数据")
-                        print(f"[INFO] 提示: 可以尝试使用对应的指数代码，如中概互联ETF(513050)可以使用恒生科技指数(HSTECH)或中概互联指数")
-                        return result
+                    print(f"[OK] 方法5成功，使用指数数据作为替代")
+                    return result
+            
+            print(f"[ERROR] 所有方法都失败，无法获取 {etf_code} 的ETF数据")
+            print(f"[INFO] 提示: 可以尝试使用对应的指数代码，如中概互联ETF(513050)可以使用恒生科技指数(HSTECH)或中概互联指数")
+            return result
         
         # 检查是否成功获取了数据
         if etf_df is None or etf_df.empty or date_col is None or close_col is None:
             print(f"[ERROR] 未能成功获取 {etf_code} 的数据")
             return result
         
-        # 计算各周期的收益率
+        # 计算各周期的收益率（数据已按日期排序并去掉空值）
         today = datetime.now()
+        history = PriceHistory.from_frame(etf_code, etf_df, date_col=date_col, close_col=close_col)
+        period_stats = _compute_period_stats(history.dates, history.close, _period_target_dates(periods, today))
         
-        for period in periods:
-            if period not in TIME_PERIODS:
-                continue
-            
-            months = TIME_PERIODS[period]
-            if period == '1y':
-                target_days = 365
-            elif period == '3y':
-                target_days = 1095
-            elif period == '5y':
-                target_days = 1825
-            else:
-                target_days = months * 30
-            
-            target_date = today - timedelta(days=target_days)
-            period_data = etf_df[etf_df[date_col] >= target_date].copy()
-            
-            if period_data.empty:
-                print(f"[WARNING] {period} 周期内无数据")
-                continue
-            
-            prices = period_data[close_col].values
-            dates = period_data[date_col].values
-            
-            if len(prices) < 2:
-                print(f"[WARNING] {period} 周期数据点不足")
-                continue
-            
-            current_price = prices[-1]
-            current_date = dates[-1]
-            
-            # 找到最接近目标日期的价格
-            date_diffs = [(abs((d - target_date).days), idx) for idx, d in enumerate(dates)]
-            date_diffs.sort()
-            start_idx = date_diffs[0][1] if date_diffs else 0
-            start_price = prices[start_idx]
-            start_date = dates[start_idx]
-            
-            if start_date >= current_date:
-                print(f"[WARNING] {period} 周期数据不足")
+        for period, stats in period_stats.items():
+            if 'error' in stats:
+                print(f"[WARNING] {period} {stats['error']}")
                 continue
             
-            # 计算收益率
-            return_rate = ((current_price - start_price) / start_price * 100) if start_price > 0 else 0
+            current_price = stats['current_price']
+            start_price = stats['start_price']
+            return_rate = stats['change_pct']
+            start_date = stats['start_date'].strftime('%Y-%m-%d')
+            end_date = stats['end_date'].strftime('%Y-%m-%d')
             
             result[period] = {
                 'return_rate': float(return_rate),
                 'current_price': float(current_price),
                 'start_price': float(start_price),
-                'start_date': pd.Timestamp(start_date).strftime('%Y-%m-%d'),
-                'end_date': pd.Timestamp(current_date).strftime('%Y-%m-%d'),
-                'data_points': len(period_data),
+                'start_date': start_date,
+                'end_date': end_date,
+                'data_points': stats['data_points'],
             }
             
-            print(f"[OK] {period} 周期收益率: 起始 {pd.Timestamp(start_date).strftime('%Y-%m-%d')} ({start_price:.4f}) -> 当前 {pd.Timestamp(current_date).strftime('%Y-%m-%d')} ({current_price:.4f}), 收益率 {return_rate:.2f}%")
+            print(f"[OK] {period} 周期收益率: 起始 {start_date} ({start_price:.4f}) -> 当前 {end_date} ({current_price:.4f}), 收益率 {return_rate:.2f}%")
         
         return result
         
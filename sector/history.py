@@ -0,0 +1,133 @@
+"""
+紧凑的日线价格容器
+日期为 datetime64[D] 数组，开高低价（float32）、收盘价（float64）和成交量（int64）存放在一个连续的
+NumPy 结构化数组中，每根K线 28 字节；按周期取数据返回共享内存的视图，不复制
+"""
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .normalize import normalize_price_frame
+
+# 每根K线的结构：3 个 float32 价格 + float64 收盘价 + int64 成交量，共 28 字节
+# 收盘价参与周期统计（涨跌幅、最高/最低价），float32 只有约 7 位有效数字，万点以上的指数会丢失小数位，因此保留 float64
+BAR_DTYPE = np.dtype([
+    ('open', '<f4'),
+    ('high', '<f4'),
+    ('low', '<f4'),
+    ('close', '<f8'),
+    ('volume', '<i8'),
+])
+
+# 成交量缺失时的取值（价格缺失为 NaN）
+VOLUME_MISSING = -1
+
+
+class PriceHistory:
+    """
+    单个代码的日线价格容器
+
+    Attributes:
+        symbol: 代码
+        dates: 按升序排列的 datetime64[D] 数组
+        bars: BAR_DTYPE 结构化数组，与 dates 一一对应
+    """
+
+    __slots__ = ('symbol', 'dates', 'bars')
+
+    def __init__(self, symbol: str, dates: np.ndarray, bars: np.ndarray):
+        self.symbol = symbol
+        self.dates = dates
+        self.bars = bars
+
+    @classmethod
+    def from_canonical(cls, symbol: str, canonical: pd.DataFrame) -> 'PriceHistory':
+        """
+        由 normalize_price_frame 的结果创建
+
+        Args:
+            symbol: 代码
+            canonical: 标准化后的数据（按日期升序）
+        """
+        n = len(canonical)
+        bars = np.empty(n, dtype=BAR_DTYPE)
+        for name in ('open', 'high', 'low', 'close'):
+            bars[name] = canonical[name].to_numpy(dtype=BAR_DTYPE[name])
+        volume = canonical['volume'].to_numpy(dtype='float64')
+        bars['volume'] = np.where(np.isnan(volume), VOLUME_MISSING, volume).astype('int64')
+        dates = canonical['trade_date'].to_numpy().astype('datetime64[D]')
+        return cls(symbol, dates, bars)
+
+    @classmethod
+    def from_frame(
+        cls,
+        symbol: str,
+        df: pd.DataFrame,
+        date_col: Optional[str] = None,
+        close_col: Optional[str] = None
+    ) -> 'PriceHistory':
+        """
+        由 AKShare 日线数据创建，保留收盘价缺失的K线（close 为 NaN）
+
+        Args:
+            symbol: 代码
+            df: 日线数据（中文或英文列名）
+            date_col: 日期列名，默认自动识别
+            close_col: 收盘价列名，默认自动识别
+        """
+        canonical = normalize_price_frame(df, date_col=date_col, close_col=close_col, drop_missing_close=False)
+        return cls.from_canonical(symbol, canonical)
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def __repr__(self) -> str:
+        if not len(self):
+            return f"PriceHistory({self.symbol}, 0 bars)"
+        return f"PriceHistory({self.symbol}, {len(self)} bars, {self.dates[0]} ~ {self.dates[-1]})"
+
+    @property
+    def open(self) -> np.ndarray:
+        return self.bars['open']
+
+    @property
+    def high(self) -> np.ndarray:
+        return self.bars['high']
+
+    @property
+    def low(self) -> np.ndarray:
+        return self.bars['low']
+
+    @property
+    def close(self) -> np.ndarray:
+        return self.bars['close']
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self.bars['volume']
+
+    @property
+    def nbytes(self) -> int:
+        """占用内存（字节）"""
+        return self.dates.nbytes + self.bars.nbytes
+
+    def between(self, start=None, end=None) -> 'PriceHistory':
+        """
+        取日期区间 [start, end) 的数据，返回视图（不复制）
+
+        Args:
+            start: 起始日期（含），None 表示从头开始
+            end: 结束日期（不含），None 表示到最后
+        """
+        lo = 0 if start is None else int(np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start).ceil('D'), 'D')))
+        hi = len(self) if end is None else int(np.searchsorted(self.dates, np.datetime64(pd.Timestamp(end).ceil('D'), 'D')))
+        return PriceHistory(self.symbol, self.dates[lo:hi], self.bars[lo:hi])
+
+    def since(self, start) -> 'PriceHistory':
+        """取 start 及之后的数据（时间部分向上取整到天，与周期统计一致），返回视图"""
+        return self.between(start, None)
+
+    def to_frame(self) -> pd.DataFrame:
+        """转换为以 trade_date 为索引的 DataFrame（复制数据，成交量缺失为 VOLUME_MISSING）"""
+        return pd.DataFrame(self.bars, index=pd.DatetimeIndex(self.dates, name='trade_date'))
@@ -0,0 +1,118 @@
+"""
+价格数据标准化模块
+把 AKShare 各接口返回的日线数据（中文或英文列名）按列一次性转换为统一的 OHLCV 结构，
+并直接生成可批量写入数据库的元组
+"""
+from itertools import repeat
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 价格表批量写入的列顺序，元组形式的行数据按此顺序排列
+PRICE_COLUMNS = (
+    'symbol', 'symbol_title', 'trade_date',
+    'open_price', 'high_price', 'low_price', 'close_price', 'volume'
+)
+
+# 标准化后的列
+CANONICAL_COLUMNS = ('trade_date', 'open', 'high', 'low', 'close', 'volume')
+
+# 各标准列在 AKShare 返回数据中的候选列名（按优先级排列）
+COLUMN_ALIASES = {
+    'trade_date': ('日期', 'date'),
+    'open': ('open', '开盘'),
+    'high': ('high', '最高'),
+    'low': ('low', '最低'),
+    'close': ('close', '收盘'),
+    'volume': ('volume', '成交量'),
+}
+
+
+def _find_column(df: pd.DataFrame, candidates: Sequence[str]) -> Optional[str]:
+    for col in candidates:
+        if col in df.columns:
+            return col
+    return None
+
+
+def normalize_price_frame(
+    df: pd.DataFrame,
+    date_col: Optional[str] = None,
+    close_col: Optional[str] = None,
+    drop_missing_close: bool = True
+) -> pd.DataFrame:
+    """
+    将日线数据转换为标准 OHLCV 结构
+
+    Args:
+        df: AKShare 返回的日线数据
+        date_col: 日期列名，默认按 COLUMN_ALIASES 查找
+        close_col: 收盘价列名，默认按 COLUMN_ALIASES 查找
+        drop_missing_close: 是否去掉收盘价缺失的行（日期缺失的行总是去掉）
+
+    Returns:
+        pd.DataFrame: 列为 CANONICAL_COLUMNS，trade_date 为 datetime64，价格和成交量为 float64（缺失为 NaN），
+            去掉日期或收盘价缺失的行，按日期升序排列
+    """
+    source = {
+        'trade_date': date_col or _find_column(df, COLUMN_ALIASES['trade_date']),
+        'close': close_col or _find_column(df, COLUMN_ALIASES['close']),
+    }
+    for name in ('open', 'high', 'low', 'volume'):
+        source[name] = _find_column(df, COLUMN_ALIASES[name])
+
+    if source['trade_date'] is None or source['close'] is None:
+        raise ValueError(f"无法识别日期列或收盘价列，列名: {list(df.columns)}")
+
+    data = {'trade_date': pd.to_datetime(df[source['trade_date']], errors='coerce').to_numpy()}
+    for name in ('open', 'high', 'low', 'close', 'volume'):
+        if source[name] is None:
+            data[name] = np.full(len(df), np.nan)
+        else:
+            data[name] = pd.to_numeric(df[source[name]], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+
+    canonical = pd.DataFrame(data, columns=list(CANONICAL_COLUMNS))
+    keep = canonical['trade_date'].notna()
+    if drop_missing_close:
+        keep &= canonical['close'].notna()
+    canonical = canonical[keep]
+    return canonical.sort_values('trade_date', kind='stable').reset_index(drop=True)
+
+
+def _nullable_list(values: np.ndarray) -> list:
+    """float 数组转为 Python 列表，NaN 转为 None"""
+    result = values.astype(object)
+    result[np.isnan(values)] = None
+    return result.tolist()
+
+
+def to_price_rows(symbol: str, symbol_title: str, canonical: pd.DataFrame) -> List[Tuple]:
+    """
+    将标准化后的数据转换为按 PRICE_COLUMNS 排列的元组，可直接传给 save_price_batch / bulk_upsert_prices
+
+    Args:
+        symbol: 板块/指数代码
+        symbol_title: 板块/指数完整名称
+        canonical: normalize_price_frame 的结果（收盘价缺失的行会被跳过）
+
+    Returns:
+        List[Tuple]: (symbol, symbol_title, 'YYYY-MM-DD', open, high, low, close, volume)
+    """
+    canonical = canonical[canonical['close'].notna()]
+    if canonical.empty:
+        return []
+
+    trade_dates = canonical['trade_date'].dt.strftime('%Y-%m-%d').tolist()
+    volumes = [None if v != v else int(v) for v in canonical['volume'].to_numpy().tolist()]
+
+    return list(zip(
+        repeat(symbol),
+        repeat(symbol_title),
+        trade_dates,
+        _nullable_list(canonical['open'].to_numpy()),
+        _nullable_list(canonical['high'].to_numpy()),
+        _nullable_list(canonical['low'].to_numpy()),
+        canonical['close'].to_numpy().tolist(),
+        volumes,
+    ))
@@ -0,0 +1,400 @@
+"""
+本地 Parquet 价格存储后端
+价格数据存为一个按代码和年份分区的 Parquet 数据集（Hive 目录格式），读取时使用内存映射:
+
+    <根目录>/prices/symbol=<代码>/year=<年份>/part-0.parquet
+    <根目录>/sector_months.parquet    月份记录（含月份聚合）
+
+写入时按年份文件合并：读出旧数据、按 trade_date 覆盖后整体重写（先写临时文件再原子替换），
+与 MySQL 的 ON DUPLICATE KEY UPDATE 语义一致。单进程内线程安全，不支持多进程同时写入
+"""
+import os
+import threading
+import time
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import quote
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from .normalize import PRICE_COLUMNS
+from .storage import (
+    DB_STREAM_CHUNK_SIZE, DEFAULT_PRICE_QUERY_COLUMNS, MONTH_AGGREGATE_COLUMNS, StorageBackend, check_stream_args,
+    compute_month_aggregates, dedupe_price_rows, is_month_start, month_key_range, price_chunk, to_date
+)
+
+# 年份文件的列（symbol、year 由分区目录表示）
+PRICE_SCHEMA = pa.schema([
+    ('symbol_title', pa.string()),
+    ('trade_date', pa.date32()),
+    ('open_price', pa.float64()),
+    ('high_price', pa.float64()),
+    ('low_price', pa.float64()),
+    ('close_price', pa.float64()),
+    ('volume', pa.int64()),
+])
+
+# 分区目录的类型（不指定时纯数字代码会被推断为整数，'000300' 变成 300）
+PARTITIONING = ds.partitioning(pa.schema([('symbol', pa.string()), ('year', pa.int32())]), flavor='hive')
+
+MONTH_SCHEMA = pa.schema([
+    ('symbol', pa.string()),
+    ('symbol_title', pa.string()),
+    ('symbol_type', pa.string()),
+    ('year', pa.int32()),
+    ('month', pa.int32()),
+    ('updated_at', pa.timestamp('s')),
+    ('first_date', pa.date32()),
+    ('last_date', pa.date32()),
+    ('first_close', pa.float64()),
+    ('last_close', pa.float64()),
+    ('min_close', pa.float64()),
+    ('max_close', pa.float64()),
+    ('volume_sum', pa.int64()),
+    ('bar_count', pa.int32()),
+])
+
+
+class ParquetBackend(StorageBackend):
+    """本地 Parquet 数据集存储后端"""
+
+    name = 'parquet'
+
+    def __init__(self, root: str):
+        """
+        Args:
+            root: 存储根目录
+        """
+        self.root = root
+        self.prices_dir = os.path.join(root, 'prices')
+        self.months_path = os.path.join(root, 'sector_months.parquet')
+        self._lock = threading.RLock()
+        self._months: Optional[Dict[Tuple[str, int, int], Dict]] = None
+
+    # ---------- 路径与文件读写 ----------
+
+    def _symbol_dir(self, symbol: str) -> str:
+        # Hive 分区值按 URI 编码，读取时 pyarrow 会自动解码
+        return os.path.join(self.prices_dir, f"symbol={quote(str(symbol), safe='')}")
+
+    def _year_path(self, symbol: str, year: int) -> str:
+        return os.path.join(self._symbol_dir(symbol), f"year={year}", 'part-0.parquet')
+
+    def _years(self, symbol: str, start: Optional[date] = None, end: Optional[date] = None) -> List[int]:
+        """列出代码已存储的年份（可按 [start, end) 过滤）"""
+        symbol_dir = self._symbol_dir(symbol)
+        if not os.path.isdir(symbol_dir):
+            return []
+        years = []
+        for name in os.listdir(symbol_dir):
+            if not name.startswith('year='):
+                continue
+            year = int(name[5:])
+            if start is not None and year < start.year:
+                continue
+            if end is not None and date(year, 1, 1) >= end:
+                continue
+            years.append(year)
+        return sorted(years)
+
+    @staticmethod
+    def _write_atomic(table: pa.Table, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        pq.write_table(table, tmp_path, compression='zstd')
+        os.replace(tmp_path, path)
+
+    def _read_year(self, symbol: str, year: int, columns: Optional[Sequence[str]] = None) -> Optional[pa.Table]:
+        path = self._year_path(symbol, year)
+        if not os.path.exists(path):
+            return None
+        return pq.read_table(path, columns=list(columns) if columns else None, memory_map=True)
+
+    def _read_range(self, symbol: str, start, end, columns: Sequence[str]) -> Optional[pa.Table]:
+        """读取 [start, end) 内的数据（含 trade_date 列），无数据时返回 None"""
+        start, end = to_date(start), to_date(end)
+        read_columns = list(dict.fromkeys(['trade_date'] + [c for c in columns if c != 'symbol']))
+        tables = []
+        for year in self._years(symbol, start, end):
+            table = self._read_year(symbol, year, read_columns)
+            if table is None or not table.num_rows:
+                continue
+            mask = None
+            if start is not None and start > date(year, 1, 1):
+                mask = pc.greater_equal(table['trade_date'], pa.scalar(start, pa.date32()))
+            if end is not None and end <= date(year, 12, 31):
+                upper = pc.less(table['trade_date'], pa.scalar(end, pa.date32()))
+                mask = upper if mask is None else pc.and_(mask, upper)
+            tables.append(table if mask is None else table.filter(mask))
+        if not tables:
+            return None
+        return pa.concat_tables(tables)
+
+    # ---------- 月份记录 ----------
+
+    def _load_months(self) -> Dict[Tuple[str, int, int], Dict]:
+        """读取月份记录（首次调用时从文件加载，之后使用内存副本），调用方需持有锁"""
+        if self._months is None:
+            self._months = {}
+            if os.path.exists(self.months_path):
+                for row in pq.read_table(self.months_path, memory_map=True).to_pylist():
+                    self._months[(row['symbol'], row['year'], row['month'])] = row
+        return self._months
+
+    def _write_months(self):
+        """把内存中的月份记录写回文件，调用方需持有锁"""
+        self._write_atomic(pa.Table.from_pylist(list(self._months.values()), schema=MONTH_SCHEMA), self.months_path)
+
+    def _refresh_month_aggregates(self, symbol: str, year: int, months: Sequence[int]) -> bool:
+        """
+        由年份文件重新计算已有月份记录的聚合，调用方需持有锁并负责写回文件
+
+        Returns:
+            bool: 是否有月份记录被更新
+        """
+        records = self._load_months()
+        months = [month for month in months if (symbol, year, month) in records]
+        if not months:
+            return False
+        table = self._read_year(symbol, year, ['trade_date', 'close_price', 'volume'])
+        aggregates = {}
+        if table is not None:
+            aggregates = compute_month_aggregates(
+                table['trade_date'].to_pylist(), table['close_price'].to_numpy(zero_copy_only=False),
+                table['volume'].to_pylist())
+        for month in months:
+            aggregate = aggregates.get((year, month), {'bar_count': 0})
+            records[(symbol, year, month)].update({col: aggregate.get(col) for col in MONTH_AGGREGATE_COLUMNS})
+        return True
+
+    def migrate(self):
+        try:
+            os.makedirs(self.prices_dir, exist_ok=True)
+            print(f"[OK] 本地价格存储初始化成功: {os.path.abspath(self.root)}")
+        except OSError as e:
+            print(f"[ERROR] 本地价格存储初始化失败: {e}")
+            raise
+
+    def check_month_data_exists(self, symbol: str, year: int, month: int) -> bool:
+        try:
+            with self._lock:
+                return (symbol, year, month) in self._load_months()
+        except Exception as e:
+            print(f"[WARNING] 检查月份数据失败: {e}")
+            return False
+
+    def save_month_record(self, symbol: str, symbol_title: str, symbol_type: str, year: int, month: int) -> bool:
+        try:
+            with self._lock:
+                months = self._load_months()
+                months[(symbol, year, month)] = {
+                    'symbol': symbol,
+                    'symbol_title': symbol_title,
+                    'symbol_type': symbol_type,
+                    'year': year,
+                    'month': month,
+                    'updated_at': datetime.now().replace(microsecond=0),
+                }
+                self._refresh_month_aggregates(symbol, year, [month])
+                self._write_months()
+                return True
+        except Exception as e:
+            print(f"[ERROR] 保存月份记录失败: {e}")
+            return False
+
+    # ---------- 价格数据 ----------
+
+    def get_month_aggregates(self, symbol: str, start_date, end_date,
+                             include_pending: bool = False) -> Optional[Dict[Tuple[int, int], Dict]]:
+        """参数见 sector.db.get_month_aggregates（v2 之前写入的月份记录文件中聚合为空，视为尚未计算）"""
+        first, last = month_key_range(start_date, end_date)
+        result = {}
+        with self._lock:
+            records = [row for (code, year, month), row in self._load_months().items()
+                       if code == symbol and first <= year * 100 + month <= last]
+        for row in sorted(records, key=lambda r: (r['year'], r['month'])):
+            if row.get('bar_count') is None:
+                if include_pending:
+                    return None
+                continue
+            result[(row['year'], row['month'])] = {col: row.get(col) for col in MONTH_AGGREGATE_COLUMNS}
+        return result
+
+    def get_month_coverage(self, symbol: str, start_date, end_date,
+                           require_month_record: bool = True) -> Dict[Tuple[int, int], int]:
+        if require_month_record and is_month_start(start_date) and is_month_start(end_date):
+            # 区间按月对齐时直接读取月份聚合中的 bar_count
+            aggregates = self.get_month_aggregates(symbol, start_date, end_date, include_pending=True)
+            if aggregates is not None:
+                return {ym: agg['bar_count'] for ym, agg in aggregates.items() if agg['bar_count']}
+        try:
+            with self._lock:
+                table = self._read_range(symbol, start_date, end_date, ['trade_date'])
+                if table is None:
+                    return {}
+                months = pd.DatetimeIndex(table['trade_date'].to_numpy(zero_copy_only=False)).to_period('M')
+                counts = months.value_counts()
+                coverage = {(period.year, period.month): int(count) for period, count in counts.items()}
+                if require_month_record:
+                    records = self._load_months()
+                    coverage = {ym: count for ym, count in coverage.items() if (symbol, ym[0], ym[1]) in records}
+                return coverage
+        except Exception as e:
+            print(f"[WARNING] 获取 {symbol} 月份覆盖情况失败: {e}")
+            return {}
+
+    def bulk_upsert_prices(self, price_data_list: List, chunk_size: Optional[int] = None) -> Dict:
+        """
+        批量写入价格数据，按 (代码, 年份) 合并到对应文件，同一日期的新数据覆盖旧数据
+
+        Args:
+            price_data_list: 价格数据列表，元素为字典（键同 PRICE_COLUMNS）或按 PRICE_COLUMNS 排列的元组
+            chunk_size: 未使用（每个年份文件为一批）
+
+        Returns:
+            Dict: 写入结果，字段同 sector.db.bulk_upsert_prices，chunks 为写入的文件数
+        """
+        rows = dedupe_price_rows(price_data_list)
+        result = {
+            'total': len(rows),
+            'inserted': 0,
+            'updated': 0,
+            'failed': 0,
+            'chunks': 0,
+            'failed_chunks': []
+        }
+        if not rows:
+            return result
+
+        groups: Dict[Tuple[str, int], List[Tuple]] = {}
+        for row in rows:
+            trade_date = to_date(row[2])
+            groups.setdefault((row[0], trade_date.year), []).append(row[1:2] + (trade_date,) + tuple(row[3:]))
+
+        with self._lock:
+            months_changed = False
+            for index, ((symbol, year), group) in enumerate(sorted(groups.items())):
+                result['chunks'] += 1
+                try:
+                    new = pa.Table.from_pylist(
+                        [dict(zip(PRICE_SCHEMA.names, values)) for values in group], schema=PRICE_SCHEMA)
+                    old = self._read_year(symbol, year)
+                    if old is not None and old.num_rows:
+                        old = old.cast(PRICE_SCHEMA)
+                        replaced = pc.is_in(old['trade_date'], value_set=new['trade_date'])
+                        existing = pc.sum(replaced).as_py() or 0
+                        merged = pa.concat_tables([old.filter(pc.invert(replaced)), new])
+                    else:
+                        existing = 0
+                        merged = new
+                    merged = merged.sort_by('trade_date')
+                    self._write_atomic(merged, self._year_path(symbol, year))
+                    result['inserted'] += len(group) - existing
+                    result['updated'] += existing
+                    months_changed |= self._refresh_month_aggregates(
+                        symbol, year, sorted({values[1].month for values in group}))
+                except Exception as e:
+                    print(f"[WARNING] 写入 {symbol} {year} 年价格数据失败（{len(group)} 条）: {e}")
+                    result['failed'] += len(group)
+                    result['failed_chunks'].append({
+                        'index': index,
+                        'rows': len(group),
+                        'error': str(e),
+                        'failed_rows': [{'symbol': symbol, 'trade_date': str(values[1]), 'error': str(e)}
+                                        for values in group]
+                    })
+            if months_changed:
+                # 更新写入涉及的已有月份记录的聚合（尚无月份记录的月份在保存月份记录时计算）
+                try:
+                    self._write_months()
+                except Exception as e:
+                    print(f"[WARNING] 更新月份聚合失败: {e}")
+        return result
+
+    def get_prices_range(self, symbol: str, start=None, end=None,
+                         columns: Optional[Sequence[str]] = None) -> List[Dict]:
+        columns = tuple(columns) if columns else DEFAULT_PRICE_QUERY_COLUMNS
+        invalid = [col for col in columns if col not in PRICE_COLUMNS]
+        if invalid:
+            raise ValueError(f"不支持的列: {invalid}，支持的列: {list(PRICE_COLUMNS)}")
+
+        try:
+            with self._lock:
+                table = self._read_range(symbol, start, end, columns)
+        except Exception as e:
+            print(f"[ERROR] 获取 {symbol} 价格数据失败（{start} ~ {end}）: {e}")
+            return []
+        if table is None:
+            return []
+        if 'symbol' in columns:
+            table = table.append_column('symbol', pa.array([symbol] * table.num_rows, pa.string()))
+        return table.select(list(columns)).to_pylist()
+
+    @staticmethod
+    def _dataset_filter(symbols: Optional[Sequence[str]], start, end):
+        """构造数据集扫描的过滤条件，无条件时返回 None"""
+        condition = None
+        if symbols is not None:
+            condition = ds.field('symbol').isin([str(s) for s in symbols])
+        for value, op in ((start, 'ge'), (end, 'lt')):
+            if value is None:
+                continue
+            bound = pa.scalar(to_date(value), pa.date32())
+            expr = ds.field('trade_date') >= bound if op == 'ge' else ds.field('trade_date') < bound
+            condition = expr if condition is None else condition & expr
+        return condition
+
+    def scan_prices(self, symbols: Optional[Sequence[str]] = None, start=None, end=None,
+                    columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        扫描整个数据集（多个代码的全部历史），用于离线分析
+
+        Args:
+            symbols: 代码列表，None 表示全部
+            start: 起始日期（含），None 表示不限
+            end: 结束日期（不含），None 表示不限
+            columns: 返回的列，默认 symbol + DEFAULT_PRICE_QUERY_COLUMNS
+
+        Returns:
+            pd.DataFrame: 按 symbol、trade_date 排序的价格数据
+        """
+        columns = list(columns) if columns else ['symbol'] + list(DEFAULT_PRICE_QUERY_COLUMNS)
+        if not os.path.isdir(self.prices_dir):
+            return pd.DataFrame(columns=columns)
+
+        dataset = ds.dataset(self.prices_dir, format='parquet', partitioning=PARTITIONING)
+        condition = self._dataset_filter(symbols, start, end)
+
+        started = time.perf_counter()
+        with self._lock:
+            table = dataset.to_table(columns=columns + [c for c in ('symbol', 'trade_date') if c not in columns],
+                                     filter=condition)
+        table = table.sort_by([('symbol', 'ascending'), ('trade_date', 'ascending')]).select(columns)
+        print(f"[INFO] 扫描本地价格数据: {table.num_rows} 行，耗时 {time.perf_counter() - started:.3f}s")
+        return table.to_pandas()
+
+    def iter_prices(self, symbols: Optional[Sequence[str]] = None, start=None, end=None,
+                    columns: Optional[Sequence[str]] = None, chunk_size: Optional[int] = None,
+                    output: str = 'numpy') -> Iterator:
+        """
+        流式读取价格数据（数据集按批扫描），参数见 StorageBackend.iter_prices
+
+        按文件顺序返回：同一代码同一年份内按日期排序，不保证代码之间的顺序
+        """
+        columns = check_stream_args(columns, output, PRICE_COLUMNS)
+        if not os.path.isdir(self.prices_dir):
+            return
+        if symbols is not None and not list(symbols):
+            return
+
+        dataset = ds.dataset(self.prices_dir, format='parquet', partitioning=PARTITIONING)
+        scanner = dataset.scanner(columns=list(columns), filter=self._dataset_filter(symbols, start, end),
+                                  batch_size=chunk_size or DB_STREAM_CHUNK_SIZE)
+        for batch in scanner.to_batches():
+            if not batch.num_rows:
+                continue
+            yield price_chunk(columns, [batch.column(name).to_numpy(zero_copy_only=False) for name in columns], output)
@@ -0,0 +1,294 @@
+"""
+数据库连接池模块
+进程内共享、线程安全的连接池，避免每次数据库操作都重新建立 TCP 连接和认证
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+
+class PoolTimeoutError(Exception):
+    """等待空闲连接超时"""
+
+
+class _PooledEntry:
+    """连接池中的一个连接及其元数据"""
+
+    __slots__ = ('connection', 'created_at', 'last_used_at')
+
+    def __init__(self, connection):
+        now = time.monotonic()
+        self.connection = connection
+        self.created_at = now
+        self.last_used_at = now
+
+
+class ConnectionPool:
+    """
+    线程安全的数据库连接池
+
+    - 最多同时持有 max_size 个连接，超出时阻塞等待（最长 timeout 秒）
+    - 借出时对空闲超过 ping_interval 秒的连接做健康检查，失效则重建
+    - 空闲超过 idle_timeout 秒的连接会被回收
+    """
+
+    def __init__(
+        self,
+        creator: Callable,
+        max_size: int = 5,
+        timeout: float = 30.0,
+        idle_timeout: float = 300.0,
+        ping_interval: float = 10.0
+    ):
+        """
+        Args:
+            creator: 创建新连接的函数
+            max_size: 最大连接数
+            timeout: 借出连接的最长等待时间（秒）
+            idle_timeout: 空闲连接的最长保留时间（秒），<=0 表示不回收
+            ping_interval: 空闲超过该时间（秒）的连接在借出前先 ping，<=0 表示每次都 ping
+        """
+        if max_size < 1:
+            raise ValueError(f"连接池大小必须大于0: {max_size}")
+
+        self._creator = creator
+        self.max_size = max_size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.ping_interval = ping_interval
+
+        self._idle: List[_PooledEntry] = []
+        self._in_use: Dict[int, _PooledEntry] = {}
+        self._cond = threading.Condition(threading.Lock())
+        # 已借出但尚未登记到 _in_use 的连接数（新建、健康检查或重连中），计入连接数上限
+        self._reserved = 0
+        self._closed = False
+
+        self._stats = {
+            'checkouts': 0,
+            'checkins': 0,
+            'created': 0,
+            'reconnects': 0,
+            'evicted': 0,
+            'discarded': 0,
+            'timeouts': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+        }
+
+    def _evict_idle_locked(self) -> List[_PooledEntry]:
+        """取出空闲过久的连接（需持有锁），返回待关闭的连接"""
+        if self.idle_timeout <= 0 or not self._idle:
+            return []
+        deadline = time.monotonic() - self.idle_timeout
+        expired = [entry for entry in self._idle if entry.last_used_at < deadline]
+        if expired:
+            self._idle = [entry for entry in self._idle if entry.last_used_at >= deadline]
+            self._stats['evicted'] += len(expired)
+        return expired
+
+    @staticmethod
+    def _close_quietly(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, entry: _PooledEntry) -> bool:
+        """检查连接是否可用"""
+        if self.ping_interval > 0 and time.monotonic() - entry.last_used_at < self.ping_interval:
+            return True
+        try:
+            entry.connection.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def acquire(self):
+        """
+        借出一个连接
+
+        Returns:
+            数据库连接对象
+
+        Raises:
+            PoolTimeoutError: 等待超时
+        """
+        start = time.monotonic()
+        entry = None
+        expired = []
+        need_create = False
+
+        with self._cond:
+            expired = self._evict_idle_locked()
+            while True:
+                if self._closed:
+                    raise RuntimeError("连接池已关闭")
+                if self._idle:
+                    # LIFO：优先复用最近使用过的连接，让冷连接自然过期
+                    entry = self._idle.pop()
+                    self._reserved += 1
+                    break
+                if len(self._in_use) + self._reserved < self.max_size:
+                    self._reserved += 1
+                    need_create = True
+                    break
+                remaining = self.timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeoutError(f"等待数据库连接超时（{self.timeout}秒，连接池大小 {self.max_size}）")
+                self._cond.wait(remaining)
+
+        for old in expired:
+            self._close_quietly(old.connection)
+
+        try:
+            if need_create:
+                entry = _PooledEntry(self._creator())
+                created, reconnected = 1, 0
+            elif not self._is_healthy(entry):
+                self._close_quietly(entry.connection)
+                entry = _PooledEntry(self._creator())
+                created, reconnected = 1, 1
+            else:
+                created, reconnected = 0, 0
+        except Exception:
+            with self._cond:
+                self._reserved -= 1
+                self._cond.notify()
+            raise
+
+        waited = time.monotonic() - start
+        with self._cond:
+            self._reserved -= 1
+            self._in_use[id(entry.connection)] = entry
+            self._stats['checkouts'] += 1
+            self._stats['created'] += created
+            self._stats['reconnects'] += reconnected
+            self._stats['wait_time_total'] += waited
+            if waited > self._stats['wait_time_max']:
+                self._stats['wait_time_max'] = waited
+        return entry.connection
+
+    def release(self, connection, discard: bool = False):
+        """
+        归还连接
+
+        归还前回滚未提交的事务：只读查询也会开启事务（autocommit 关闭、REPEATABLE READ），
+        不结束事务的话，复用该连接时读到的是旧快照，还会持有元数据锁阻塞 ALTER TABLE；回滚失败时丢弃该连接
+
+        Args:
+            connection: acquire() 借出的连接
+            discard: 为 True 时直接关闭该连接（例如连接已出错）
+        """
+        if not discard:
+            try:
+                connection.rollback()
+            except Exception:
+                discard = True
+        with self._cond:
+            entry = self._in_use.pop(id(connection), None)
+            if entry is None:
+                return
+            self._stats['checkins'] += 1
+            if discard or self._closed:
+                self._stats['discarded'] += 1
+            else:
+                entry.last_used_at = time.monotonic()
+                self._idle.append(entry)
+                entry = None
+            self._cond.notify()
+
+        if entry is not None:
+            self._close_quietly(entry.connection)
+
+    @contextmanager
+    def connection(self):
+        """
+        以上下文管理器方式借出连接，退出时自动归还（归还时回滚未提交的事务，回滚失败则丢弃该连接）
+        """
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def evict_idle(self) -> int:
+        """
+        主动回收空闲过久的连接
+
+        Returns:
+            int: 回收的连接数
+        """
+        with self._cond:
+            expired = self._evict_idle_locked()
+        for entry in expired:
+            self._close_quietly(entry.connection)
+        return len(expired)
+
+    def close(self):
+        """关闭连接池及所有空闲连接，借出中的连接归还时关闭"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for entry in idle:
+            self._close_quietly(entry.connection)
+
+    def get_stats(self) -> Dict:
+        """
+        获取连接池统计信息
+
+        Returns:
+            Dict: checkouts(借出次数)、wait_time_total/avg/max(等待时间，秒)、
+                  created(新建连接数)、reconnects(健康检查失败后的重连数)、
+                  evicted(空闲回收数)、in_use/idle(当前连接数) 等
+        """
+        with self._cond:
+            stats = dict(self._stats)
+            stats['in_use'] = len(self._in_use)
+            stats['idle'] = len(self._idle)
+            stats['max_size'] = self.max_size
+        stats['wait_time_avg'] = stats['wait_time_total'] / stats['checkouts'] if stats['checkouts'] else 0.0
+        return stats
+
+
+# 进程级连接池（按进程ID区分，fork 后的子进程会重新创建）
+_pool: Optional[ConnectionPool] = None
+_pool_pid: Optional[int] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(creator: Callable, **kwargs) -> ConnectionPool:
+    """
+    获取进程级共享连接池，首次调用时创建
+
+    Args:
+        creator: 创建新连接的函数
+        **kwargs: 传给 ConnectionPool 的参数（仅首次创建时生效）
+
+    Returns:
+        ConnectionPool: 连接池
+    """
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is not None and _pool_pid == pid:
+        return _pool
+    with _pool_lock:
+        if _pool is None or _pool_pid != pid:
+            # fork 继承来的连接不能与父进程共用，直接丢弃
+            _pool = ConnectionPool(creator, **kwargs)
+            _pool_pid = pid
+        return _pool
+
+
+def close_pool():
+    """关闭进程级连接池"""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.close()
+        _pool = None
+        _pool_pid = None
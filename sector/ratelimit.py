@@ -0,0 +1,226 @@
+"""
+AKShare 上游接口限流模块
+按数据源（接口族）设置令牌桶，多线程并发获取时共享同一配额，取代固定的 time.sleep 间隔
+"""
+import os
+import sys
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+# 添加父目录到路径，以便导入config
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import (
+    AKSHARE_RATE_LIMITS,
+    AKSHARE_RATE_DEFAULT,
+    AKSHARE_RATE_BURST
+)
+
+# 接口 -> 接口族（同一数据源的接口共享配额），未列出的接口归入 'default'
+ENDPOINT_FAMILIES = {
+    'index_zh_a_hist': 'eastmoney',
+    'index_zh_a_hist_min_em': 'eastmoney',
+    'stock_zh_a_hist': 'eastmoney',
+    'fund_em_fund_info': 'eastmoney',
+    'fund_etf_spot_em': 'eastmoney',
+    'stock_zh_index_daily': 'sina',
+    'stock_zh_index_spot': 'sina',
+    'fund_etf_hist_sina': 'sina',
+    'tool_trade_date_hist_sina': 'sina',
+    'index_value_hist_funddb': 'funddb',
+}
+
+
+class TokenBucket:
+    """
+    令牌桶：每秒补充 rate 个令牌，最多积累 capacity 个，取不到令牌时阻塞等待
+    rate <= 0 表示不限流
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate: 每秒请求数
+            capacity: 桶容量（允许的突发请求数），默认 max(1, rate)
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._stats = {
+            'acquired': 0,
+            'waited': 0,
+            'wait_time_total': 0.0,
+        }
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        取令牌，不足时等待
+
+        Args:
+            tokens: 需要的令牌数
+
+        Returns:
+            float: 等待时间（秒）
+        """
+        if self.rate <= 0:
+            with self._lock:
+                self._stats['acquired'] += 1
+            return 0.0
+
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    self._stats['acquired'] += 1
+                    if waited:
+                        self._stats['waited'] += 1
+                        self._stats['wait_time_total'] += waited
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats['rate'] = self.rate
+        stats['capacity'] = self.capacity
+        return stats
+
+
+class RateLimiter:
+    """按接口族管理令牌桶"""
+
+    def __init__(self, rates: Dict[str, float], default_rate: float, burst: Optional[float] = None):
+        """
+        Args:
+            rates: 接口族 -> 每秒请求数
+            default_rate: 未配置的接口族的每秒请求数
+            burst: 各桶容量，默认与各自的 rate 相同（至少为 1）
+        """
+        self.rates = dict(rates)
+        self.default_rate = default_rate
+        self.burst = burst
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, family: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(family)
+            if bucket is None:
+                bucket = TokenBucket(self.rates.get(family, self.default_rate), self.burst)
+                self._buckets[family] = bucket
+            return bucket
+
+    def acquire(self, func_name: str) -> float:
+        """
+        调用接口前取令牌
+
+        Args:
+            func_name: AKShare 接口名
+
+        Returns:
+            float: 等待时间（秒）
+        """
+        return self.bucket(ENDPOINT_FAMILIES.get(func_name, 'default')).acquire()
+
+    def wrap(self, func_name: str, func: Callable) -> Callable:
+        """包装接口：每次调用前先取令牌"""
+        def limited_func(*args, **kwargs):
+            self.acquire(func_name)
+            return func(*args, **kwargs)
+
+        limited_func.__name__ = func_name
+        limited_func.__wrapped__ = func
+        return limited_func
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """
+        获取各接口族的限流统计
+
+        Returns:
+            Dict[str, Dict]: 接口族 -> acquired(请求数)、waited(等待次数)、wait_time_total(累计等待秒数)、rate、capacity
+        """
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {family: bucket.get_stats() for family, bucket in buckets.items()}
+
+
+class RateLimitedModule:
+    """
+    模块代理：访问的函数自动经过 RateLimiter 包装，其他属性原样返回
+
+    用法:
+        import akshare
+        ak = RateLimitedModule(akshare, limiter)
+    """
+
+    def __init__(self, module, limiter: RateLimiter):
+        self._module = module
+        self._limiter = limiter
+        self._wrapped = {}
+
+    def __getattr__(self, name):
+        attr = getattr(self._module, name)
+        if not callable(attr) or name.startswith('_'):
+            return attr
+        wrapped = self._wrapped.get(name)
+        if wrapped is None or wrapped.__wrapped__ is not attr:
+            wrapped = self._limiter.wrap(name, attr)
+            self._wrapped[name] = wrapped
+        return wrapped
+
+
+def parse_rate_limits(value: str) -> Dict[str, float]:
+    """
+    解析限流配置，格式: "eastmoney=2,sina=2,funddb=1"
+
+    Returns:
+        Dict[str, float]: 接口族 -> 每秒请求数
+    """
+    rates = {}
+    for item in value.split(','):
+        if '=' not in item:
+            continue
+        family, rate = item.split('=', 1)
+        try:
+            rates[family.strip()] = float(rate)
+        except ValueError:
+            print(f"[WARNING] 忽略无效的限流配置: {item.strip()}")
+    return rates
+
+
+# 进程级限流器，所有线程共享
+_default_limiter: Optional[RateLimiter] = None
+_default_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """获取按 config 配置创建的进程级限流器"""
+    global _default_limiter
+    if _default_limiter is None:
+        with _default_limiter_lock:
+            if _default_limiter is None:
+                _default_limiter = RateLimiter(
+                    parse_rate_limits(AKSHARE_RATE_LIMITS),
+                    default_rate=AKSHARE_RATE_DEFAULT,
+                    burst=AKSHARE_RATE_BURST
+                )
+    return _default_limiter
+
+
+def get_rate_limiter_stats() -> Dict[str, Dict]:
+    """
+    获取 AKShare 上游请求的限流统计
+
+    Returns:
+        Dict[str, Dict]: 见 RateLimiter.get_stats()
+    """
+    return get_rate_limiter().get_stats()
@@ -0,0 +1,235 @@
+"""
+数据源路由表模块
+按代码记录各获取方法的成功/失败次数、耗时和连续失败次数，持久化到 JSON 文件；
+后续调用优先使用上次成功的方法，已知失败的方法放到最后，并定期按默认顺序重新探测
+
+查看路由表:
+    python -m sector.routing
+"""
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# 添加父目录到路径，以便导入config
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import SOURCE_ROUTES_FILE, SOURCE_ROUTE_REPROBE_SECONDS
+
+# 耗时的指数移动平均系数
+LATENCY_ALPHA = 0.3
+
+
+class SourceRouter:
+    """
+    数据源路由表
+
+    结构: {类别: {代码: {'best': 方法名, 'last_probe': 时间戳, 'methods': {方法名: 统计}}}}
+    类别如 'index_price'、'etf'，方法名为对应的 AKShare 接口名
+    """
+
+    def __init__(self, path: Optional[str], reprobe_interval: float = 86400.0):
+        """
+        Args:
+            path: 持久化文件路径，None 表示只保存在内存中
+            reprobe_interval: 重新探测间隔（秒），超过该时间后下一次调用按默认顺序尝试所有方法
+        """
+        self.path = path
+        self.reprobe_interval = reprobe_interval
+        self._lock = threading.Lock()
+        self._routes = self._load()
+
+    def _load(self) -> Dict:
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[WARNING] 读取数据源路由表失败，将重新记录: {e}")
+            return {}
+
+    def _save(self):
+        """写入路由表（先写临时文件再原子替换），调用方需持有锁"""
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._routes, f, ensure_ascii=False, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"[WARNING] 保存数据源路由表失败: {e}")
+
+    def order(self, kind: str, symbol: str, methods: List[str]) -> List[str]:
+        """
+        计算本次调用的尝试顺序
+
+        上次成功的方法排第一，其余未失败的方法按默认顺序，连续失败的方法按连续失败次数放到最后；
+        没有记录或到了重新探测时间时使用默认顺序
+
+        Args:
+            kind: 类别
+            symbol: 代码
+            methods: 默认顺序的方法名列表
+
+        Returns:
+            List[str]: 尝试顺序
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._routes.get(kind, {}).get(symbol)
+            if entry is None:
+                return list(methods)
+            if now - entry.get('last_probe', 0) >= self.reprobe_interval:
+                entry['last_probe'] = now
+                self._save()
+                return list(methods)
+
+            best = entry.get('best')
+            stats = entry.get('methods', {})
+
+        def rank(item):
+            index, name = item
+            streak = stats.get(name, {}).get('failure_streak', 0)
+            return (streak > 0, name != best, streak, index)
+
+        return [name for _, name in sorted(enumerate(methods), key=rank)]
+
+    def record(self, kind: str, symbol: str, method: str, success: bool,
+               latency: float, error: Optional[str] = None):
+        """
+        记录一次调用结果
+
+        Args:
+            kind: 类别
+            symbol: 代码
+            method: 方法名
+            success: 是否成功
+            latency: 耗时（秒）
+            error: 失败原因
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._routes.setdefault(kind, {}).setdefault(
+                symbol, {'best': None, 'last_probe': now, 'methods': {}})
+            stats = entry['methods'].setdefault(method, {
+                'successes': 0,
+                'failures': 0,
+                'failure_streak': 0,
+                'avg_latency': None,
+                'last_success': None,
+                'last_failure': None,
+                'last_error': None,
+            })
+            if stats['avg_latency'] is None:
+                stats['avg_latency'] = round(latency, 3)
+            else:
+                stats['avg_latency'] = round(
+                    LATENCY_ALPHA * latency + (1 - LATENCY_ALPHA) * stats['avg_latency'], 3)
+
+            timestamp = datetime.fromtimestamp(now).strftime('%Y-%m-%d %H:%M:%S')
+            if success:
+                stats['successes'] += 1
+                stats['failure_streak'] = 0
+                stats['last_success'] = timestamp
+                entry['best'] = method
+            else:
+                stats['failures'] += 1
+                stats['failure_streak'] += 1
+                stats['last_failure'] = timestamp
+                stats['last_error'] = (error or '')[:200]
+            self._save()
+
+    def run(self, kind: str, symbol: str,
+            methods: List[Tuple[str, str, Callable[[], Any]]]) -> Tuple[Optional[str], Any]:
+        """
+        按路由顺序依次尝试各方法，返回第一个成功的结果
+
+        Args:
+            kind: 类别
+            symbol: 代码
+            methods: 默认顺序的 (方法名, 日志标签, 调用函数) 列表，调用函数失败时抛出异常
+
+        Returns:
+            Tuple[Optional[str], Any]: (成功的方法名, 结果)，全部失败时为 (None, None)
+        """
+        labels = {name: (label, func) for name, label, func in methods}
+        default_order = [name for name, _, _ in methods]
+        order = self.order(kind, symbol, default_order)
+        if order[0] != default_order[0]:
+            print(f"[INFO] {symbol} 优先使用上次成功的数据源: {order[0]}")
+
+        for name in order:
+            label, func = labels[name]
+            start = time.perf_counter()
+            try:
+                result = func()
+            except Exception as e:
+                self.record(kind, symbol, name, False, time.perf_counter() - start, str(e))
+                print(f"[WARNING] {label}失败: {str(e)[:100]}...")
+                continue
+            self.record(kind, symbol, name, True, time.perf_counter() - start)
+            return name, result
+        return None, None
+
+    def get_routes(self) -> Dict:
+        """
+        获取路由表副本
+
+        Returns:
+            Dict: {类别: {代码: {'best', 'last_probe', 'methods': {方法名: successes/failures/failure_streak/
+                avg_latency/last_success/last_failure/last_error}}}}
+        """
+        with self._lock:
+            return json.loads(json.dumps(self._routes))
+
+    def format_routes(self) -> str:
+        """格式化路由表为可读文本"""
+        lines = []
+        for kind, symbols in sorted(self.get_routes().items()):
+            lines.append(f"[{kind}]")
+            for symbol, entry in sorted(symbols.items()):
+                lines.append(f"  {symbol}  最佳数据源: {entry.get('best') or '无'}")
+                for name, stats in entry.get('methods', {}).items():
+                    lines.append(
+                        f"    {name:<26} 成功 {stats['successes']:>4}  失败 {stats['failures']:>4}  "
+                        f"连续失败 {stats['failure_streak']:>3}  平均耗时 {stats['avg_latency']}s"
+                        + (f"  最近错误: {stats['last_error'][:60]}" if stats['failure_streak'] else ''))
+        return '\n'.join(lines) if lines else '（路由表为空）'
+
+
+# 进程级路由表
+_default_router: Optional[SourceRouter] = None
+_default_router_lock = threading.Lock()
+
+
+def get_source_router() -> SourceRouter:
+    """获取按 config 配置创建的进程级路由表"""
+    global _default_router
+    if _default_router is None:
+        with _default_router_lock:
+            if _default_router is None:
+                _default_router = SourceRouter(
+                    SOURCE_ROUTES_FILE or None,
+                    reprobe_interval=SOURCE_ROUTE_REPROBE_SECONDS
+                )
+    return _default_router
+
+
+def get_source_routes() -> Dict:
+    """
+    获取数据源路由表（各代码的最佳数据源、各方法的成功/失败次数、耗时和连续失败次数）
+
+    Returns:
+        Dict: 见 SourceRouter.get_routes()
+    """
+    return get_source_router().get_routes()
+
+
+if __name__ == '__main__':
+    print(get_source_router().format_routes())
@@ -0,0 +1,434 @@
+"""
+SQLite 价格存储后端
+表结构与 MySQL 一致（sector_months、sector_prices），使用 WAL 模式，批量写入按批在一个事务中提交，
+upsert 使用 INSERT ... ON CONFLICT DO UPDATE（与 MySQL 的 ON DUPLICATE KEY UPDATE 语义一致）。
+无需外部服务，适合单机回补历史数据和在 CI 中运行
+
+每个线程使用各自的连接（WAL 模式下读写可并发，写入由 SQLite 串行化）
+"""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .normalize import PRICE_COLUMNS
+from .storage import (
+    DB_STREAM_CHUNK_SIZE, DEFAULT_PRICE_QUERY_COLUMNS, MONTH_AGGREGATE_COLUMNS, StorageBackend, check_stream_args,
+    dedupe_price_rows, is_month_start, month_key, month_key_range, rows_to_price_chunk, to_date
+)
+
+# 月份记录对应的价格数据（相关子查询中的条件）
+_MONTH_PRICES = """
+p.symbol = sector_months.symbol
+AND p.trade_date >= printf('%04d-%02d-01', sector_months.year, sector_months.month)
+AND p.trade_date < date(printf('%04d-%02d-01', sector_months.year, sector_months.month), '+1 month')
+"""
+
+# 计算月份聚合，没有价格数据的月份聚合为空、bar_count 为 0；updated_at 保持不变
+_MONTH_AGGREGATE_SQL = f"""
+UPDATE sector_months SET
+    (first_date, last_date, min_close, max_close, volume_sum, bar_count) = (
+        SELECT MIN(trade_date), MAX(trade_date), MIN(close_price), MAX(close_price), SUM(volume), COUNT(*)
+        FROM sector_prices p WHERE {_MONTH_PRICES}
+    ),
+    first_close = (SELECT close_price FROM sector_prices p WHERE {_MONTH_PRICES} ORDER BY trade_date ASC LIMIT 1),
+    last_close = (SELECT close_price FROM sector_prices p WHERE {_MONTH_PRICES} ORDER BY trade_date DESC LIMIT 1)
+{{where}}
+"""
+
+_REFRESH_MONTH_AGGREGATES_SQL = _MONTH_AGGREGATE_SQL.format(
+    where='WHERE symbol = ? AND year * 100 + month BETWEEN ? AND ?')
+
+# 表结构迁移：(版本号, 说明, SQL 语句列表)，与 sector/db.py 的 SCHEMA_MIGRATIONS 版本号一一对应
+SCHEMA_MIGRATIONS = [
+    (1, '创建月份表和价格表', [
+        """
+        CREATE TABLE IF NOT EXISTS sector_months (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            symbol TEXT NOT NULL,
+            symbol_title TEXT,
+            symbol_type TEXT NOT NULL,
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (symbol, year, month)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS sector_prices (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            symbol TEXT NOT NULL,
+            symbol_title TEXT,
+            trade_date TEXT NOT NULL,
+            open_price REAL,
+            high_price REAL,
+            low_price REAL,
+            close_price REAL NOT NULL,
+            volume INTEGER,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (symbol, trade_date)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_prices_trade_date ON sector_prices (trade_date)",
+    ]),
+    (2, '月份表增加价格聚合列', [
+        *[f"ALTER TABLE sector_months ADD COLUMN {column} {column_type}" for column, column_type in (
+            ('first_date', 'TEXT'), ('last_date', 'TEXT'), ('first_close', 'REAL'), ('last_close', 'REAL'),
+            ('min_close', 'REAL'), ('max_close', 'REAL'), ('volume_sum', 'INTEGER'), ('bar_count', 'INTEGER'),
+        )],
+        # 为已有的月份记录计算聚合
+        _MONTH_AGGREGATE_SQL.format(where=''),
+    ]),
+]
+
+_CREATE_SCHEMA_VERSION_SQL = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    description TEXT,
+    applied_at TEXT DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+_UPSERT_MONTH_SQL = """
+INSERT INTO sector_months (symbol, symbol_title, symbol_type, year, month)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (symbol, year, month) DO UPDATE SET
+    symbol_title = excluded.symbol_title,
+    updated_at = CURRENT_TIMESTAMP
+"""
+
+_UPSERT_PRICE_SQL = """
+INSERT INTO sector_prices
+(symbol, symbol_title, trade_date, open_price, high_price, low_price, close_price, volume)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (symbol, trade_date) DO UPDATE SET
+    symbol_title = excluded.symbol_title,
+    open_price = excluded.open_price,
+    high_price = excluded.high_price,
+    low_price = excluded.low_price,
+    close_price = excluded.close_price,
+    volume = excluded.volume,
+    updated_at = CURRENT_TIMESTAMP
+"""
+
+_PRICE_QUERY_COLUMNS = set(PRICE_COLUMNS) | {'created_at', 'updated_at'}
+
+# 每批行数默认值（每批一个事务）
+DEFAULT_CHUNK_SIZE = 500
+
+
+class SQLiteBackend(StorageBackend):
+    """SQLite 存储后端"""
+
+    name = 'sqlite'
+
+    def __init__(self, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        Args:
+            path: 数据库文件路径（':memory:' 仅限单线程测试使用）
+            chunk_size: 批量写入时每个事务的行数
+        """
+        self.path = path
+        self.chunk_size = chunk_size
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        """获取当前线程的连接（首次调用时创建并设置 WAL 模式）"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    @contextmanager
+    def _transaction(self):
+        """在一个事务中执行，异常时回滚"""
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def close(self):
+        """关闭当前线程的连接"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def migrate(self):
+        """执行尚未执行的表结构迁移，每个版本一个事务"""
+        try:
+            with self._transaction() as connection:
+                connection.execute(_CREATE_SCHEMA_VERSION_SQL)
+            current = self._connect().execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+            for version, description, statements in SCHEMA_MIGRATIONS:
+                if version <= current:
+                    continue
+                with self._transaction() as connection:
+                    # 写事务内再检查一次，避免多个进程重复执行同一版本
+                    if connection.execute("SELECT 1 FROM schema_version WHERE version = ?", (version,)).fetchone():
+                        current = version
+                        continue
+                    for statement in statements:
+                        connection.execute(statement)
+                    connection.execute(
+                        "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                        (version, description)
+                    )
+                current = version
+                print(f"[OK] 已执行 SQLite 迁移 v{version}: {description}")
+            print(f"[OK] SQLite 数据库表初始化成功（表结构版本 v{current}）: {self.path}")
+        except Exception as e:
+            print(f"[ERROR] SQLite 数据库表初始化失败: {e}")
+            raise
+
+    def check_month_data_exists(self, symbol: str, year: int, month: int) -> bool:
+        try:
+            row = self._connect().execute(
+                "SELECT COUNT(*) FROM sector_months WHERE symbol = ? AND year = ? AND month = ?",
+                (symbol, year, month)
+            ).fetchone()
+            return row[0] > 0
+        except Exception as e:
+            print(f"[WARNING] 检查月份数据失败: {e}")
+            return False
+
+    def save_month_record(self, symbol: str, symbol_title: str, symbol_type: str, year: int, month: int) -> bool:
+        try:
+            with self._transaction() as connection:
+                connection.execute(_UPSERT_MONTH_SQL, (symbol, symbol_title, symbol_type, year, month))
+                key = year * 100 + month
+                connection.execute(_REFRESH_MONTH_AGGREGATES_SQL, (symbol, key, key))
+            return True
+        except Exception as e:
+            print(f"[ERROR] 保存月份记录失败: {e}")
+            return False
+
+    def get_month_aggregates(self, symbol: str, start_date, end_date,
+                             include_pending: bool = False) -> Optional[Dict[Tuple[int, int], Dict]]:
+        """参数见 sector.db.get_month_aggregates"""
+        first, last = month_key_range(start_date, end_date)
+        try:
+            rows = self._connect().execute(
+                f"""
+                SELECT year, month, {', '.join(MONTH_AGGREGATE_COLUMNS)}
+                FROM sector_months
+                WHERE symbol = ? AND year * 100 + month BETWEEN ? AND ?
+                ORDER BY year, month
+                """,
+                (symbol, first, last)
+            ).fetchall()
+        except Exception as e:
+            print(f"[WARNING] 获取 {symbol} 月份聚合失败: {e}")
+            return None if include_pending else {}
+
+        result = {}
+        for row in rows:
+            if row['bar_count'] is None:
+                if include_pending:
+                    return None
+                continue
+            aggregate = {col: row[col] for col in MONTH_AGGREGATE_COLUMNS}
+            for col in ('first_date', 'last_date'):
+                aggregate[col] = to_date(aggregate[col])
+            result[(row['year'], row['month'])] = aggregate
+        return result
+
+    def get_month_coverage(self, symbol: str, start_date, end_date,
+                           require_month_record: bool = True) -> Dict[Tuple[int, int], int]:
+        if require_month_record and is_month_start(start_date) and is_month_start(end_date):
+            # 区间按月对齐时直接读取月份聚合中的 bar_count
+            aggregates = self.get_month_aggregates(symbol, start_date, end_date, include_pending=True)
+            if aggregates is not None:
+                return {ym: agg['bar_count'] for ym, agg in aggregates.items() if agg['bar_count']}
+
+        sql = """
+        SELECT CAST(substr(trade_date, 1, 4) AS INTEGER) AS year,
+               CAST(substr(trade_date, 6, 2) AS INTEGER) AS month,
+               COUNT(*) AS count
+        FROM sector_prices
+        WHERE symbol = ? AND trade_date >= ? AND trade_date < ?
+        GROUP BY year, month
+        """
+        params = [symbol, str(to_date(start_date)), str(to_date(end_date))]
+        if require_month_record:
+            sql = f"""
+            SELECT c.year, c.month, c.count
+            FROM ({sql}) c
+            JOIN sector_months m
+            ON m.symbol = ? AND m.year = c.year AND m.month = c.month
+            """
+            params.append(symbol)
+        try:
+            rows = self._connect().execute(sql, params).fetchall()
+            return {(row['year'], row['month']): row['count'] for row in rows}
+        except Exception as e:
+            print(f"[WARNING] 获取 {symbol} 月份覆盖情况失败: {e}")
+            return {}
+
+    @staticmethod
+    def _count_existing(connection: sqlite3.Connection, rows: List[Tuple]) -> int:
+        """统计一批行数据中已存在的记录数（用于区分新增和更新）"""
+        dates_by_symbol = {}
+        for row in rows:
+            dates_by_symbol.setdefault(row[0], []).append(row[2])
+        existing = 0
+        for symbol, dates in dates_by_symbol.items():
+            placeholders = ', '.join(['?'] * len(dates))
+            existing += connection.execute(
+                f"SELECT COUNT(*) FROM sector_prices WHERE symbol = ? AND trade_date IN ({placeholders})",
+                [symbol] + dates
+            ).fetchone()[0]
+        return existing
+
+    def bulk_upsert_prices(self, price_data_list: List, chunk_size: Optional[int] = None) -> Dict:
+        """
+        分批批量写入价格数据（INSERT ... ON CONFLICT DO UPDATE），每批一个事务
+
+        某一批失败时回滚该批并改为逐条写入，其余批次不受影响；全部写入后更新涉及月份的月份聚合
+
+        Args:
+            price_data_list: 价格数据列表，元素为字典（键同 PRICE_COLUMNS）或按 PRICE_COLUMNS 排列的元组
+            chunk_size: 每批行数，默认使用构造时的 chunk_size
+
+        Returns:
+            Dict: 写入结果，字段同 sector.db.bulk_upsert_prices
+        """
+        rows = [row[:2] + (str(to_date(row[2])),) + tuple(row[3:]) for row in dedupe_price_rows(price_data_list)]
+        result = {
+            'total': len(rows),
+            'inserted': 0,
+            'updated': 0,
+            'failed': 0,
+            'chunks': 0,
+            'failed_chunks': []
+        }
+        if not rows:
+            return result
+
+        chunk_size = chunk_size or self.chunk_size
+        for index, start in enumerate(range(0, len(rows), chunk_size)):
+            chunk = rows[start:start + chunk_size]
+            result['chunks'] += 1
+            try:
+                with self._transaction() as connection:
+                    existing = self._count_existing(connection, chunk)
+                    connection.executemany(_UPSERT_PRICE_SQL, chunk)
+                result['inserted'] += len(chunk) - existing
+                result['updated'] += existing
+                continue
+            except Exception as e:
+                print(f"[WARNING] 第 {index + 1} 批价格数据写入失败（{len(chunk)} 条），改为逐条写入: {e}")
+                chunk_report = {
+                    'index': index,
+                    'rows': len(chunk),
+                    'error': str(e),
+                    'failed_rows': []
+                }
+
+            for row in chunk:
+                try:
+                    with self._transaction() as connection:
+                        existing = self._count_existing(connection, [row])
+                        connection.execute(_UPSERT_PRICE_SQL, row)
+                    result['updated' if existing else 'inserted'] += 1
+                except Exception as e:
+                    result['failed'] += 1
+                    chunk_report['failed_rows'].append({
+                        'symbol': row[0],
+                        'trade_date': row[2],
+                        'error': str(e)
+                    })
+                    print(f"[WARNING] 保存单条价格数据失败: {e}, 数据: {row}")
+            result['failed_chunks'].append(chunk_report)
+
+        # 更新写入涉及的已有月份记录的聚合（尚无月份记录的月份在保存月份记录时计算）
+        spans = {}
+        for row in rows:
+            first, last = spans.get(row[0], (row[2], row[2]))
+            spans[row[0]] = (min(first, row[2]), max(last, row[2]))
+        try:
+            with self._transaction() as connection:
+                for symbol, (first, last) in spans.items():
+                    connection.execute(_REFRESH_MONTH_AGGREGATES_SQL, (symbol, month_key(first), month_key(last)))
+        except Exception as e:
+            print(f"[WARNING] 更新月份聚合失败: {e}")
+        return result
+
+    def get_prices_range(self, symbol: str, start=None, end=None,
+                         columns: Optional[Sequence[str]] = None) -> List[Dict]:
+        columns = tuple(columns) if columns else DEFAULT_PRICE_QUERY_COLUMNS
+        invalid = [col for col in columns if col not in _PRICE_QUERY_COLUMNS]
+        if invalid:
+            raise ValueError(f"不支持的列: {invalid}，支持的列: {sorted(_PRICE_QUERY_COLUMNS)}")
+
+        sql = f"SELECT {', '.join(columns)} FROM sector_prices WHERE symbol = ?"
+        params = [symbol]
+        if start is not None:
+            sql += " AND trade_date >= ?"
+            params.append(str(to_date(start)))
+        if end is not None:
+            sql += " AND trade_date < ?"
+            params.append(str(to_date(end)))
+        sql += " ORDER BY trade_date ASC"
+
+        try:
+            rows = self._connect().execute(sql, params).fetchall()
+        except Exception as e:
+            print(f"[ERROR] 获取 {symbol} 价格数据失败（{start} ~ {end}）: {e}")
+            return []
+
+        # 与 pymysql 一致，trade_date 返回 date 对象
+        result = []
+        for row in rows:
+            data = dict(row)
+            if 'trade_date' in data:
+                data['trade_date'] = to_date(data['trade_date'])
+            result.append(data)
+        return result
+
+    def iter_prices(self, symbols: Optional[Sequence[str]] = None, start=None, end=None,
+                    columns: Optional[Sequence[str]] = None, chunk_size: Optional[int] = None,
+                    output: str = 'numpy') -> Iterator:
+        """流式读取价格数据（fetchmany 分批），按 (symbol, trade_date) 排序，参数见 StorageBackend.iter_prices"""
+        columns = check_stream_args(columns, output, _PRICE_QUERY_COLUMNS)
+        chunk_size = chunk_size or DB_STREAM_CHUNK_SIZE
+
+        sql = f"SELECT {', '.join(columns)} FROM sector_prices WHERE 1 = 1"
+        params = []
+        if symbols is not None:
+            symbols = list(symbols)
+            if not symbols:
+                return
+            sql += f" AND symbol IN ({', '.join(['?'] * len(symbols))})"
+            params.extend(symbols)
+        if start is not None:
+            sql += " AND trade_date >= ?"
+            params.append(str(to_date(start)))
+        if end is not None:
+            sql += " AND trade_date < ?"
+            params.append(str(to_date(end)))
+        sql += " ORDER BY symbol ASC, trade_date ASC"
+
+        cursor = self._connect().cursor()
+        try:
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows_to_price_chunk(rows, columns, output)
+        finally:
+            cursor.close()
@@ -0,0 +1,507 @@
+"""
+价格数据存储后端模块
+定义统一的存储接口，按 config 的 STORAGE_BACKEND 选择后端:
+    - mysql:   远程 MySQL（sector/db.py）
+    - sqlite:  本地 SQLite 数据库（sector/sqlite_store.py），表结构与 MySQL 一致，无需外部服务
+    - parquet: 本地 Parquet 数据集（sector/parquet_store.py），按代码和年份分区，可离线使用
+
+本模块导出与 sector/db.py 同名的函数，调用时转发到当前后端
+"""
+import os
+import sys
+import threading
+from abc import ABC, abstractmethod
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 添加父目录到路径，以便导入config
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import STORAGE_BACKEND, DB_STREAM_CHUNK_SIZE
+
+from .normalize import PRICE_COLUMNS
+from .history import VOLUME_MISSING
+
+# get_prices_range 默认返回的列
+DEFAULT_PRICE_QUERY_COLUMNS = ('trade_date', 'open_price', 'high_price', 'low_price', 'close_price', 'volume')
+
+# iter_prices 默认返回的列
+DEFAULT_STREAM_COLUMNS = ('symbol',) + DEFAULT_PRICE_QUERY_COLUMNS
+
+# 月份聚合列（sector_months 中由价格数据计算、写入时维护）
+MONTH_AGGREGATE_COLUMNS = (
+    'first_date', 'last_date', 'first_close', 'last_close', 'min_close', 'max_close', 'volume_sum', 'bar_count'
+)
+
+# 流式读取时各列的 NumPy 类型（成交量缺失为 VOLUME_MISSING，价格缺失为 NaN）
+PRICE_COLUMN_DTYPES = {
+    'symbol': np.dtype(object),
+    'symbol_title': np.dtype(object),
+    'trade_date': np.dtype('datetime64[D]'),
+    'open_price': np.dtype('float64'),
+    'high_price': np.dtype('float64'),
+    'low_price': np.dtype('float64'),
+    'close_price': np.dtype('float64'),
+    'volume': np.dtype('int64'),
+    'created_at': np.dtype('datetime64[s]'),
+    'updated_at': np.dtype('datetime64[s]'),
+}
+
+# iter_prices 支持的输出格式
+STREAM_OUTPUTS = ('numpy', 'frame')
+
+
+def price_chunk(columns: Sequence[str], values: Sequence, output: str = 'numpy'):
+    """
+    将一批按列的数据转换为 NumPy 结构化数组或 DataFrame（iter_prices 的输出）
+
+    Args:
+        columns: 列名
+        values: 与 columns 对应的各列数据（列表或数组）
+        output: 'numpy' 返回结构化数组，'frame' 返回 DataFrame
+
+    Returns:
+        np.ndarray 或 pd.DataFrame
+    """
+    arrays = {}
+    for name, column in zip(columns, values):
+        if name == 'volume':
+            column = pd.to_numeric(pd.Series(column, dtype=object)).fillna(VOLUME_MISSING).to_numpy()
+        arrays[name] = np.asarray(column, dtype=PRICE_COLUMN_DTYPES[name])
+    if output == 'frame':
+        return pd.DataFrame(arrays, columns=list(columns))
+    n = len(next(iter(arrays.values()))) if arrays else 0
+    chunk = np.empty(n, dtype=[(name, PRICE_COLUMN_DTYPES[name]) for name in columns])
+    for name, array in arrays.items():
+        chunk[name] = array
+    return chunk
+
+
+def rows_to_price_chunk(rows: Sequence[Tuple], columns: Sequence[str], output: str = 'numpy'):
+    """将一批数据库行（元组）转换为 price_chunk 的输出"""
+    values = list(zip(*rows)) if rows else [()] * len(columns)
+    return price_chunk(columns, values, output)
+
+
+def check_stream_args(columns: Optional[Sequence[str]], output: str, allowed: Sequence[str]) -> Tuple[str, ...]:
+    """校验 iter_prices 的列和输出格式，返回实际读取的列"""
+    columns = tuple(columns) if columns else DEFAULT_STREAM_COLUMNS
+    invalid = [col for col in columns if col not in allowed]
+    if invalid:
+        raise ValueError(f"不支持的列: {invalid}，支持的列: {sorted(allowed)}")
+    if output not in STREAM_OUTPUTS:
+        raise ValueError(f"不支持的输出格式: {output}，支持: {', '.join(STREAM_OUTPUTS)}")
+    return columns
+
+
+def month_bounds(year: int, month: int) -> Tuple[str, str]:
+    """
+    获取指定月份的半开日期区间 [当月1日, 下月1日)
+
+    Args:
+        year: 年份
+        month: 月份 (1-12)
+
+    Returns:
+        Tuple[str, str]: ('YYYY-MM-DD', 'YYYY-MM-DD')
+    """
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')
+
+
+def to_date(value) -> Optional[date]:
+    """'YYYY-MM-DD'、date、datetime 或 Timestamp 转为 date，None 原样返回"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def month_key(value) -> int:
+    """日期转为 年份*100+月份 的整数（用于按月份区间过滤）"""
+    value = to_date(value)
+    return value.year * 100 + value.month
+
+
+def month_key_range(start_date, end_date) -> Tuple[int, int]:
+    """
+    日期区间 [start_date, end_date) 覆盖的月份范围
+
+    Returns:
+        Tuple[int, int]: (首月, 末月)，均为 年份*100+月份，含两端
+    """
+    return month_key(start_date), month_key(to_date(end_date) - timedelta(days=1))
+
+
+def is_month_start(value) -> bool:
+    """是否为某月1日（区间两端都是月初时可直接使用月份聚合）"""
+    return to_date(value).day == 1
+
+
+def compute_month_aggregates(dates, closes, volumes=None) -> Dict[Tuple[int, int], Dict]:
+    """
+    由日线数据计算月份聚合
+
+    Args:
+        dates: 交易日期（date 或 'YYYY-MM-DD'）
+        closes: 收盘价
+        volumes: 成交量（缺失为 None），None 表示全部缺失
+
+    Returns:
+        Dict[Tuple[int, int], Dict]: {(年份, 月份): {MONTH_AGGREGATE_COLUMNS 对应的值}}
+    """
+    days = np.array([to_date(d) for d in dates], dtype='datetime64[D]')
+    if not len(days):
+        return {}
+    closes = np.asarray(closes, dtype=np.float64)
+    order = np.argsort(days, kind='stable')
+    days, closes = days[order], closes[order]
+    vols = None if volumes is None else [volumes[i] for i in order]
+
+    months = days.astype('datetime64[M]')
+    bounds = np.flatnonzero(np.r_[True, months[1:] != months[:-1], True])
+    result = {}
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        first = days[start].item()
+        month_vols = [] if vols is None else [v for v in vols[start:end] if v is not None]
+        result[(first.year, first.month)] = {
+            'first_date': first,
+            'last_date': days[end - 1].item(),
+            'first_close': float(closes[start]),
+            'last_close': float(closes[end - 1]),
+            'min_close': float(closes[start:end].min()),
+            'max_close': float(closes[start:end].max()),
+            'volume_sum': int(sum(month_vols)) if month_vols else None,
+            'bar_count': int(end - start),
+        }
+    return result
+
+
+def dedupe_price_rows(price_data_list: List) -> List[Tuple]:
+    """
+    将价格数据转换为按 PRICE_COLUMNS 排列的元组，并按 (symbol, trade_date) 去重（保留最后一条）
+
+    Args:
+        price_data_list: 字典或元组组成的列表
+
+    Returns:
+        List[Tuple]: 去重后的行数据
+    """
+    rows = {}
+    for data in price_data_list:
+        if isinstance(data, dict):
+            row = tuple(data.get(col) for col in PRICE_COLUMNS)
+        else:
+            row = tuple(data)
+        rows[(row[0], str(row[2]))] = row
+    return list(rows.values())
+
+
+def failed_price_months(report: Dict) -> Optional[set]:
+    """
+    bulk_upsert_prices 结果中有记录写入失败的月份（这些月份不应写入月份记录，否则会被视为已完整覆盖）
+
+    Returns:
+        set: {(代码, 年份, 月份)}；失败无法定位到具体行（如数据库连接失败）时返回 None，表示所有月份都视为失败
+    """
+    failed_rows = [row for chunk in report['failed_chunks'] for row in chunk['failed_rows']]
+    if report['failed'] > len(failed_rows):
+        return None
+    return {(row['symbol'], int(str(row['trade_date'])[:4]), int(str(row['trade_date'])[5:7])) for row in failed_rows}
+
+
+class StorageBackend(ABC):
+    """
+    存储后端接口
+
+    子类需实现 migrate、check_month_data_exists、save_month_record、get_month_coverage、
+    get_month_aggregates、bulk_upsert_prices、get_prices_range、iter_prices（抽象方法，缺少任何一个时
+    创建实例即报错）；其余函数由这些基本操作组合而成
+
+    月份记录同时保存该月价格数据的聚合（MONTH_AGGREGATE_COLUMNS），子类在 save_month_record
+    和 bulk_upsert_prices 时维护，get_month_coverage 和长周期统计直接读取聚合，不再读取日线
+    """
+
+    name = 'base'
+
+    # 本实例是否已完成表结构迁移
+    _schema_ready = False
+    _schema_lock = threading.Lock()
+
+    @abstractmethod
+    def migrate(self):
+        """执行尚未执行的表结构迁移（或创建存储目录）"""
+
+    def init_tables(self, force: bool = False):
+        """
+        初始化表结构，每个后端实例只执行一次 migrate，之后的调用直接返回
+
+        Args:
+            force: 为 True 时重新执行 migrate
+        """
+        if self._schema_ready and not force:
+            return
+        with self._schema_lock:
+            if self._schema_ready and not force:
+                return
+            self.migrate()
+            self._schema_ready = True
+
+    @abstractmethod
+    def check_month_data_exists(self, symbol: str, year: int, month: int) -> bool:
+        """检查指定月份的月份记录是否存在"""
+
+    @abstractmethod
+    def save_month_record(self, symbol: str, symbol_title: str, symbol_type: str, year: int, month: int) -> bool:
+        """保存月份记录"""
+
+    @abstractmethod
+    def get_month_coverage(self, symbol: str, start_date, end_date,
+                           require_month_record: bool = True) -> Dict[Tuple[int, int], int]:
+        """获取日期区间 [start_date, end_date) 内每个月已存储的价格记录数，见 sector.db.get_month_coverage"""
+
+    @abstractmethod
+    def get_month_aggregates(self, symbol: str, start_date, end_date) -> Dict[Tuple[int, int], Dict]:
+        """
+        获取日期区间 [start_date, end_date) 覆盖的月份的聚合（只返回有月份记录且已计算聚合的月份）
+
+        Args:
+            symbol: 板块/指数代码
+            start_date: 起始日期（含）
+            end_date: 结束日期（不含）
+
+        Returns:
+            Dict[Tuple[int, int], Dict]: {(年份, 月份): {MONTH_AGGREGATE_COLUMNS 对应的值}}，
+                日期为 date，价格为 float，没有价格数据的月份 bar_count 为 0
+        """
+
+    @abstractmethod
+    def bulk_upsert_prices(self, price_data_list: List, chunk_size: Optional[int] = None) -> Dict:
+        """批量写入价格数据（同日期覆盖），返回写入结果，见 sector.db.bulk_upsert_prices"""
+
+    @abstractmethod
+    def get_prices_range(self, symbol: str, start=None, end=None,
+                         columns: Optional[Sequence[str]] = None) -> List[Dict]:
+        """按日期区间 [start, end) 读取价格数据，按 trade_date 升序"""
+
+    @abstractmethod
+    def iter_prices(self, symbols: Optional[Sequence[str]] = None, start=None, end=None,
+                    columns: Optional[Sequence[str]] = None, chunk_size: Optional[int] = None,
+                    output: str = 'numpy') -> Iterator:
+        """
+        流式读取多个代码（默认全部）的价格数据，按批返回，内存占用与总行数无关
+
+        Args:
+            symbols: 代码列表，None 表示全部
+            start: 起始日期（含），None 表示不限
+            end: 结束日期（不含），None 表示不限
+            columns: 返回的列，默认 DEFAULT_STREAM_COLUMNS
+            chunk_size: 每批行数，默认 DB_STREAM_CHUNK_SIZE
+            output: 'numpy' 每批为结构化数组，'frame' 每批为 DataFrame
+
+        Yields:
+            np.ndarray 或 pd.DataFrame: 一批价格数据（列类型见 PRICE_COLUMN_DTYPES）
+        """
+
+    def save_price_batch(self, price_data_list: List, chunk_size: Optional[int] = None) -> int:
+        """
+        批量保存价格数据
+
+        Args:
+            price_data_list: 价格数据列表，元素为字典（键同 PRICE_COLUMNS）或按 PRICE_COLUMNS 排列的元组
+            chunk_size: 每批行数
+
+        Returns:
+            int: 成功保存的记录数（新增 + 更新）
+        """
+        if not price_data_list:
+            return 0
+
+        report = self.bulk_upsert_prices(price_data_list, chunk_size)
+        success_count = report['inserted'] + report['updated']
+        print(f"[OK] 批量保存价格数据: 成功 {success_count}/{report['total']} 条"
+              f"（新增 {report['inserted']}，更新 {report['updated']}，失败 {report['failed']}，共 {report['chunks']} 批）")
+        return success_count
+
+    def get_month_prices_from_db(self, symbol: str, year: int, month: int) -> List[Dict]:
+        """获取指定月份的价格数据"""
+        start, end = month_bounds(year, month)
+        return self.get_prices_range(symbol, start, end)
+
+    def get_current_month_prices_from_db(self, symbol: str) -> List[Dict]:
+        """获取当前月份的价格数据"""
+        now = datetime.now()
+        return self.get_month_prices_from_db(symbol, now.year, now.month)
+
+    def should_fetch_current_month_data(self, symbol: str) -> bool:
+        """
+        判断是否需要获取当前月份的数据
+
+        Args:
+            symbol: 板块/指数代码
+
+        Returns:
+            bool: 如果需要获取返回 True，否则返回 False
+        """
+        now = datetime.now()
+        year = now.year
+        month = now.month
+
+        # 检查月份记录是否存在
+        if self.check_month_data_exists(symbol, year, month):
+            # 检查是否有价格数据
+            prices = self.get_current_month_prices_from_db(symbol)
+            if prices:
+                print(f"[INFO] {symbol} {year}年{month}月数据已存在，共 {len(prices)} 条价格记录")
+                return False
+
+        print(f"[INFO] {symbol} {year}年{month}月数据不存在，需要获取")
+        return True
+
+
+class MySQLBackend(StorageBackend):
+    """MySQL 后端，转发到 sector/db.py"""
+
+    name = 'mysql'
+
+    def __init__(self):
+        from . import db
+        self._db = db
+
+    def migrate(self):
+        return self._db.migrate_schema()
+
+    def init_tables(self, force=False):
+        # sector/db.py 自己记录本进程是否已完成迁移
+        return self._db.init_tables(force)
+
+    def check_month_data_exists(self, symbol, year, month):
+        return self._db.check_month_data_exists(symbol, year, month)
+
+    def save_month_record(self, symbol, symbol_title, symbol_type, year, month):
+        return self._db.save_month_record(symbol, symbol_title, symbol_type, year, month)
+
+    def get_month_coverage(self, symbol, start_date, end_date, require_month_record=True):
+        return self._db.get_month_coverage(symbol, start_date, end_date, require_month_record)
+
+    def get_month_aggregates(self, symbol, start_date, end_date):
+        return self._db.get_month_aggregates(symbol, start_date, end_date)
+
+    def bulk_upsert_prices(self, price_data_list, chunk_size=None):
+        return self._db.bulk_upsert_prices(price_data_list, chunk_size)
+
+    def get_prices_range(self, symbol, start=None, end=None, columns=None):
+        return self._db.get_prices_range(symbol, start, end, columns)
+
+    def iter_prices(self, symbols=None, start=None, end=None, columns=None, chunk_size=None, output='numpy'):
+        return self._db.iter_prices(symbols, start, end, columns, chunk_size, output)
+
+
+def _create_sqlite_backend() -> StorageBackend:
+    from .sqlite_store import SQLiteBackend
+    from config import SQLITE_DB_PATH, DB_BULK_CHUNK_SIZE
+    return SQLiteBackend(SQLITE_DB_PATH, chunk_size=DB_BULK_CHUNK_SIZE)
+
+
+def _create_parquet_backend() -> StorageBackend:
+    from .parquet_store import ParquetBackend
+    from config import PARQUET_STORE_DIR
+    return ParquetBackend(PARQUET_STORE_DIR)
+
+
+# 后端名称 -> 创建函数（延迟导入，未使用的后端不要求安装对应依赖）
+BACKENDS = {
+    'mysql': MySQLBackend,
+    'sqlite': _create_sqlite_backend,
+    'parquet': _create_parquet_backend,
+}
+
+# 进程级存储后端
+_default_backend: Optional[StorageBackend] = None
+_default_backend_lock = threading.Lock()
+
+
+def get_storage() -> StorageBackend:
+    """
+    获取按 config 的 STORAGE_BACKEND 创建的进程级存储后端
+
+    Raises:
+        ValueError: 未知的后端名称
+        ImportError: 后端依赖未安装（如 mysql 后端缺少 pymysql）
+    """
+    global _default_backend
+    if _default_backend is None:
+        with _default_backend_lock:
+            if _default_backend is None:
+                name = STORAGE_BACKEND.strip().lower()
+                if name not in BACKENDS:
+                    raise ValueError(f"未知的存储后端: {STORAGE_BACKEND}，支持: {', '.join(BACKENDS)}")
+                _default_backend = BACKENDS[name]()
+    return _default_backend
+
+
+def set_storage(backend: StorageBackend):
+    """替换进程级存储后端（如离线脚本中临时切换到本地存储）"""
+    global _default_backend
+    with _default_backend_lock:
+        _default_backend = backend
+
+
+# 与 sector/db.py 同名的函数，转发到当前后端
+
+def init_tables(force: bool = False):
+    return get_storage().init_tables(force)
+
+
+def check_month_data_exists(symbol: str, year: int, month: int) -> bool:
+    return get_storage().check_month_data_exists(symbol, year, month)
+
+
+def save_month_record(symbol: str, symbol_title: str, symbol_type: str, year: int, month: int) -> bool:
+    return get_storage().save_month_record(symbol, symbol_title, symbol_type, year, month)
+
+
+def get_month_coverage(symbol: str, start_date, end_date,
+                       require_month_record: bool = True) -> Dict[Tuple[int, int], int]:
+    return get_storage().get_month_coverage(symbol, start_date, end_date, require_month_record)
+
+
+def get_month_aggregates(symbol: str, start_date, end_date) -> Dict[Tuple[int, int], Dict]:
+    return get_storage().get_month_aggregates(symbol, start_date, end_date)
+
+
+def bulk_upsert_prices(price_data_list: List, chunk_size: Optional[int] = None) -> Dict:
+    return get_storage().bulk_upsert_prices(price_data_list, chunk_size)
+
+
+def save_price_batch(price_data_list: List, chunk_size: Optional[int] = None) -> int:
+    return get_storage().save_price_batch(price_data_list, chunk_size)
+
+
+def get_prices_range(symbol: str, start=None, end=None, columns: Optional[Sequence[str]] = None) -> List[Dict]:
+    return get_storage().get_prices_range(symbol, start, end, columns)
+
+
+def iter_prices(symbols: Optional[Sequence[str]] = None, start=None, end=None,
+                columns: Optional[Sequence[str]] = None, chunk_size: Optional[int] = None,
+                output: str = 'numpy') -> Iterator:
+    return get_storage().iter_prices(symbols, start, end, columns, chunk_size or DB_STREAM_CHUNK_SIZE, output)
+
+
+def get_month_prices_from_db(symbol: str, year: int, month: int) -> List[Dict]:
+    return get_storage().get_month_prices_from_db(symbol, year, month)
+
+
+def get_current_month_prices_from_db(symbol: str) -> List[Dict]:
+    return get_storage().get_current_month_prices_from_db(symbol)
+
+
+def should_fetch_current_month_data(symbol: str) -> bool:
+    return get_storage().should_fetch_current_month_data(symbol)
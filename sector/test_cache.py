@@ -0,0 +1,80 @@
+"""
+测试 AKShare 响应磁盘缓存（缓存写入临时目录，不调用 AKShare）
+"""
+import os
+import sys
+import time
+
+import pandas as pd
+
+# 添加父目录到路径以便导入sector模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sector.cache import AkshareCache, make_cache_key
+
+
+def make_frame(rows=50):
+    return pd.DataFrame({'日期': pd.date_range('2024-01-01', periods=rows).strftime('%Y-%m-%d'),
+                         '收盘': [3000.0 + i for i in range(rows)]})
+
+
+def test_wrap_hits_cache_and_returns_copies(tmp_path):
+    cache = AkshareCache(str(tmp_path), max_bytes=10 * 1024 * 1024)
+    calls = []
+
+    def fetch(symbol, start_date=None, end_date=None):
+        calls.append(symbol)
+        return make_frame()
+
+    cached = cache.wrap('index_zh_a_hist', fetch)
+    first = cached('000300', start_date='20240101', end_date='20240201')
+    first['收盘'] = 0.0
+    second = cached('000300', start_date='20240101', end_date='20240201')
+
+    assert calls == ['000300']
+    assert second['收盘'].iloc[0] == 3000.0
+    assert cache.get_stats()['hits'] == 1
+
+
+def test_key_normalizes_dates():
+    assert make_cache_key('f', ('000300',), {'start_date': pd.Timestamp('2024-01-02')}) == \
+        make_cache_key('f', ('000300',), {'start_date': '20240102'})
+    assert make_cache_key('f', ('000300',), {}) != make_cache_key('f', ('399006',), {})
+
+
+def test_ttl_for_closed_history_and_expiry(tmp_path):
+    cache = AkshareCache(str(tmp_path), max_bytes=10 * 1024 * 1024, ttls={'f': 60})
+    # 已收盘的历史区间永久缓存，包含今天的调用按接口的缓存时间
+    assert cache.resolve_ttl('f', {'end_date': '20200101'}) is None
+    assert cache.resolve_ttl('f', {}) == 60
+    assert cache.resolve_ttl('other', {}) == cache.default_ttl
+
+    cache.put('f', 'k', make_frame(), ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get('f', 'k') is None
+    assert cache.get_stats()['expired'] == 1
+
+
+def test_evicts_least_recently_used_without_scanning_every_put(tmp_path, monkeypatch):
+    probe = AkshareCache(str(tmp_path / 'probe'), max_bytes=10 * 1024 * 1024)
+    probe.put('f', 'probe', make_frame(), ttl=None)
+    entry_size = probe._size
+
+    cache = AkshareCache(str(tmp_path / 'cache'), max_bytes=int(entry_size * 3.5))
+    scans = []
+    original_evict = cache.evict
+    monkeypatch.setattr(cache, 'evict', lambda: scans.append(1) or original_evict())
+
+    for i in range(3):
+        cache.put('f', f'k{i}', make_frame(), ttl=None)
+        time.sleep(0.01)
+    # 首次写入统计一次目录大小，之后未超过上限时不再扫描
+    assert len(scans) == 1
+
+    cache.get('f', 'k0')
+    cache.put('f', 'k3', make_frame(), ttl=None)
+    assert len(scans) == 2
+    # 最近读取过的 k0 保留，最久未使用的 k1 被淘汰
+    assert cache.get('f', 'k0') is not None
+    assert cache.get('f', 'k1') is None
+    assert cache._size <= cache.max_bytes
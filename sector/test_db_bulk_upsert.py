@@ -0,0 +1,86 @@
+"""
+测试 MySQL 批量写入的新增/更新统计（使用模拟连接，不需要 MySQL）
+"""
+import os
+import sys
+from contextlib import contextmanager
+from datetime import date
+
+# 添加父目录到路径以便导入sector模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sector import db
+
+
+class FakeCursor:
+    """只模拟 sector_prices 的 upsert 和按日期范围查询，影响行数规则同 MySQL（新增 1、更新 2、未变化 0）"""
+
+    def __init__(self, table):
+        self.table = table
+        self.result = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.result = []
+        if sql.lstrip().startswith('SELECT trade_date FROM sector_prices'):
+            symbol, first, last = params
+            self.result = [{'trade_date': d} for (s, d) in self.table if s == symbol and first <= d <= last]
+            return len(self.result)
+        if 'INSERT INTO sector_prices' in sql:
+            key = (params[0], db.to_date(params[2]))
+            values = tuple(params[3:])
+            if key not in self.table:
+                self.table[key] = values
+                return 1
+            changed = self.table[key] != values
+            self.table[key] = values
+            return 2 if changed else 0
+        return 0
+
+    def executemany(self, sql, rows):
+        return sum(self.execute(sql, row) for row in rows)
+
+    def fetchall(self):
+        return self.result
+
+
+class FakeConnection:
+    def __init__(self, table):
+        self.table = table
+
+    def cursor(self):
+        return FakeCursor(self.table)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+def make_row(day, close):
+    return ('000300', '沪深300', f'2024-01-{day:02d}', close, close, close, close, 100)
+
+
+def test_counts_are_exact_with_unchanged_rows(monkeypatch):
+    table = {}
+
+    @contextmanager
+    def fake_connection():
+        yield FakeConnection(table)
+
+    monkeypatch.setattr(db, 'db_connection', fake_connection)
+    db.bulk_upsert_prices([make_row(day, 10.0) for day in (2, 3, 4)])
+
+    # 第 2 天值未变化（影响行数 0）、第 3 天值有变化（影响行数 2）、第 5 天为新增
+    report = db.bulk_upsert_prices([make_row(2, 10.0), make_row(3, 11.0), make_row(5, 12.0)], chunk_size=2)
+    assert report['inserted'] == 1
+    assert report['updated'] == 2
+    assert report['failed'] == 0
+    assert report['chunks'] == 2
+    assert table[('000300', date(2024, 1, 3))][-2] == 11.0
@@ -0,0 +1,115 @@
+"""
+多周期价格统计回归测试：_compute_period_stats 与改写前的逐周期筛选写法（260ed00 之前的 get_sector_price_data）结果一致
+"""
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# 添加父目录到路径以便导入sector模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sector.fetcher import _compute_period_stats, _period_target_dates
+from sector.history import PriceHistory
+
+PERIODS = ['1m', '3m', '6m', '1y', '3y', '5y']
+TODAY = datetime(2025, 6, 30, 15, 30)
+
+
+def stats_loop(price_df: pd.DataFrame, today: datetime):
+    """改写前的逐周期写法（按日期升序的 price_df，列为 日期/收盘）"""
+    result = {}
+    for period, target_date in _period_target_dates(PERIODS, today).items():
+        period_data = price_df[price_df['日期'] >= target_date].copy()
+        if period_data.empty:
+            result[period] = '周期内无价格数据'
+            continue
+        prices = pd.to_numeric(period_data['收盘'], errors='coerce').dropna()
+        dates = period_data.loc[prices.index, '日期']
+        if prices.empty or len(prices) < 2:
+            result[period] = '周期数据点不足'
+            continue
+        current_price = prices.iloc[-1]
+        current_date = dates.iloc[-1]
+        closest_idx = (dates - target_date).abs().idxmin()
+        start_price = prices.loc[closest_idx]
+        start_date = dates.loc[closest_idx]
+        if start_date >= current_date:
+            result[period] = '周期数据不足'
+            continue
+        result[period] = {
+            'current_price': float(current_price),
+            'start_price': float(start_price),
+            'min_price': float(prices.min()),
+            'max_price': float(prices.max()),
+            'change_pct': float(((current_price - start_price) / start_price * 100) if start_price > 0 else 0),
+            'data_points': len(period_data),
+            'start_date': start_date.strftime('%Y-%m-%d'),
+            'end_date': current_date.strftime('%Y-%m-%d'),
+        }
+    return result
+
+
+def stats_engine(dates, prices):
+    result = {}
+    for period, stats in _compute_period_stats(dates, prices, _period_target_dates(PERIODS, TODAY)).items():
+        if 'error' in stats:
+            result[period] = stats['error']
+            continue
+        result[period] = {
+            'current_price': float(stats['current_price']),
+            'start_price': float(stats['start_price']),
+            'min_price': float(stats['min_price']),
+            'max_price': float(stats['max_price']),
+            'change_pct': float(stats['change_pct']),
+            'data_points': stats['data_points'],
+            'start_date': stats['start_date'].strftime('%Y-%m-%d'),
+            'end_date': stats['end_date'].strftime('%Y-%m-%d'),
+        }
+    return result
+
+
+def make_frame(seed: int) -> pd.DataFrame:
+    """
+    随机日线：指数量级的收盘价（三位小数，最高到数万点）、缺失收盘价、重复日期、长度从几天到六年不等
+    """
+    rng = np.random.default_rng(seed)
+    years = rng.choice([0.02, 0.2, 1, 3, 6])
+    dates = pd.bdate_range(end=TODAY.date(), periods=max(2, int(years * 250)))
+    if rng.random() < 0.3:
+        dates = dates[:-int(rng.integers(1, max(2, len(dates) // 2)))]
+    level = rng.choice([1.234, 980.0, 3456.0, 12000.0, 28000.0])
+    close = np.round(level * np.exp(rng.standard_normal(len(dates)).cumsum() * 0.01), 3)
+    close[rng.random(len(dates)) < 0.05] = np.nan
+    frame = pd.DataFrame({'日期': dates, '收盘': close})
+    if rng.random() < 0.3:
+        frame = pd.concat([frame, frame.sample(3, random_state=seed)]).sort_values('日期', kind='stable')
+    return frame.reset_index(drop=True)
+
+
+@pytest.mark.parametrize('seed', range(60))
+def test_matches_per_period_loop(seed):
+    frame = make_frame(seed)
+    expected = stats_loop(frame, TODAY)
+    close = frame['收盘'].to_numpy(dtype='float64')
+    assert stats_engine(frame['日期'].to_numpy(), close) == expected
+
+
+@pytest.mark.parametrize('seed', range(60))
+def test_price_history_matches_per_period_loop(seed):
+    # PriceHistory 中的收盘价参与统计，结果与原始 float64 数据完全一致
+    frame = make_frame(seed)
+    history = PriceHistory.from_frame('000300', frame, date_col='日期', close_col='收盘')
+    assert stats_engine(history.dates, history.close) == stats_loop(frame, TODAY)
+
+
+def test_large_index_keeps_decimals():
+    frame = pd.DataFrame({'日期': pd.bdate_range(end=TODAY.date(), periods=30),
+                          '收盘': np.linspace(23456.789, 24567.891, 30)})
+    history = PriceHistory.from_frame('399001', frame, date_col='日期', close_col='收盘')
+    stats = _compute_period_stats(history.dates, history.close, _period_target_dates(['1m'], TODAY))['1m']
+    assert stats['current_price'] == 24567.891
+    assert history.close.dtype == np.float64
@@ -0,0 +1,110 @@
+"""
+测试数据库连接池（使用模拟连接，不需要 MySQL）
+"""
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# 添加父目录到路径以便导入sector模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sector.pool import ConnectionPool, PoolTimeoutError
+
+
+class FakeConnection:
+    def __init__(self, healthy=True):
+        self.healthy = healthy
+        self.rollbacks = 0
+        self.closed = False
+
+    def ping(self, reconnect=False):
+        if not self.healthy:
+            raise ConnectionError('gone away')
+
+    def rollback(self):
+        if not self.healthy:
+            raise ConnectionError('gone away')
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+def test_release_rolls_back_and_reuses_connection():
+    pool = ConnectionPool(FakeConnection, max_size=2)
+    with pool.connection() as first:
+        pass
+    assert first.rollbacks == 1
+    with pool.connection() as second:
+        pass
+    assert second is first
+    assert pool.get_stats()['created'] == 1
+
+
+def test_failed_rollback_discards_connection():
+    pool = ConnectionPool(FakeConnection, max_size=1)
+    conn = pool.acquire()
+    conn.healthy = False
+    pool.release(conn)
+    assert conn.closed
+    stats = pool.get_stats()
+    assert stats['discarded'] == 1
+    assert stats['idle'] == 0
+
+
+def test_unhealthy_idle_connection_is_replaced():
+    pool = ConnectionPool(FakeConnection, max_size=1, ping_interval=0)
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.healthy = False
+    replacement = pool.acquire()
+    assert replacement is not conn
+    assert conn.closed
+    assert pool.get_stats()['reconnects'] == 1
+
+
+def test_acquire_times_out_when_exhausted():
+    pool = ConnectionPool(FakeConnection, max_size=1, timeout=0.05)
+    pool.acquire()
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+    assert pool.get_stats()['timeouts'] == 1
+
+
+def test_never_exceeds_max_size_while_reconnecting():
+    lock = threading.Lock()
+    live = [0]
+    peak = [0]
+
+    class SlowConnection(FakeConnection):
+        def __init__(self):
+            super().__init__(healthy=False)
+            with lock:
+                live[0] += 1
+                peak[0] = max(peak[0], live[0])
+            time.sleep(0.01)
+
+        def rollback(self):
+            self.rollbacks += 1
+
+        def close(self):
+            with lock:
+                live[0] -= 1
+
+    pool = ConnectionPool(SlowConnection, max_size=2, ping_interval=0)
+
+    def worker():
+        for _ in range(5):
+            with pool.connection():
+                time.sleep(0.001)
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] <= 2
+    assert pool.get_stats()['checkouts'] == 30
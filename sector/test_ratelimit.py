@@ -0,0 +1,86 @@
+"""
+测试 AKShare 上游接口限流（使用模拟时钟，不实际等待）
+"""
+import os
+import sys
+import threading
+
+# 添加父目录到路径以便导入sector模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sector import ratelimit
+from sector.ratelimit import RateLimiter, RateLimitedModule, TokenBucket, parse_rate_limits
+
+
+class FakeClock:
+    """monotonic 返回模拟时间，sleep 只推进模拟时间"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.lock = threading.Lock()
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        with self.lock:
+            self.now += seconds
+
+
+def test_bucket_allows_burst_then_paces(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(ratelimit, 'time', clock)
+    bucket = TokenBucket(rate=2, capacity=2)
+
+    waits = [bucket.acquire() for _ in range(4)]
+    # 桶满时两次突发请求不等待，之后按每秒 2 次放行
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2:] == [0.5, 0.5]
+    assert clock.now == 1.0
+    stats = bucket.get_stats()
+    assert (stats['acquired'], stats['waited'], stats['wait_time_total']) == (4, 2, 1.0)
+
+
+def test_zero_rate_is_unlimited(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(ratelimit, 'time', clock)
+    bucket = TokenBucket(rate=0)
+    assert all(bucket.acquire() == 0.0 for _ in range(100))
+    assert clock.now == 0.0
+
+
+def test_endpoints_share_family_bucket(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(ratelimit, 'time', clock)
+    limiter = RateLimiter({'eastmoney': 1}, default_rate=0)
+
+    class FakeAkshare:
+        VERSION = '1.0'
+
+        @staticmethod
+        def index_zh_a_hist(symbol):
+            return symbol
+
+        @staticmethod
+        def stock_zh_a_hist(symbol):
+            return symbol
+
+        @staticmethod
+        def unknown_endpoint(symbol):
+            return symbol
+
+    ak = RateLimitedModule(FakeAkshare, limiter)
+    assert ak.VERSION == '1.0'
+    assert ak.index_zh_a_hist('000300') == '000300'
+    assert ak.stock_zh_a_hist('600000') == '600000'
+    assert ak.unknown_endpoint('x') == 'x'
+
+    # 同属 eastmoney 的两个接口共享配额，未列出的接口归入不限流的 default
+    stats = limiter.get_stats()
+    assert stats['eastmoney']['acquired'] == 2
+    assert stats['eastmoney']['wait_time_total'] == 1.0
+    assert stats['default']['acquired'] == 1
+
+
+def test_parse_rate_limits_skips_invalid_items():
+    assert parse_rate_limits('eastmoney=2, sina=0.5,bad,funddb=x') == {'eastmoney': 2.0, 'sina': 0.5}
@@ -0,0 +1,70 @@
+"""
+测试数据源路由表（路由表写入临时文件，不调用 AKShare）
+"""
+import os
+import sys
+
+# 添加父目录到路径以便导入sector模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sector.routing import SourceRouter
+
+
+def failing(message):
+    def func():
+        raise RuntimeError(message)
+    return func
+
+
+def test_prefers_last_success_and_persists(tmp_path):
+    path = str(tmp_path / 'routes.json')
+    router = SourceRouter(path)
+    calls = []
+
+    def method(name, result=None):
+        def func():
+            calls.append(name)
+            if result is None:
+                raise RuntimeError(f'{name} 不可用')
+            return result
+        return (name, name, func)
+
+    methods = [method('em'), method('sina', 'sina-data'), method('tx', 'tx-data')]
+    assert router.run('index_price', '000300', methods) == ('sina', 'sina-data')
+    assert calls == ['em', 'sina']
+
+    # 重新加载后：上次成功的 sina 排第一，连续失败的 em 放到最后
+    reloaded = SourceRouter(path)
+    assert reloaded.order('index_price', '000300', ['em', 'sina', 'tx']) == ['sina', 'tx', 'em']
+    calls.clear()
+    assert reloaded.run('index_price', '000300', methods) == ('sina', 'sina-data')
+    assert calls == ['sina']
+    stats = reloaded.get_routes()['index_price']['000300']['methods']
+    assert (stats['sina']['successes'], stats['em']['failure_streak']) == (2, 1)
+
+
+def test_failure_streak_orders_failed_methods_last():
+    router = SourceRouter(None)
+    for _ in range(2):
+        router.record('etf', '510300', 'a', False, 0.1, 'timeout')
+    router.record('etf', '510300', 'b', False, 0.1, 'timeout')
+    # 未失败的方法按默认顺序在前，失败的方法按连续失败次数排序
+    assert router.order('etf', '510300', ['a', 'b', 'c', 'd']) == ['c', 'd', 'b', 'a']
+
+    router.record('etf', '510300', 'a', True, 0.1)
+    assert router.order('etf', '510300', ['a', 'b', 'c', 'd']) == ['a', 'c', 'd', 'b']
+
+
+def test_reprobe_uses_default_order():
+    router = SourceRouter(None, reprobe_interval=0)
+    router.record('etf', '510300', 'b', True, 0.1)
+    router.record('etf', '510300', 'a', False, 0.1, 'timeout')
+    assert router.order('etf', '510300', ['a', 'b']) == ['a', 'b']
+
+
+def test_all_methods_failing_returns_none():
+    router = SourceRouter(None)
+    assert router.run('etf', '510300', [('a', 'a', failing('x')), ('b', 'b', failing('y'))]) == (None, None)
+    routes = router.get_routes()['etf']['510300']
+    assert routes['best'] is None
+    assert routes['methods']['b']['last_error'] == 'y'
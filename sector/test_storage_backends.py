@@ -0,0 +1,102 @@
+"""
+测试本地存储后端（SQLite、Parquet）的 StorageBackend 接口，数据写入临时目录，不需要 MySQL
+"""
+import os
+import sys
+from datetime import date
+
+import numpy as np
+import pytest
+
+# 添加父目录到路径以便导入sector模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sector.sqlite_store import SQLiteBackend
+from sector.parquet_store import ParquetBackend
+
+SYMBOL = '000300'
+
+
+def make_rows(days, close_offset=0.0, symbol=SYMBOL):
+    """按 PRICE_COLUMNS 排列的行数据，days 为 'YYYY-MM-DD' 列表"""
+    rows = []
+    for i, day in enumerate(days):
+        close = 3000.0 + i + close_offset
+        rows.append((symbol, '沪深300', day, close - 1, close + 2, close - 2, close, 1000 + i))
+    return rows
+
+
+JAN = ['2024-01-02', '2024-01-03', '2024-01-04']
+FEB = ['2024-02-01', '2024-02-02']
+
+
+@pytest.fixture(params=['sqlite', 'parquet'])
+def backend(request, tmp_path):
+    if request.param == 'sqlite':
+        storage = SQLiteBackend(str(tmp_path / 'sector.db'))
+    else:
+        storage = ParquetBackend(str(tmp_path / 'parquet'))
+    storage.init_tables()
+    return storage
+
+
+def test_upsert_counts_and_overwrites(backend):
+    report = backend.bulk_upsert_prices(make_rows(JAN))
+    assert (report['total'], report['inserted'], report['updated'], report['failed']) == (3, 3, 0, 0)
+
+    # 同日期覆盖：两条更新、一条新增；同一批中重复的日期只保留最后一条
+    rows = make_rows(JAN[1:] + ['2024-01-05'], close_offset=100)
+    rows.append(rows[0][:6] + (1.0, 1))
+    report = backend.bulk_upsert_prices(rows)
+    assert (report['total'], report['inserted'], report['updated'], report['failed']) == (3, 1, 2, 0)
+
+    prices = backend.get_prices_range(SYMBOL, '2024-01-01', '2024-02-01')
+    assert [str(p['trade_date'])[:10] for p in prices] == JAN + ['2024-01-05']
+    assert float(prices[1]['close_price']) == 1.0
+    assert float(prices[2]['close_price']) == 3101.0
+
+
+def test_month_records_coverage_and_aggregates(backend):
+    backend.bulk_upsert_prices(make_rows(JAN + FEB))
+    assert not backend.check_month_data_exists(SYMBOL, 2024, 1)
+    backend.save_month_record(SYMBOL, '沪深300', 'index', 2024, 1)
+    assert backend.check_month_data_exists(SYMBOL, 2024, 1)
+
+    # 只统计有月份记录的月份；不要求月份记录时按价格数据统计
+    assert backend.get_month_coverage(SYMBOL, '2024-01-01', '2024-03-01') == {(2024, 1): 3}
+    assert backend.get_month_coverage(SYMBOL, '2024-01-01', '2024-03-01',
+                                      require_month_record=False) == {(2024, 1): 3, (2024, 2): 2}
+
+    aggregates = backend.get_month_aggregates(SYMBOL, '2024-01-01', '2024-03-01')
+    assert list(aggregates) == [(2024, 1)]
+    jan = aggregates[(2024, 1)]
+    assert jan['bar_count'] == 3
+    assert str(jan['first_date'])[:10] == '2024-01-02'
+    assert str(jan['last_date'])[:10] == '2024-01-04'
+    assert (jan['first_close'], jan['last_close']) == (3000.0, 3002.0)
+    assert (jan['min_close'], jan['max_close']) == (3000.0, 3002.0)
+    assert jan['volume_sum'] == 1000 + 1001 + 1002
+
+    # 已有月份记录的月份在写入价格数据后更新聚合
+    backend.bulk_upsert_prices(make_rows(['2024-01-31'], close_offset=-500))
+    jan = backend.get_month_aggregates(SYMBOL, '2024-01-01', '2024-02-01')[(2024, 1)]
+    assert jan['bar_count'] == 4
+    assert str(jan['last_date'])[:10] == '2024-01-31'
+    assert (jan['last_close'], jan['min_close']) == (2500.0, 2500.0)
+
+
+def test_iter_prices_streams_in_chunks(backend):
+    backend.bulk_upsert_prices(make_rows(JAN + FEB) + make_rows(JAN, symbol='399006'))
+
+    chunks = list(backend.iter_prices([SYMBOL], start='2024-01-03', end='2024-02-02', chunk_size=2))
+    assert all(len(chunk) <= 2 for chunk in chunks)
+    merged = np.concatenate(chunks)
+    assert list(merged['trade_date']) == [np.datetime64(day) for day in ('2024-01-03', '2024-01-04', '2024-02-01')]
+    assert set(merged['symbol']) == {SYMBOL}
+    assert merged['close_price'].dtype == np.float64
+
+    frames = list(backend.iter_prices(None, columns=['symbol', 'trade_date', 'close_price'], output='frame'))
+    total = sum(len(frame) for frame in frames)
+    assert total == len(JAN + FEB) + len(JAN)
+    assert list(frames[0].columns) == ['symbol', 'trade_date', 'close_price']
+    assert min(f['trade_date'].min() for f in frames).date() == date(2024, 1, 2)
@@ -0,0 +1,127 @@
+"""
+测试价格数据后台写入队列（使用模拟的写入函数，不需要数据库）
+"""
+import datetime
+import json
+import os
+import sys
+
+# 添加父目录到路径以便导入sector模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sector.write_behind import WriteBehindQueue
+
+
+def make_row(trade_date, symbol='000300'):
+    return (symbol, '沪深300', trade_date, 1.0, 2.0, 0.5, 1.5, 100.0)
+
+
+def make_report(rows, failed_dates=(), unlocated=0):
+    failed_rows = [{'symbol': row[0], 'trade_date': row[2], 'error': 'bad row'}
+                   for row in rows if row[2] in failed_dates]
+    failed = len(failed_rows) + unlocated
+    return {
+        'total': len(rows),
+        'inserted': len(rows) - failed,
+        'updated': 0,
+        'failed': failed,
+        'chunks': 1,
+        'failed_chunks': [{'index': 0, 'rows': len(rows), 'error': 'bad row', 'failed_rows': failed_rows}] if failed else []
+    }
+
+
+class FakeStorage:
+    def __init__(self, failed_dates=(), unlocated=0):
+        self.failed_dates = set(failed_dates)
+        self.unlocated = unlocated
+        self.written = []
+        self.months = []
+
+    def write_rows(self, rows):
+        self.written.append(list(rows))
+        return make_report(rows, self.failed_dates, self.unlocated)
+
+    def write_month(self, *record):
+        self.months.append(record)
+        return True
+
+
+def make_queue(storage, spill_path):
+    return WriteBehindQueue(storage.write_rows, storage.write_month, batch_size=100,
+                            flush_interval=60, spill_path=str(spill_path), retry_interval=3600)
+
+
+def read_spill(spill_path):
+    with open(spill_path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def test_partial_failure_spills_failed_rows_and_their_months(tmp_path):
+    storage = FakeStorage(failed_dates={'2024-02-05'})
+    spill_path = tmp_path / 'spill.jsonl'
+    queue = make_queue(storage, spill_path)
+    jan = ('000300', '沪深300', 'index', 2024, 1)
+    feb = ('000300', '沪深300', 'index', 2024, 2)
+    queue.submit([make_row('2024-01-02'), make_row('2024-02-02'), make_row('2024-02-05')], [jan, feb])
+    assert queue.flush(timeout=5)
+    queue.close()
+
+    # 没有失败的月份照常写月份记录，失败的记录和所在月份的月份记录放入溢出文件
+    assert storage.months == [jan]
+    spilled = read_spill(spill_path)
+    assert len(spilled) == 1
+    assert [row[2] for row in spilled[0]['rows']] == ['2024-02-05']
+    assert [tuple(m) for m in spilled[0]['months']] == [feb]
+    stats = queue.get_stats()
+    assert stats['failed_rows'] == 1
+    assert stats['spilled_rows'] == 1
+
+
+def test_unlocated_failure_spills_whole_batch(tmp_path):
+    storage = FakeStorage(unlocated=1)
+    spill_path = tmp_path / 'spill.jsonl'
+    queue = make_queue(storage, spill_path)
+    month = ('000300', '沪深300', 'index', 2024, 1)
+    queue.submit([make_row('2024-01-02'), make_row('2024-01-03')], [month])
+    assert queue.flush(timeout=5)
+    queue.close()
+
+    assert storage.months == []
+    spilled = read_spill(spill_path)
+    assert sum(len(item['rows']) for item in spilled) == 2
+    assert [tuple(m) for item in spilled for m in item['months']] == [month]
+
+
+def test_spilled_rows_are_replayed_after_recovery(tmp_path):
+    storage = FakeStorage(failed_dates={'2024-02-05'})
+    spill_path = tmp_path / 'spill.jsonl'
+    queue = make_queue(storage, spill_path)
+    feb = ('000300', '沪深300', 'index', 2024, 2)
+    queue.submit([make_row('2024-02-02'), make_row('2024-02-05')], [feb])
+    assert queue.flush(timeout=5)
+
+    storage.failed_dates = set()
+    queue._replay_spill()
+    queue.close()
+
+    assert storage.written[-1] == [make_row('2024-02-05')]
+    assert storage.months == [feb]
+    assert not os.path.exists(spill_path)
+    assert queue.get_stats()['replayed_rows'] == 1
+
+
+def test_unserializable_rows_do_not_corrupt_spill_file(tmp_path):
+    spill_path = tmp_path / 'spill.jsonl'
+    queue = make_queue(FakeStorage(), spill_path)
+    # 先停止后台线程，避免它立即重新写入溢出文件
+    queue.close()
+    good = ([make_row('2024-01-02')], [])
+    bad = ([make_row(datetime.date(2024, 1, 3))], [])
+
+    queue._spill([good])
+    queue._spill([good, bad])
+
+    # 无法序列化时整批丢弃（打印错误），不抛出异常，也不会在文件中留下写了一半的数据
+    spilled = read_spill(spill_path)
+    assert len(spilled) == 1
+    assert queue.get_stats()['spilled_rows'] == 1
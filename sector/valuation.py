@@ -0,0 +1,230 @@
+"""
+估值历史与分位数计算
+估值数据（PE、PB 等）只标准化一次：识别指标列、转为 float64 数组、按日期排序；
+各周期都是 [起始日期, 最新日期] 的后缀区间，一次构建后缀结构即可得出所有周期的统计，
+滚动分位数按窗口滑动增量更新（树状数组），不对每个窗口重新计算
+"""
+from datetime import datetime
+from typing import Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+# 指标名 -> 列名中包含的关键字（不区分大小写，多列匹配时取最后一列）
+METRIC_PATTERNS = {
+    'pe': ('pe', '市盈率'),
+    'pb': ('pb', '市净率'),
+}
+
+
+def find_metric_columns(columns: Sequence) -> Dict[str, str]:
+    """
+    识别估值指标列
+
+    Args:
+        columns: 列名列表
+
+    Returns:
+        Dict[str, str]: 指标名 -> 列名，未找到的指标不出现在结果中
+    """
+    found = {}
+    for col in columns:
+        col_lower = str(col).lower()
+        for metric, patterns in METRIC_PATTERNS.items():
+            if any(pattern in col_lower for pattern in patterns):
+                found[metric] = col
+    return found
+
+
+def _to_datetime64(value) -> np.datetime64:
+    return np.datetime64(pd.Timestamp(value).to_datetime64(), 'ns')
+
+
+class ValuationHistory:
+    """
+    单个代码的估值历史
+
+    Attributes:
+        symbol: 代码
+        dates: 按升序排列的 datetime64[ns] 数组（不含 NaT）
+        values: 指标名 -> 与 dates 对应的 float64 数组，缺失为 NaN
+    """
+
+    __slots__ = ('symbol', 'dates', 'values')
+
+    def __init__(self, symbol: str, dates: np.ndarray, values: Dict[str, np.ndarray]):
+        self.symbol = symbol
+        self.dates = dates
+        self.values = values
+
+    @classmethod
+    def from_frame(cls, symbol: str, df: pd.DataFrame) -> 'ValuationHistory':
+        """
+        由 AKShare 估值数据创建
+
+        Args:
+            symbol: 代码
+            df: 含 日期（或 date）列和 PE/PB 列的数据
+        """
+        date_col = '日期' if '日期' in df.columns else 'date'
+        dates = pd.to_datetime(df[date_col], errors='coerce').to_numpy(dtype='datetime64[ns]')
+        keep = ~np.isnat(dates)
+        order = np.argsort(dates[keep], kind='stable')
+        values = {
+            metric: pd.to_numeric(df[col], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)[keep][order]
+            for metric, col in find_metric_columns(df.columns).items()
+        }
+        return cls(symbol, dates[keep][order], values)
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def __repr__(self) -> str:
+        if not len(self):
+            return f"ValuationHistory({self.symbol}, 0 rows)"
+        return (f"ValuationHistory({self.symbol}, {len(self)} rows, {','.join(self.values)}, "
+                f"{pd.Timestamp(self.dates[0]).date()} ~ {pd.Timestamp(self.dates[-1]).date()})")
+
+    def period_stats(self, cutoffs: Dict[str, datetime]) -> Dict[str, Dict]:
+        """
+        一次计算所有周期的估值统计
+
+        Args:
+            cutoffs: 周期 -> 起始日期（含）
+
+        Returns:
+            Dict[str, Dict]: 周期 -> data_points/start_date/end_date 及各指标的
+                current/min/max/percentile/mean/median；周期内没有数据的周期不出现在结果中
+        """
+        anchors = np.searchsorted(self.dates, [_to_datetime64(c) for c in cutoffs.values()], side='left')
+        n = len(self.dates)
+        stats = {}
+        for period, pos in zip(cutoffs, anchors):
+            if pos >= n:
+                continue
+            stats[period] = {
+                'data_points': int(n - pos),
+                'start_date': pd.Timestamp(self.dates[pos]).strftime('%Y-%m-%d'),
+                'end_date': pd.Timestamp(self.dates[-1]).strftime('%Y-%m-%d'),
+            }
+
+        for metric, values in self.values.items():
+            for period, metric_stats in _suffix_stats(self.dates, values, cutoffs).items():
+                if period in stats:
+                    stats[period][metric] = metric_stats
+        return stats
+
+    def rolling_percentile(self, metric: str, window_days: int, min_periods: int = 1) -> pd.Series:
+        """
+        滚动分位数：每个日期的指标值在 [该日期 - window_days 天, 该日期] 内的分位（<= 当前值的比例）
+
+        Args:
+            metric: 指标名（'pe'、'pb'）
+            window_days: 窗口天数，如 3 年为 1095
+            min_periods: 窗口内有效值少于该数量时结果为 NaN
+
+        Returns:
+            pd.Series: 以日期为索引的分位数序列（当日指标缺失为 NaN）
+        """
+        if metric not in self.values:
+            raise KeyError(f"没有 {metric} 数据，可用指标: {list(self.values)}")
+        result = rolling_percentile(self.dates, self.values[metric], window_days, min_periods)
+        return pd.Series(result, index=pd.DatetimeIndex(self.dates), name=f"{metric}_percentile")
+
+
+def _suffix_stats(dates: np.ndarray, values: np.ndarray, cutoffs: Dict[str, datetime]) -> Dict[str, Dict]:
+    """
+    单个指标各周期（后缀区间）的统计
+
+    最新值对所有周期相同，分位数用后缀累计的 (值 <= 最新值) 个数得出；
+    最小/最大/均值用后缀累计结构，中位数对各周期的后缀视图取 np.median
+    """
+    valid = ~np.isnan(values)
+    v = values[valid]
+    if not len(v):
+        return {}
+    n = len(v)
+    anchors = np.searchsorted(dates[valid], [_to_datetime64(c) for c in cutoffs.values()], side='left')
+    current = v[-1]
+    min_after = np.minimum.accumulate(v[::-1])[::-1]
+    max_after = np.maximum.accumulate(v[::-1])[::-1]
+    sum_after = np.cumsum(v[::-1])[::-1]
+    below_after = np.cumsum((v <= current)[::-1])[::-1]
+
+    stats = {}
+    for period, pos in zip(cutoffs, anchors):
+        if pos >= n:
+            continue
+        count = n - pos
+        percentile = below_after[pos] / count if current else None
+        stats[period] = {
+            'current': float(current) if current else None,
+            'min': float(min_after[pos]),
+            'max': float(max_after[pos]),
+            'percentile': float(percentile) if percentile else None,
+            'mean': float(sum_after[pos] / count),
+            'median': float(np.median(v[pos:])),
+        }
+    return stats
+
+
+def rolling_percentile(dates: np.ndarray, values: np.ndarray, window_days: int,
+                       min_periods: int = 1) -> np.ndarray:
+    """
+    按时间窗口滑动计算分位数（增量）
+
+    指标值先按大小编号，窗口右移时把新值加入树状数组、把移出窗口的值减去，
+    每个日期只需 O(log n) 查询 <= 当前值的个数，总复杂度 O(n log n)
+
+    Args:
+        dates: 按升序排列的日期（datetime64）
+        values: 与 dates 对应的指标值，缺失为 NaN（不计入窗口）
+        window_days: 窗口天数，窗口为 [日期 - window_days 天, 日期]
+        min_periods: 窗口内有效值少于该数量时结果为 NaN
+
+    Returns:
+        np.ndarray: 与 dates 对应的 float64 分位数
+    """
+    dates = np.asarray(dates, dtype='datetime64[ns]')
+    values = np.asarray(values, dtype='float64')
+    n = len(values)
+    result = np.full(n, np.nan)
+    valid = ~np.isnan(values)
+    if not valid.any():
+        return result
+
+    # 按大小编号（相同值同号，从 1 开始）
+    ranks = np.zeros(n, dtype='int64')
+    unique, inverse = np.unique(values[valid], return_inverse=True)
+    ranks[valid] = inverse + 1
+    size = len(unique)
+    tree = [0] * (size + 1)
+
+    def add(rank: int, delta: int):
+        while rank <= size:
+            tree[rank] += delta
+            rank += rank & -rank
+
+    def count_le(rank: int) -> int:
+        total = 0
+        while rank > 0:
+            total += tree[rank]
+            rank -= rank & -rank
+        return total
+
+    lefts = np.searchsorted(dates, dates - np.timedelta64(int(window_days), 'D'), side='left')
+    left = 0
+    in_window = 0
+    rank_list = ranks.tolist()
+    for i in range(n):
+        if rank_list[i]:
+            add(rank_list[i], 1)
+            in_window += 1
+        while left < lefts[i]:
+            if rank_list[left]:
+                add(rank_list[left], -1)
+                in_window -= 1
+            left += 1
+        if rank_list[i] and in_window >= min_periods:
+            result[i] = count_le(rank_list[i]) / in_window
+    return result
@@ -0,0 +1,409 @@
+"""
+价格数据后台写入（write-behind）队列
+获取数据的线程只把标准化后的行数据放入队列即返回，由后台线程按批量大小或时间间隔合并写入存储后端：
+
+- 队列中待写入的行数超过上限时，提交方阻塞等待（背压）
+- 存储不可用（整批写入失败）时，把数据追加到本地溢出文件，之后定期重试写入；
+  部分记录写入失败时，只把失败的记录及其月份记录追加到溢出文件
+- 进程退出时（atexit）写入队列中剩余的数据，写入失败的数据保存到溢出文件
+
+月份记录在对应价格数据写入成功后再写入，与同步写入时的顺序一致
+"""
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# 添加父目录到路径，以便导入config
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import (
+    WRITE_BEHIND_BATCH_SIZE,
+    WRITE_BEHIND_FLUSH_INTERVAL,
+    WRITE_BEHIND_MAX_PENDING,
+    WRITE_BEHIND_SPILL_FILE,
+    WRITE_BEHIND_RETRY_INTERVAL
+)
+
+from .storage import failed_price_months
+
+# 月份记录: (symbol, symbol_title, symbol_type, year, month)
+MonthRecord = Tuple[str, str, str, int, int]
+
+
+def _row_key(row) -> Tuple[str, str]:
+    """行数据的 (symbol, trade_date)，与写入结果中 failed_rows 的字段对应"""
+    if isinstance(row, dict):
+        return row['symbol'], str(row['trade_date'])
+    return row[0], str(row[2])
+
+
+class WriteBehindQueue:
+    """
+    价格数据后台写入队列
+
+    队列元素为 (行数据列表, 月份记录列表)，后台线程把多个元素的行数据合并为一次 bulk upsert
+    """
+
+    def __init__(
+        self,
+        write_rows: Callable[[List], Dict],
+        write_month: Callable[..., bool],
+        batch_size: int = 2000,
+        flush_interval: float = 2.0,
+        max_pending: int = 50000,
+        spill_path: Optional[str] = None,
+        retry_interval: float = 60.0
+    ):
+        """
+        Args:
+            write_rows: 批量写入函数，返回 bulk_upsert_prices 格式的结果（或在存储不可用时抛出异常）
+            write_month: 月份记录写入函数，参数同 save_month_record
+            batch_size: 待写入行数达到该值时立即写入
+            flush_interval: 最早一条待写入数据等待超过该时间（秒）时写入
+            max_pending: 待写入行数上限，超过时提交方阻塞
+            spill_path: 溢出文件路径，None 表示存储不可用时丢弃数据（只打印警告）
+            retry_interval: 存储不可用后重试写入溢出文件的间隔（秒）
+        """
+        self.write_rows = write_rows
+        self.write_month = write_month
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.spill_path = spill_path
+        self.retry_interval = retry_interval
+
+        self._cond = threading.Condition()
+        self._pending: List[Tuple[List, List[MonthRecord]]] = []
+        self._pending_rows = 0
+        self._oldest: Optional[float] = None
+        self._writing = 0
+        self._closed = False
+        self._last_failure: Optional[float] = None
+        self._spill_lock = threading.Lock()
+        self._stats = {
+            'submitted_rows': 0,
+            'written_rows': 0,
+            'failed_rows': 0,
+            'spilled_rows': 0,
+            'replayed_rows': 0,
+            'flushes': 0,
+            'blocked': 0,
+            'blocked_time_total': 0.0,
+        }
+        self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self._thread.start()
+
+    def submit(self, rows: Sequence, months: Sequence[MonthRecord] = (), timeout: Optional[float] = None) -> bool:
+        """
+        提交待写入的数据，队列已满时阻塞等待
+
+        Args:
+            rows: 按 PRICE_COLUMNS 排列的元组（或字典）列表
+            months: 价格数据写入成功后需要写入的月份记录
+            timeout: 最长等待时间（秒），None 表示一直等待
+
+        Returns:
+            bool: 是否已放入队列（队列已关闭或等待超时返回 False）
+        """
+        if not rows and not months:
+            return True
+        rows = list(rows)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            if self._pending_rows and self._pending_rows + len(rows) > self.max_pending:
+                self._stats['blocked'] += 1
+                started = time.monotonic()
+                while not self._closed and self._pending_rows and self._pending_rows + len(rows) > self.max_pending:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                self._stats['blocked_time_total'] += time.monotonic() - started
+                if self._pending_rows and self._pending_rows + len(rows) > self.max_pending:
+                    return False
+            if self._closed:
+                return False
+            self._pending.append((rows, list(months)))
+            self._pending_rows += len(rows)
+            self._stats['submitted_rows'] += len(rows)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            self._cond.notify_all()
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        立即写入队列中的数据并等待完成
+
+        Args:
+            timeout: 最长等待时间（秒），None 表示一直等待
+
+        Returns:
+            bool: 队列是否已清空
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._oldest = 0.0 if self._pending else self._oldest
+            self._cond.notify_all()
+            while self._pending or self._writing:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                if self._pending:
+                    self._oldest = 0.0
+                    self._cond.notify_all()
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout: Optional[float] = 30.0):
+        """
+        停止后台线程，写入队列中剩余的数据；未能写入的数据保存到溢出文件
+
+        Args:
+            timeout: 等待后台线程写完的最长时间（秒）
+        """
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        with self._cond:
+            leftover, self._pending, self._pending_rows = self._pending, [], 0
+        if leftover:
+            self._spill(leftover)
+
+    def get_stats(self) -> Dict:
+        """
+        获取队列统计
+
+        Returns:
+            Dict: submitted_rows、written_rows、failed_rows、spilled_rows、replayed_rows、flushes、
+                blocked（提交方阻塞次数）、blocked_time_total、pending_rows、spill_file_exists
+        """
+        with self._cond:
+            stats = dict(self._stats)
+            stats['pending_rows'] = self._pending_rows
+        stats['spill_file_exists'] = bool(self.spill_path and os.path.exists(self.spill_path))
+        return stats
+
+    # ---------- 后台线程 ----------
+
+    def _spill_due(self, now: float) -> bool:
+        """溢出文件是否需要重试写入（上次失败后已超过重试间隔）"""
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return False
+        return self._last_failure is None or now - self._last_failure >= self.retry_interval
+
+    def _wait_time(self, now: float) -> Optional[float]:
+        """距离下一次需要写入的时间（秒），None 表示等待新数据"""
+        waits = []
+        if self._oldest is not None:
+            waits.append(self._oldest + self.flush_interval - now)
+        if self._last_failure is not None and self.spill_path and os.path.exists(self.spill_path):
+            waits.append(self._last_failure + self.retry_interval - now)
+        return max(0.0, min(waits)) if waits else None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed:
+                    now = time.monotonic()
+                    if self._pending_rows >= self.batch_size:
+                        break
+                    if self._oldest is not None and now >= self._oldest + self.flush_interval:
+                        break
+                    if self._spill_due(now):
+                        break
+                    self._cond.wait(self._wait_time(now))
+                batch, self._pending, self._pending_rows = self._pending, [], 0
+                self._oldest = None
+                self._writing += 1
+                closed = self._closed
+                self._cond.notify_all()
+            try:
+                if batch:
+                    self._write(batch)
+                if not closed and self._spill_due(time.monotonic()):
+                    self._replay_spill()
+            except Exception as e:
+                print(f"[ERROR] 后台写入线程出错: {e}")
+            finally:
+                with self._cond:
+                    self._writing -= 1
+                    self._cond.notify_all()
+            if closed:
+                return
+
+    def _write(self, batch: List[Tuple[List, List[MonthRecord]]]) -> bool:
+        """写入一批数据，存储不可用时整批保存到溢出文件，部分记录失败时只保存失败的记录；返回存储是否可用"""
+        rows = [row for item_rows, _ in batch for row in item_rows]
+        error = None
+        report = None
+        try:
+            report = self.write_rows(rows) if rows else None
+        except Exception as e:
+            error = str(e)
+        if report is not None and report['total'] and report['failed'] >= report['total']:
+            error = next((chunk['error'] for chunk in report.get('failed_chunks', [])), '全部写入失败')
+
+        if error is not None:
+            self._last_failure = time.monotonic()
+            print(f"[WARNING] 后台写入 {len(rows)} 条价格数据失败: {error}")
+            self._spill(batch)
+            return False
+
+        with self._cond:
+            self._stats['flushes'] += 1
+            if report is not None:
+                self._stats['written_rows'] += report['inserted'] + report['updated']
+                self._stats['failed_rows'] += report['failed']
+        failed_months = failed_price_months(report) if report is not None else set()
+        if failed_months is None:
+            # 失败无法定位到具体行：整批放入溢出文件（upsert 可重复执行），月份记录在重新写入成功后再写
+            self._last_failure = time.monotonic()
+            print(f"[WARNING] 后台写入有 {report['failed']} 条价格数据失败，无法定位失败的记录，整批保存到溢出文件")
+            self._spill(batch)
+            return True
+        if not failed_months:
+            self._last_failure = None
+            for _, months in batch:
+                for record in months:
+                    self.write_month(*record)
+            return True
+
+        # 部分记录写入失败：失败的记录和所在月份的月份记录放入溢出文件，稍后重试；其余月份照常写月份记录
+        self._last_failure = time.monotonic()
+        failed_keys = {(row['symbol'], str(row['trade_date']))
+                       for chunk in report['failed_chunks'] for row in chunk['failed_rows']}
+        retry_rows = [row for item_rows, _ in batch for row in item_rows if _row_key(row) in failed_keys]
+        retry_months = []
+        for _, months in batch:
+            for record in months:
+                if (record[0], record[3], record[4]) in failed_months:
+                    retry_months.append(record)
+                else:
+                    self.write_month(*record)
+        print(f"[WARNING] 后台写入有 {len(retry_rows)} 条价格数据失败，涉及 {len(retry_months)} 个月份，保存到溢出文件稍后重试")
+        self._spill([(retry_rows, retry_months)])
+        return True
+
+    def _spill(self, batch: List[Tuple[List, List[MonthRecord]]]):
+        """追加到溢出文件（每个元素一行 JSON，写完后 fsync）"""
+        rows = sum(len(item_rows) for item_rows, _ in batch)
+        if not self.spill_path:
+            print(f"[WARNING] 未配置溢出文件，丢弃 {rows} 条待写入价格数据")
+            return
+        try:
+            # 先全部序列化再写文件，某一行无法序列化时不会留下写了一半的溢出文件
+            lines = [json.dumps({'rows': [list(r) if not isinstance(r, dict) else r for r in item_rows],
+                                 'months': [list(m) for m in months]}, ensure_ascii=False)
+                     for item_rows, months in batch]
+            with self._spill_lock:
+                os.makedirs(os.path.dirname(os.path.abspath(self.spill_path)), exist_ok=True)
+                with open(self.spill_path, 'a', encoding='utf-8') as f:
+                    for line in lines:
+                        f.write(line)
+                        f.write('\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+            with self._cond:
+                self._stats['spilled_rows'] += rows
+            print(f"[INFO] {rows} 条价格数据已保存到溢出文件，存储恢复后自动写入: {self.spill_path}")
+        except (OSError, TypeError, ValueError) as e:
+            print(f"[ERROR] 写入溢出文件失败，丢弃 {rows} 条价格数据: {e}")
+
+    def _replay_spill(self):
+        """存储恢复后重新写入溢出文件中的数据（按 batch_size 分批，失败时剩余部分放回溢出文件）"""
+        with self._spill_lock:
+            replay_path = f"{self.spill_path}.replay"
+            try:
+                if not os.path.exists(replay_path):
+                    os.replace(self.spill_path, replay_path)
+                items = []
+                with open(replay_path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        if line.strip():
+                            item = json.loads(line)
+                            items.append(([tuple(r) if isinstance(r, list) else r for r in item['rows']],
+                                          [tuple(m) for m in item['months']]))
+            except (OSError, ValueError) as e:
+                self._last_failure = time.monotonic()
+                print(f"[WARNING] 读取溢出文件失败: {e}")
+                return
+
+        print(f"[INFO] 重新写入溢出文件中的 {sum(len(r) for r, _ in items)} 条价格数据")
+        part, part_rows = [], 0
+        for index, item in enumerate(items):
+            part.append(item)
+            part_rows += len(item[0])
+            if part_rows < self.batch_size and index < len(items) - 1:
+                continue
+            if not self._write(part):
+                # _write 已把本批放回溢出文件，剩余部分同样放回
+                self._spill(items[index + 1:])
+                break
+            with self._cond:
+                self._stats['replayed_rows'] += part_rows
+            part, part_rows = [], 0
+        try:
+            os.remove(replay_path)
+        except OSError:
+            pass
+
+
+# 进程级写入队列
+_default_queue: Optional[WriteBehindQueue] = None
+_default_queue_lock = threading.Lock()
+
+
+def get_write_behind() -> WriteBehindQueue:
+    """获取按 config 配置创建的进程级写入队列（写入当前存储后端），进程退出时自动写完"""
+    global _default_queue
+    if _default_queue is None:
+        with _default_queue_lock:
+            if _default_queue is None:
+                from . import storage
+                _default_queue = WriteBehindQueue(
+                    write_rows=lambda rows: storage.bulk_upsert_prices(rows),
+                    write_month=storage.save_month_record,
+                    batch_size=WRITE_BEHIND_BATCH_SIZE,
+                    flush_interval=WRITE_BEHIND_FLUSH_INTERVAL,
+                    max_pending=WRITE_BEHIND_MAX_PENDING,
+                    spill_path=WRITE_BEHIND_SPILL_FILE or None,
+                    retry_interval=WRITE_BEHIND_RETRY_INTERVAL
+                )
+                atexit.register(close_write_behind)
+    return _default_queue
+
+
+def flush_write_behind(timeout: Optional[float] = None) -> bool:
+    """立即写入进程级队列中的数据并等待完成（未创建队列时直接返回）"""
+    if _default_queue is None:
+        return True
+    return _default_queue.flush(timeout)
+
+
+def close_write_behind():
+    """关闭进程级队列：写入剩余数据，失败的数据保存到溢出文件（进程退出时自动调用）"""
+    global _default_queue
+    with _default_queue_lock:
+        queue, _default_queue = _default_queue, None
+    if queue is not None:
+        queue.close()
+
+
+def get_write_behind_stats() -> Dict:
+    """
+    获取进程级写入队列的统计
+
+    Returns:
+        Dict: 见 WriteBehindQueue.get_stats()，未创建队列时为空字典
+    """
+    if _default_queue is None:
+        return {}
+    return _default_queue.get_stats()
@@ -0,0 +1,127 @@
+"""
+测试浏览器会话复用和健康检查（使用模拟的 WebDriver，不需要 Chrome）
+"""
+from types import SimpleNamespace
+
+from selenium.common.exceptions import NoSuchWindowException, WebDriverException
+
+import browser_automation
+from browser_automation import BrowserSession, check_driver_health
+
+
+class FakeSwitchTo:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def window(self, handle):
+        self.driver.current = handle
+
+    def new_window(self, kind):
+        handle = f"CDwindow-{len(self.driver.handles)}"
+        self.driver.handles.append(handle)
+        self.driver.current = handle
+
+
+class FakeDriver:
+    """
+    closed: 已关闭的标签页（在其中执行脚本抛出 NoSuchWindowException）
+    crashed: 已崩溃的标签页（执行脚本抛出 WebDriverException）
+    disconnected: 与浏览器的连接已断开
+    """
+
+    def __init__(self):
+        self.handles = ['CDwindow-0']
+        self.current = 'CDwindow-0'
+        self.closed = set()
+        self.crashed = set()
+        self.disconnected = False
+        self.quit_called = False
+        self.switch_to = FakeSwitchTo(self)
+
+    @property
+    def window_handles(self):
+        if self.disconnected:
+            raise WebDriverException('chrome not reachable')
+        return [h for h in self.handles if h not in self.closed]
+
+    def execute_script(self, script, *args):
+        if self.current in self.closed:
+            raise NoSuchWindowException('no such window')
+        if self.current in self.crashed:
+            raise WebDriverException('tab crashed')
+        return 1
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_healthy_driver_needs_no_action():
+    assert check_driver_health(FakeDriver()) == (True, None, None)
+
+
+def test_closed_tab_switches_to_remaining_tab():
+    driver = FakeDriver()
+    driver.handles.append('CDwindow-1')
+    driver.current = 'CDwindow-1'
+    driver.closed.add('CDwindow-1')
+    healthy, reason, action = check_driver_health(driver)
+    assert (healthy, action) == (True, 'switch_tab')
+    assert driver.current == 'CDwindow-0'
+
+
+def test_crashed_tab_opens_new_tab():
+    driver = FakeDriver()
+    driver.crashed.add('CDwindow-0')
+    healthy, reason, action = check_driver_health(driver)
+    assert (healthy, action) == (True, 'new_tab')
+    assert driver.current == 'CDwindow-1'
+
+
+def test_disconnected_driver_is_unhealthy():
+    driver = FakeDriver()
+    driver.disconnected = True
+    healthy, reason, action = check_driver_health(driver)
+    assert not healthy and action is None
+
+
+def test_session_reuses_and_recovers():
+    drivers = []
+
+    def factory():
+        drivers.append(FakeDriver())
+        return drivers[-1]
+
+    session = BrowserSession(factory=factory, name='test')
+    first = session.acquire()
+    assert session.acquire() is first
+
+    # 标签页崩溃：在同一浏览器中打开新标签页，不重建会话
+    first.crashed.add(first.current)
+    assert session.acquire() is first
+
+    # 连接断开：退出旧 WebDriver 并重建
+    first.disconnected = True
+    second = session.acquire()
+    assert second is not first
+    assert first.quit_called
+
+    stats = session.get_stats()
+    assert stats['sessions_created'] == 2
+    assert stats['recoveries'] == 2
+    assert stats['total_reuses'] == 2
+    assert [event['event'] for event in stats['events']] == ['new_tab', 'restart']
+    session.close()
+    assert second.quit_called and not session.get_stats()['alive']
+
+
+def test_session_rebuilt_after_max_age(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(browser_automation, 'time', SimpleNamespace(monotonic=lambda: now[0]))
+    session = BrowserSession(factory=FakeDriver, max_age=60, name='test')
+    first = session.acquire()
+    now[0] += 30
+    assert session.acquire() is first
+    now[0] += 31
+    assert session.acquire() is not first
+    assert first.quit_called
+    assert session.get_stats()['events'][-1]['event'] == 'expired'
@@ -0,0 +1,112 @@
+"""
+测试多币种截图农场（使用模拟的 WebDriver，不需要 Chrome）
+"""
+import os
+import threading
+
+from PIL import Image
+
+import browser_automation
+import capture_farm
+import page_readiness
+from capture_farm import CaptureFarm, capture_symbols
+
+
+class FakeDriver:
+    """页面立即就绪，截图保存为 10x10 的纯色 PNG；url 中包含 fail_marker 时截图失败"""
+
+    def __init__(self, user_data_dir, fail_marker=None):
+        self.user_data_dir = user_data_dir
+        self.fail_marker = fail_marker
+        self.url = None
+        self.quit_called = False
+        self.window_handles = ['CDwindow-0']
+
+    def get(self, url):
+        self.url = url
+
+    def execute_script(self, script, *args):
+        return ['complete', self.url, True, 10000]
+
+    def get_log(self, log_type):
+        return []
+
+    def save_screenshot(self, path):
+        if self.fail_marker and self.fail_marker in self.url:
+            raise RuntimeError('screenshot failed')
+        Image.new('RGB', (10, 10), 'red').save(path)
+        return True
+
+    def quit(self):
+        self.quit_called = True
+
+
+def setup_fakes(monkeypatch, tmp_path):
+    monkeypatch.setattr(capture_farm, 'SCREENSHOT_DIR', str(tmp_path))
+    monkeypatch.setattr(browser_automation, 'SCREENSHOT_DIR', str(tmp_path))
+    monkeypatch.setitem(page_readiness.READINESS_PROFILES, 'tradingview',
+                        dict(page_readiness.READINESS_PROFILES['tradingview'], network_idle_ms=0, poll_interval=0.01))
+
+
+def test_farm_distributes_jobs_across_workers(monkeypatch, tmp_path):
+    setup_fakes(monkeypatch, tmp_path)
+    drivers = []
+    lock = threading.Lock()
+
+    def factory(user_data_dir):
+        driver = FakeDriver(user_data_dir)
+        with lock:
+            drivers.append(driver)
+        return driver
+
+    jobs = [(symbol, tf) for symbol in ('BTC', 'ETH', 'SOL') for tf in ('15m', '1h')]
+    with CaptureFarm(workers=2, data_dir=str(tmp_path / 'profiles'), factory=factory) as farm:
+        results = list(farm.capture(jobs))
+        # 第二批任务复用已启动的浏览器
+        results += list(farm.capture([('BTC', '4h')]))
+
+    assert sorted((r.job.symbol, r.job.timeframe) for r in results) == sorted(jobs + [('BTC', '4h')])
+    assert all(r.path and os.path.exists(r.path) for r in results)
+    # 每个工作进程最多一个浏览器，各自使用独立的用户数据目录，关闭农场时全部退出
+    assert len(drivers) <= 2
+    assert len({d.user_data_dir for d in drivers}) == len(drivers)
+    assert all(d.quit_called for d in drivers)
+
+
+def test_capture_symbols_combines_requested_timeframes(monkeypatch, tmp_path):
+    setup_fakes(monkeypatch, tmp_path)
+    timeframes = ['15m', '1h', '4h']
+    farm = CaptureFarm(workers=2, data_dir=str(tmp_path / 'profiles'),
+                       factory=lambda d: FakeDriver(d, fail_marker='SOLUSDT&interval=4h'))
+
+    results = {symbol: (paths, combined) for symbol, paths, combined in
+               capture_symbols(['ETH', 'SOL'], timeframes=timeframes, farm=farm)}
+    farm.close()
+
+    # 3 个周期也组合（2x2 网格，右下留白）；有周期截图失败的币种不组合
+    eth_paths, eth_combined = results['ETH']
+    assert sorted(eth_paths) == sorted(timeframes)
+    with Image.open(eth_combined) as combined:
+        assert combined.size == (20, 20)
+        assert combined.getpixel((15, 15)) == (255, 255, 255)
+        assert combined.getpixel((5, 15)) == (255, 0, 0)
+    sol_paths, sol_combined = results['SOL']
+    assert sorted(sol_paths) == ['15m', '1h']
+    assert sol_combined is None
+
+
+def test_combine_images_uses_timeframe_order(monkeypatch, tmp_path):
+    monkeypatch.setattr(browser_automation, 'SCREENSHOT_DIR', str(tmp_path))
+    colors = {'1d': 'red', '1w': 'blue'}
+    paths = {}
+    for timeframe, color in colors.items():
+        paths[timeframe] = str(tmp_path / f'{timeframe}.png')
+        Image.new('RGB', (10, 10), color).save(paths[timeframe])
+
+    combined_path = browser_automation.combine_images(paths, 'BTC', ['1w', '1d'])
+    with Image.open(combined_path) as combined:
+        assert combined.size == (20, 10)
+        assert combined.getpixel((5, 5)) == (0, 0, 255)
+        assert combined.getpixel((15, 5)) == (255, 0, 0)
+    # 默认周期（TIME_PERIODS）的图片不全时不组合
+    assert browser_automation.combine_images(paths, 'BTC') is None
@@ -0,0 +1,112 @@
+"""
+测试多标签页并行截图（使用模拟的 WebDriver，不需要 Chrome）
+"""
+import os
+
+import browser_automation
+import page_readiness
+
+
+class FakeSwitchTo:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def window(self, handle):
+        self.driver.current_window_handle = handle
+
+    def new_window(self, kind):
+        self.driver.tab_count += 1
+        handle = f"CDwindow-{self.driver.tab_count}"
+        self.driver.window_handles.append(handle)
+        self.driver.current_window_handle = handle
+
+
+class FakeDriver:
+    """每个标签页导航后第 3 次检查时出现图表，截图写入一个空文件"""
+
+    def __init__(self):
+        self.tab_count = 0
+        self.window_handles = ['CDwindow-0']
+        self.current_window_handle = 'CDwindow-0'
+        self.switch_to = FakeSwitchTo(self)
+        self.urls = {}
+        self.checks = {}
+        self.script_timeout = 30
+
+    def execute_script(self, script, *args):
+        handle = self.current_window_handle
+        if 'location' in script:
+            self.urls[handle] = args[0]
+            return None
+        self.checks[handle] = self.checks.get(handle, 0) + 1
+        return ['complete', self.urls.get(handle, 'about:blank'), self.checks[handle] >= 3, 10000]
+
+    def get_log(self, log_type):
+        return []
+
+    def execute_cdp_cmd(self, cmd, params):
+        return {}
+
+    def set_script_timeout(self, timeout):
+        self.script_timeout = timeout
+
+    @property
+    def timeouts(self):
+        return type('Timeouts', (), {'script': self.script_timeout})()
+
+    def execute_async_script(self, script, *args):
+        return True
+
+    def save_screenshot(self, path):
+        open(path, 'wb').close()
+        return True
+
+    def close(self):
+        self.window_handles.remove(self.current_window_handle)
+
+
+def test_capture_charts_parallel(monkeypatch, tmp_path):
+    driver = FakeDriver()
+    timeframes = ['15m', '30m', '1h', '2h']
+    monkeypatch.setattr(browser_automation, 'SCREENSHOT_DIR', str(tmp_path))
+    monkeypatch.setitem(page_readiness.READINESS_PROFILES, 'tradingview',
+                        dict(page_readiness.READINESS_PROFILES['tradingview'], poll_interval=0.01))
+    captured = browser_automation.capture_charts_parallel(driver, [('ETH', tf) for tf in timeframes])
+
+    assert sorted(captured) == sorted(('ETH', tf) for tf in timeframes)
+    for path in captured.values():
+        assert os.path.exists(path)
+        assert os.path.dirname(path) == str(tmp_path)
+    # 每个周期一个标签页，截图后关闭，回到原标签页
+    assert sorted(driver.urls.values()) == sorted(browser_automation.chart_url('ETH', tf) for tf in timeframes)
+    assert driver.window_handles == ['CDwindow-0']
+    assert driver.current_window_handle == 'CDwindow-0'
+    # 截图前等待渲染时临时修改的脚本超时已恢复
+    assert driver.script_timeout == 30
+
+
+def test_headless_browser_uses_local_chrome_version(monkeypatch, tmp_path):
+    # 全局配置为远程调试模式时，无头浏览器仍按本机安装的 Chrome 解析 ChromeDriver
+    monkeypatch.setattr(browser_automation, 'USE_REMOTE_DEBUGGING', True)
+    modes = []
+
+    def fake_version(remote_debugging=None):
+        modes.append(remote_debugging)
+        return '120.0.6099'
+
+    monkeypatch.setattr(browser_automation, 'get_chrome_version', fake_version)
+    monkeypatch.setattr(browser_automation, 'CHROMEDRIVER_CACHE_FILE', str(tmp_path / 'cache.json'))
+    monkeypatch.setattr(browser_automation, 'ChromeDriverManager', lambda: type('M', (), {'install': lambda self: 'chromedriver'})())
+    monkeypatch.setattr(browser_automation.webdriver, 'Chrome', lambda **kwargs: FakeDriver())
+    monkeypatch.setattr(FakeDriver, 'set_window_size', lambda self, w, h: None, raising=False)
+
+    browser_automation.init_headless_browser(str(tmp_path / 'profile'))
+    assert modes == [False]
+
+
+if __name__ == '__main__':
+    import sys
+
+    import pytest
+
+    sys.exit(pytest.main([__file__, '-q']))
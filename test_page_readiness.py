@@ -0,0 +1,69 @@
+"""
+测试页面就绪等待（使用模拟的 WebDriver，不需要 Chrome）
+"""
+import json
+import time
+
+import page_readiness
+from page_readiness import ReadinessWaiter
+
+
+def network_event(method, request_id, webview='tab'):
+    return {'message': json.dumps({'webview': webview, 'message': {'method': method, 'params': {'requestId': request_id}}})}
+
+
+class FakeDriver:
+    """页面状态和性能日志由测试设置；dom_quiet_ms 固定为 0，模拟不停变化的实时行情页面"""
+
+    def __init__(self):
+        self.selector_found = False
+        self.dom_quiet_ms = 0
+        self.logs = []
+
+    def execute_script(self, script, *args):
+        selector = args[0]
+        return ['complete', 'https://example.com/chart', selector is None or self.selector_found, self.dom_quiet_ms]
+
+    def get_log(self, log_type):
+        logs, self.logs = self.logs, []
+        return logs
+
+
+def test_tradingview_ready_without_dom_quiet():
+    # DOM 一直在变化（行情推送），图表容器出现且网络空闲后即就绪
+    driver = FakeDriver()
+    waiter = ReadinessWaiter(driver, 'tradingview', webview='tab', network_idle_ms=0.001)
+    assert not waiter.check()
+    assert 'selector' in waiter.waiting
+    assert 'dom_stable' not in waiter.waiting
+
+    driver.selector_found = True
+    time.sleep(0.01)
+    assert waiter.check()
+    assert waiter.finish()['ready']
+
+
+def test_waits_for_requests_above_max_inflight():
+    driver = FakeDriver()
+    driver.selector_found = True
+    waiter = ReadinessWaiter(driver, 'tradingview', webview='tab', network_idle_ms=0.001)
+
+    # 行情推送的长连接不超过 max_inflight 时视为空闲，超过时继续等待
+    driver.logs = [network_event('Network.requestWillBeSent', str(i)) for i in range(3)]
+    assert not waiter.check()
+    assert waiter.waiting == ['network_idle']
+
+    driver.logs = [network_event('Network.loadingFinished', '0')]
+    time.sleep(0.01)
+    assert waiter.check()
+    assert waiter.finish()['ready']
+
+
+def test_default_profile_still_checks_dom_stable():
+    driver = FakeDriver()
+    waiter = ReadinessWaiter(driver, 'default', network_idle_ms=0, timeout=0)
+    assert waiter.check()
+    result = waiter.finish()
+    assert not result['ready']
+    assert result['waiting'] == ['dom_stable']
+    assert page_readiness.get_profile('tradingview')['dom_stable_ms'] == 0